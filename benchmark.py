@@ -0,0 +1,222 @@
+"""Benchmarks for the parser and the planner.
+
+This module times the main operations of the planner on synthetic catalogs
+of each shape from catalogGenerator, at growing sizes, and estimates how
+each time grows with the number of prerequisite pairs (edges). A scaling
+exponent of 1 means linear time, 2 quadratic, and so on.
+
+The report is JSON, so results can be compared across versions:
+
+    python benchmark.py --max-edges 100000 --output bench_output.txt
+
+run_case: time every operation on one generated catalog.
+run_benchmarks: time every shape at every size and fit the exponents.
+scaling_exponent: the exponent of the growth of a list of timings.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from catalogGenerator import SHAPES, generate_edges, write_catalog
+from courseDataStruct import EnrollmentState
+from plannerMain import TermPlanner, parse_course_data
+
+# Operations timed for each catalog. missing_prereqs is searched in a new
+# state each time; missing_prereqs_memo is answered from the memo of a
+# state that already asked.
+OPERATIONS = ('parse_course_data', 'is_valid', 'generate_schedule',
+              'missing_prereqs', 'missing_prereqs_memo', 'get_course')
+
+# Number of courses looked up to time get_course
+LOOKUPS = 1000
+
+_FORMAT_VERSION = 2
+
+
+def run_case(shape, edge_count, folder, repeat=3, seed=0):
+    """ (str, int, str, int, int) -> dict
+
+    Generate a catalog of the given shape with about edge_count edges in
+    the directory folder, and return its size and the best time of repeat
+    runs of each operation, in seconds. The time of get_course is per
+    lookup; the others are per call, for the top-most course.
+    """
+    edges = generate_edges(shape, edge_count, seed)
+    filename = os.path.join(folder, '%s_%d.txt' % (shape, edge_count))
+    write_catalog(edges, filename)
+
+    planner = TermPlanner(filename, use_cache=False)
+    top = planner.course
+    selected = [top.name]
+    schedule = planner.generate_schedule(selected)
+
+    # Names spread evenly over the catalog
+    names = [course.name for course in planner.catalog]
+    step = max(1, len(names) // LOOKUPS)
+    lookups = names[::step][:LOOKUPS]
+
+    def get_courses():
+        for name in lookups:
+            planner.get_course(name)
+
+    # A new state has an empty memo, so every repeat is searched
+    def missing_prereqs():
+        top.missing_prereqs(EnrollmentState())
+
+    asked = EnrollmentState()
+    top.missing_prereqs(asked)
+
+    timings = {
+        'parse_course_data': _best_time(
+            lambda: parse_course_data(filename), repeat),
+        'is_valid': _best_time(
+            lambda: planner.is_valid(schedule), repeat),
+        'generate_schedule': _best_time(
+            lambda: planner.generate_schedule(selected), repeat),
+        'missing_prereqs': _best_time(missing_prereqs, repeat),
+        'missing_prereqs_memo': _best_time(
+            lambda: top.missing_prereqs(asked), repeat),
+        'get_course': _best_time(get_courses, repeat) / len(lookups),
+    }
+    os.remove(filename)
+
+    return {'shape': shape, 'edges': len(edges), 'courses': len(names),
+            'terms': len(schedule), 'seconds': timings}
+
+
+def run_benchmarks(shapes, sizes, repeat=3, seed=0, progress=None):
+    """ (list of str, list of int, int, int, file) -> dict
+
+    Time every operation on catalogs of each of shapes at each of sizes
+    (in edges), and return the report: the details of the run, the result
+    of each case, and the scaling exponent of each operation for each
+    shape. If progress is given, a line is written to it after each case.
+    """
+    folder = tempfile.mkdtemp()
+    results = []
+    try:
+        for shape in shapes:
+            for size in sizes:
+                result = run_case(shape, size, folder, repeat, seed)
+                results.append(result)
+                if progress is not None:
+                    progress.write('%s %d: %s\n' % (
+                        shape, result['edges'], ' '.join(
+                            '%s=%.3g' % (operation,
+                                         result['seconds'][operation])
+                            for operation in OPERATIONS)))
+                    progress.flush()
+    finally:
+        shutil.rmtree(folder)
+
+    exponents = {}
+    for shape in shapes:
+        cases = [result for result in results if result['shape'] == shape]
+        exponents[shape] = {}
+        for operation in OPERATIONS:
+            exponents[shape][operation] = scaling_exponent(
+                [(case['edges'], case['seconds'][operation])
+                 for case in cases])
+
+    return {'format_version': _FORMAT_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'seed': seed,
+            'results': results,
+            'exponents': exponents}
+
+
+def scaling_exponent(points):
+    """ (list of (int, float)) -> float
+
+    Return the slope of the least squares line through the (size, seconds)
+    points on a log-log scale, or None if there are fewer than two points
+    with different sizes and non-zero times.
+    """
+    logs = [(math.log(size), math.log(seconds))
+            for size, seconds in points if size > 0 and seconds > 0]
+    if len(logs) < 2:
+        return None
+
+    mean_x = sum(x for x, y in logs) / len(logs)
+    mean_y = sum(y for x, y in logs) / len(logs)
+    spread = sum((x - mean_x) ** 2 for x, y in logs)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in logs) / spread
+
+
+def powers_of_ten(lowest, highest):
+    """ (int, int) -> list of int
+
+    Return the powers of ten from lowest to highest, inclusive.
+    """
+    sizes = []
+    size = 1
+    while size <= highest:
+        if size >= lowest:
+            sizes.append(size)
+        size *= 10
+    return sizes
+
+
+def _best_time(function, repeat):
+    """ (function, int) -> float
+
+    Return the shortest time, in seconds, of repeat calls of function.
+    """
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(argv=None):
+    """ (list of str) -> NoneType
+
+    Run the benchmarks with the command line arguments argv and write the
+    report.
+    """
+    parser = argparse.ArgumentParser(
+        description='Time the planner on synthetic catalogs.')
+    parser.add_argument('--shapes', default=','.join(SHAPES),
+                        help='comma-separated shapes (default: all)')
+    parser.add_argument('--min-edges', type=int, default=100)
+    parser.add_argument('--max-edges', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='file for the JSON report '
+                        '(default: standard output)')
+    args = parser.parse_args(argv)
+
+    shapes = args.shapes.split(',')
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error('unknown shape: %s' % shape)
+
+    report = run_benchmarks(shapes,
+                            powers_of_ten(args.min_edges, args.max_edges),
+                            args.repeat, args.seed, progress=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Unit tests for benchmark.py """
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from benchmark import OPERATIONS, main, powers_of_ten, run_benchmarks
+from benchmark import scaling_exponent
+
+
+class TestScalingExponent(unittest.TestCase):
+
+    def test_linear(self):
+        self.assertAlmostEqual(1.0, scaling_exponent(
+            [(10, 0.5), (100, 5.0), (1000, 50.0)]))
+
+    def test_quadratic(self):
+        self.assertAlmostEqual(2.0, scaling_exponent(
+            [(10, 1.0), (100, 100.0)]))
+
+    def test_too_few_points(self):
+        self.assertIsNone(scaling_exponent([(10, 1.0)]))
+        self.assertIsNone(scaling_exponent([(10, 1.0), (10, 2.0)]))
+        self.assertIsNone(scaling_exponent([(10, 1.0), (100, 0.0)]))
+
+
+class TestRunBenchmarks(unittest.TestCase):
+
+    def test_powers_of_ten(self):
+        self.assertEqual([100, 1000, 10000], powers_of_ten(100, 50000))
+
+    def test_report(self):
+        progress = io.StringIO()
+        report = run_benchmarks(['chain', 'diamonds'], [10, 100], repeat=1,
+                                progress=progress)
+        self.assertEqual(4, len(report['results']))
+        self.assertEqual(4, len(progress.getvalue().splitlines()))
+        for result in report['results']:
+            self.assertEqual(set(OPERATIONS), set(result['seconds']))
+        self.assertEqual(set(['chain', 'diamonds']),
+                         set(report['exponents']))
+        # Everything can be saved as JSON
+        json.dumps(report)
+
+    def test_main(self):
+        handle, output = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            main(['--shapes', 'fan_in', '--min-edges', '10',
+                  '--max-edges', '100', '--repeat', '1',
+                  '--output', output])
+            with open(output) as report_file:
+                report = json.load(report_file)
+        finally:
+            os.remove(output)
+        self.assertEqual([10, 100], [result['edges']
+                                     for result in report['results']])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
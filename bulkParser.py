@@ -0,0 +1,380 @@
+"""Bulk parser for large prerequisite files.
+
+This module reads a prerequisite file in the format of parse_course_data
+without making a Course object per line. The file is memory-mapped and split
+into words a large chunk at a time; course names are numbered as they are
+first seen, and the prerequisites are gathered as arrays of those numbers.
+Nothing is checked while reading: duplicate prerequisites are found
+afterwards with one set of all of them, cycles with one topological sort
+over the whole file, and prerequisites already in a course's tree through
+earlier lines with a search from each course that could have one. All are
+reported with the lines they come from, and a file is rejected exactly when
+parse_course_data rejects it.
+
+The arrays are what this module saves time on: they go straight into a
+CompactCatalog, which is faster and smaller than parsing the file into
+Course objects and then compacting them. Building a CourseCatalog from
+the arrays would be slower than parse_catalog, so parse_catalog_bulk only
+makes the compact form; use parse_catalog for Course objects.
+
+read_edge_arrays: the arrays of the catalog of a prerequisite file.
+edge_arrays: the arrays of the catalog of numbered prerequisites.
+edge_catalog: the compact catalog of numbered prerequisites.
+parse_catalog_bulk: the compact catalog of a prerequisite file.
+"""
+
+import mmap
+import os
+import re
+from array import array
+from collections import Counter
+from itertools import accumulate, compress, repeat
+from operator import add, and_, eq, lt, mul, sub
+
+from compactCatalog import CompactCatalog
+from courseDataStruct import PrerequisiteError
+
+# Size of the chunks the file is read in, in bytes
+CHUNK_SIZE = 1 << 23
+
+# A line that does not hold exactly two names
+_ODD_LINE = re.compile(
+    rb'^(?![ \t\r\f\v]*\S+[ \t\r\f\v]+\S+[ \t\r\f\v]*$)', re.MULTILINE)
+
+
+def parse_catalog_bulk(filename):
+    """ (str) -> CompactCatalog
+
+    Read in prerequisite data from the file called filename and return a
+    compact catalog of all the courses it mentions. The courses, their
+    prerequisites and the root are the same as those of parse_catalog.
+
+    Raise PrerequisiteError, with the line number, if a course is its own
+    prerequisite, a prerequisite is given twice or is already in the
+    course's tree through earlier lines, or prerequisites form a cycle.
+    Raise ValueError, with the line number, if a line that is not
+    blank has fewer than two names.
+    """
+    return edge_catalog(*_read_file_edges(filename))
+
+
+def read_edge_arrays(filename):
+    """ (str) -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog of the prerequisite file filename, as
+    described by catalogCache.read_snapshot_arrays. Errors are raised as
+    by parse_catalog_bulk.
+    """
+    return edge_arrays(*_read_file_edges(filename))
+
+
+def edge_arrays(names, prereq_ids, course_ids, lines, unique=False):
+    """ (list of str, array of int, array of int, array of int, bool)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog in which the course with ID
+    prereq_ids[i] is a prerequisite of the course with ID course_ids[i],
+    given on line lines[i], for each i in order. Courses are numbered in
+    the order they were first seen, and names holds the name of each.
+    If unique is True, no prerequisite is given twice, and that is not
+    checked again. Errors are raised as by parse_catalog_bulk.
+    """
+    (names, prereq_starts, prereq_ids, dependent_starts, dependent_ids,
+     positions, root_id, order) = _edge_parts(names, prereq_ids, course_ids,
+                                              lines, unique)
+    return names, prereq_starts[1:], prereq_ids, order, root_id
+
+
+def edge_catalog(names, prereq_ids, course_ids, lines, unique=False):
+    """ (list of str, array of int, array of int, array of int, bool)
+        -> CompactCatalog
+
+    Return the compact catalog of the prerequisites given as for
+    edge_arrays. The arrays made to check them are the arrays of the
+    catalog, so none of them is sorted again.
+    """
+    return CompactCatalog.from_parts(*_edge_parts(
+        names, prereq_ids, course_ids, lines, unique)[:7])
+
+
+def _read_file_edges(filename):
+    """ (str) -> (list of str, array of int, array of int, array of int)
+
+    Return the names, the prerequisite and course IDs and the lines of the
+    prerequisites of the prerequisite file filename.
+    """
+    ids = {}
+    prereq_ids = array('I')
+    course_ids = array('I')
+    # Line of each prerequisite, counting from 1
+    lines = array('I')
+
+    with open(filename, 'rb') as my_file:
+        if os.fstat(my_file.fileno()).st_size > 0:
+            with mmap.mmap(my_file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                _read_edges(data, ids, prereq_ids, course_ids, lines)
+
+    names = [name.decode('utf-8') for name in ids]
+    return names, prereq_ids, course_ids, lines
+
+
+def _edge_parts(names, prereq_ids, course_ids, lines, unique):
+    """ (list of str, array of int, array of int, array of int, bool)
+        -> (list of str, array of int, array of int, array of int,
+            array of int, array of int, int, array of int)
+
+    Check the prerequisites given as for edge_arrays, and return the
+    arguments of CompactCatalog.from_parts for their catalog, followed by
+    the IDs of the courses in topological order.
+    """
+    # The same root as CourseCatalog.add_edge finds: the course of the
+    # first prerequisite, then of each later one whose prerequisite is the
+    # root so far, found with array.index instead of a loop over them all
+    root_id = -1
+    if course_ids:
+        position = 0
+        root_id = course_ids[0]
+        while True:
+            try:
+                position = prereq_ids.index(root_id, position + 1)
+            except ValueError:
+                break
+            root_id = course_ids[position]
+
+    _check_edges(names, prereq_ids, course_ids, lines, unique)
+    count = len(names)
+    prereq_starts, by_course = _group(count, course_ids)
+    sorted_prereqs = array('I', map(prereq_ids.__getitem__, by_course))
+    # The dependents of each course, in the order of their IDs, as
+    # CompactCatalog keeps them
+    sorted_courses = array('I', map(course_ids.__getitem__, by_course))
+    dependent_starts, by_prereq = _group(count, sorted_prereqs)
+    dependent_ids = array('I', map(sorted_courses.__getitem__, by_prereq))
+    sorted_courses = by_prereq = None
+
+    if all(map(lt, prereq_ids, course_ids)):
+        # Every prerequisite was seen before its course, as in a file
+        # listed from the bottom up, so the IDs are already in order
+        order = positions = array('I', range(count))
+    else:
+        order = _topological_order(names, prereq_starts, sorted_prereqs,
+                                   dependent_starts, dependent_ids, lines,
+                                   by_course)
+        positions = array('I', bytes(4 * count))
+        for position, course_id in enumerate(order):
+            positions[course_id] = position
+    _check_redundant(names, prereq_starts, sorted_prereqs, prereq_ids,
+                     course_ids, lines, by_course, positions)
+
+    return (names, prereq_starts, sorted_prereqs, dependent_starts,
+            dependent_ids, positions, root_id, order)
+
+
+def _read_edges(data, ids, prereq_ids, course_ids, lines):
+    """ (mmap, dict of {bytes: int}, array of int, array of int,
+         array of int) -> NoneType
+
+    Add the prerequisites in data to the arrays, numbering new names in
+    ids as they are first seen.
+    """
+    line = 1
+    start = 0
+    while start < len(data):
+        # Chunks end at the end of a line
+        end = data.rfind(b'\n', start, start + CHUNK_SIZE) + 1
+        if end <= start:
+            end = data.find(b'\n', start + CHUNK_SIZE) + 1
+            if end <= start:
+                end = len(data)
+        chunk = data[start:end]
+        line_count = chunk.count(b'\n')
+        if chunk.endswith(b'\n'):
+            last = len(chunk) - 1
+        else:
+            last = len(chunk)
+            line_count += 1
+
+        if _ODD_LINE.search(chunk, 0, last) is None:
+            # Every line has a prerequisite and a course, and nothing else
+            words = chunk.split()
+            _number(words, ids)
+            numbers = array('I', map(ids.__getitem__, words))
+            prereq_ids.extend(numbers[0::2])
+            course_ids.extend(numbers[1::2])
+            lines.extend(range(line, line + line_count))
+        else:
+            for offset, text in enumerate(chunk.split(b'\n')):
+                one_line = text.split()
+                # Skip blank lines
+                if not one_line:
+                    continue
+                if len(one_line) < 2:
+                    raise ValueError('line %d: expected a prerequisite and '
+                                     'a course' % (line + offset))
+                _number(one_line[:2], ids)
+                prereq_ids.append(ids[one_line[0]])
+                course_ids.append(ids[one_line[1]])
+                lines.append(line + offset)
+
+        line += line_count
+        start = end
+
+
+def _number(words, ids):
+    """ (list of bytes, dict of {bytes: int}) -> NoneType
+
+    Give each of words that is not in ids the next number, in the order
+    they are first seen.
+    """
+    for word in dict.fromkeys(words):
+        if word not in ids:
+            ids[word] = len(ids)
+
+
+def _group(count, keys):
+    """ (int, array of int) -> (array of int, list of int)
+
+    Return, for keys between 0 and count - 1, where the positions of each
+    key start in the sorted keys, followed by the number of keys, and the
+    positions of keys sorted by key (keeping equal keys in order).
+    """
+    counts = Counter(keys)
+    starts = array('I', [0])
+    starts.extend(accumulate(map(counts.get, range(count), repeat(0))))
+    return starts, sorted(range(len(keys)), key=keys.__getitem__)
+
+
+def _check_edges(names, prereq_ids, course_ids, lines, unique=False):
+    """ (list of str, array of int, array of int, array of int, bool)
+        -> NoneType
+
+    Raise PrerequisiteError if a course is its own prerequisite or, unless
+    unique is True, has the same prerequisite twice.
+    """
+    if any(map(eq, prereq_ids, course_ids)):
+        index = list(map(eq, prereq_ids, course_ids)).index(True)
+        raise PrerequisiteError('line %d: %s is its own prerequisite' %
+                                (lines[index], names[course_ids[index]]))
+    if unique:
+        return
+
+    # One number for each pair, so the set holds no tuples
+    pairs = map(add, map(mul, prereq_ids, repeat(len(names))), course_ids)
+    if len(set(pairs)) < len(prereq_ids):
+        seen = set()
+        for index, edge in enumerate(zip(prereq_ids, course_ids)):
+            if edge in seen:
+                raise PrerequisiteError(
+                    'line %d: %s is already a prerequisite of %s' %
+                    (lines[index], names[edge[0]], names[edge[1]]))
+            seen.add(edge)
+
+
+def _topological_order(names, prereq_starts, sorted_prereqs,
+                       dependent_starts, dependent_ids, lines, by_course):
+    """ (list of str, array of int, array of int, array of int,
+         array of int, array of int, list of int) -> array of int
+
+    Return the IDs of the courses, prerequisites first, given the
+    prerequisites and the dependents grouped by course. by_course holds
+    the position in the file of each prerequisite grouped by course.
+    Raise PrerequisiteError, with the lines of the prerequisites involved,
+    if the prerequisites form a cycle.
+    """
+    count = len(names)
+    # Number of prerequisites of each course not placed yet
+    remaining = list(map(sub, prereq_starts[1:], prereq_starts))
+
+    order = [course_id for course_id in range(count)
+             if remaining[course_id] == 0]
+    for course_id in order:
+        for dependent in dependent_ids[dependent_starts[course_id]:
+                                       dependent_starts[course_id + 1]]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) < count:
+        sorted_lines = array('I', map(lines.__getitem__, by_course))
+        raise PrerequisiteError(_describe_cycle(
+            names, prereq_starts, sorted_prereqs, sorted_lines, remaining))
+    return array('I', order)
+
+
+def _check_redundant(names, prereq_starts, sorted_prereqs, prereq_ids,
+                     course_ids, lines, by_course, positions):
+    """ (list of str, array of int, array of int, array of int,
+         array of int, array of int, list of int, array of int) -> NoneType
+
+    Raise PrerequisiteError, with the line number, if a prerequisite is
+    already in its course's tree through the prerequisites on earlier
+    lines, as Course.add_prereq would. by_course holds the position in the
+    file of each prerequisite grouped by course, and positions the
+    position of each course in a topological order; a course can only be
+    in the tree of the courses after it.
+    """
+    # Another path from a course to a prerequisite needs both a line
+    # before it with the same prerequisite and one with the same course
+    count = len(prereq_ids)
+    backwards = range(count - 1, -1, -1)
+    first_dependent = dict(zip(reversed(prereq_ids), backwards))
+    first_prereq = dict(zip(reversed(course_ids), backwards))
+    indexes = range(count)
+    candidates = compress(indexes, map(
+        and_, map(lt, map(first_dependent.__getitem__, prereq_ids), indexes),
+        map(lt, map(first_prereq.__getitem__, course_ids), indexes)))
+
+    for index in candidates:
+        prereq_id = prereq_ids[index]
+        course_id = course_ids[index]
+        lowest = positions[prereq_id]
+        stack = [course_id]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            for group_index in range(prereq_starts[current],
+                                     prereq_starts[current + 1]):
+                # Each course's prerequisites are in the order of the file
+                if by_course[group_index] >= index:
+                    break
+                each_id = sorted_prereqs[group_index]
+                if each_id == prereq_id:
+                    raise PrerequisiteError(
+                        'line %d: %s is already in the prerequisite tree '
+                        'of %s' % (lines[index], names[prereq_id],
+                                   names[course_id]))
+                if positions[each_id] > lowest and each_id not in seen:
+                    seen.add(each_id)
+                    stack.append(each_id)
+
+
+def _describe_cycle(names, prereq_starts, prereq_ids, lines, remaining):
+    """ (list of str, array of int, array of int, array of int,
+         list of int) -> str
+
+    Return a description of one cycle among the courses left with
+    remaining prerequisites by a topological sort, with the lines of its
+    prerequisites.
+    """
+    # Every course left has a prerequisite left, so following them from
+    # any course left must come back to a course already on the path
+    course_id = min(course_id for course_id in range(len(names))
+                    if remaining[course_id] > 0)
+    path = []
+    on_path = {}
+    while course_id not in on_path:
+        on_path[course_id] = len(path)
+        for index in range(prereq_starts[course_id],
+                           prereq_starts[course_id + 1]):
+            if remaining[prereq_ids[index]] > 0:
+                break
+        path.append((course_id, lines[index]))
+        course_id = prereq_ids[index]
+
+    cycle = path[on_path[course_id]:]
+    return 'prerequisites form a cycle: %s (lines %s)' % (
+        ' <- '.join([names[each_id] for each_id, line in cycle] +
+                    [names[course_id]]),
+        ', '.join(str(line) for each_id, line in sorted(
+            cycle, key=lambda step: step[1])))
@@ -0,0 +1,126 @@
+""" Unit tests for bulkParser.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+import bulkParser
+from bulkParser import parse_catalog_bulk, read_edge_arrays
+from catalogCache import catalog_arrays
+from compactCatalog import CompactCatalog
+from courseDataStruct import PrerequisiteError
+from plannerMain import TermPlanner, parse_catalog
+
+
+class TestSameAsParser(unittest.TestCase):
+
+    def test_test_files(self):
+        for filename in ['test1.txt', 'test2.txt', 'test3.txt', 'test4.txt',
+                         'test5.txt']:
+            expected = catalog_arrays(parse_catalog(filename))
+            names, prereq_ends, prereq_ids, order, root_id = \
+                read_edge_arrays(filename)
+            self.assertEqual(expected[0], names)
+            self.assertEqual(expected[1], prereq_ends)
+            self.assertEqual(expected[2], prereq_ids)
+            self.assertEqual(expected[4], root_id)
+
+    def test_catalog(self):
+        catalog = parse_catalog_bulk('test3.txt')
+        self.assertIsInstance(catalog, CompactCatalog)
+        self.assertEqual('CSC201', catalog.root.name)
+        self.assertEqual(['CSC101', 'CSC102', 'CSC151'],
+                         catalog.get('CSC201').missing_prereqs()[2:5])
+        planner = TermPlanner.from_catalog(catalog)
+        self.assertEqual(TermPlanner('test3.txt').generate_schedule(
+            ['MAT151']), planner.generate_schedule(['MAT151']))
+
+    def test_same_as_compact(self):
+        for filename in ['test3.txt', 'test5.txt']:
+            catalog = parse_catalog_bulk(filename)
+            expected = CompactCatalog(*read_edge_arrays(filename))
+            for attribute in ['names', 'prereq_starts', 'prereq_ids',
+                              'dependent_starts', 'dependent_ids',
+                              'positions']:
+                self.assertEqual(list(getattr(expected, attribute)),
+                                 list(getattr(catalog, attribute)))
+            self.assertEqual(expected.root_id, catalog.root_id)
+
+    def test_root(self):
+        self.assertEqual('UT400', parse_catalog_bulk('test5.txt').root.name)
+
+
+class TestBulkFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.txt')
+        self.chunk_size = bulkParser.CHUNK_SIZE
+
+    def tearDown(self):
+        bulkParser.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.folder)
+
+    def write(self, text):
+        with open(self.filename, 'w') as my_file:
+            my_file.write(text)
+
+    def test_empty(self):
+        self.write('')
+        names, prereq_ends, prereq_ids, order, root_id = \
+            read_edge_arrays(self.filename)
+        self.assertEqual([], names)
+        self.assertEqual(-1, root_id)
+
+    def test_blank_lines_and_extra_words(self):
+        self.write('\nCSC101 CSC151 note\n   \nCSC151 CSC201')
+        catalog = parse_catalog_bulk(self.filename)
+        self.assertEqual(3, len(catalog))
+        self.assertEqual('CSC201', catalog.root.name)
+
+    def test_small_chunks(self):
+        self.write(''.join('C%d C%d\n' % (i, i + 1) for i in range(200)) +
+                   '\nC200 C201\n')
+        bulkParser.CHUNK_SIZE = 16
+        names, prereq_ends, prereq_ids, order, root_id = \
+            read_edge_arrays(self.filename)
+        self.assertEqual(202, len(names))
+        self.assertEqual('C201', names[root_id])
+
+    def test_redundant_prereq(self):
+        self.write('A B\nB C\nD E\nA C\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'line 4'):
+            read_edge_arrays(self.filename)
+        with self.assertRaises(PrerequisiteError):
+            parse_catalog(self.filename)
+
+    def test_redundant_prereq_given_first(self):
+        self.write('A C\nB C\nA B\n')
+        self.assertEqual(['A', 'B'], parse_catalog_bulk(
+            self.filename).get('C').missing_prereqs())
+        self.assertEqual(['A', 'B'],
+                         parse_catalog(self.filename).get('C').missing_prereqs())
+
+    def test_short_line(self):
+        self.write('A B\n\nC\n')
+        with self.assertRaisesRegex(ValueError, 'line 3'):
+            read_edge_arrays(self.filename)
+
+    def test_own_prereq(self):
+        self.write('A B\nB B\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'line 2'):
+            read_edge_arrays(self.filename)
+
+    def test_duplicate(self):
+        self.write('A B\nC B\nA B\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'line 3'):
+            read_edge_arrays(self.filename)
+
+    def test_cycle(self):
+        self.write('X A\nA B\nB C\nD E\nC A\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'lines 2, 3, 5'):
+            read_edge_arrays(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
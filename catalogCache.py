@@ -0,0 +1,318 @@
+"""Compiled catalog snapshots.
+
+This module saves a parsed catalog as a binary snapshot next to its
+prerequisite file, and loads it back without parsing the file or checking
+every prerequisite again. A snapshot is only used while the file it was
+made from is unchanged.
+
+The snapshot holds the course names once each, the prerequisites of every
+course as arrays of integer IDs, and the topological order of the courses,
+so the catalog can be rebuilt in one pass.
+
+read_snapshot: load the catalog of a prerequisite file from its snapshot.
+read_snapshot_arrays: load the arrays of a snapshot, without any courses.
+catalog_arrays: the arrays a snapshot would hold for a catalog.
+build_catalog: the catalog described by the arrays of a snapshot.
+write_snapshot: save the snapshot of the catalog of a prerequisite file.
+is_current: whether a file is unchanged since its key was taken.
+source_key: the key a saved file is checked against.
+collector_paused: pause the cyclic garbage collector while loading.
+"""
+
+import gc
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+from operator import attrgetter
+
+from courseCatalog import CourseCatalog
+from courseDataStruct import Course
+
+# Added to the name of a prerequisite file to get the name of its snapshot
+CACHE_SUFFIX = '.plancache'
+
+_MAGIC = b'PLNCACHE'
+_FORMAT_VERSION = 1
+
+# Magic, format version, source mtime (ns), source size, source SHA-256,
+# number of courses, number of prerequisites, root ID (-1 if none),
+# length of the source path and length of the names, in bytes
+_HEADER = struct.Struct('<8sIqq32sIIiII')
+
+# Number of collector_paused statements running, in any thread, and
+# whether the collector was running before the first of them
+_pauses = 0
+_was_running = False
+_pause_lock = threading.Lock()
+
+
+def cache_path(filename):
+    """ (str) -> str
+
+    Return the name of the snapshot of the prerequisite file filename.
+    """
+    return filename + CACHE_SUFFIX
+
+
+def read_snapshot(filename):
+    """ (str) -> CourseCatalog
+
+    Return the catalog saved in the snapshot of the prerequisite file
+    filename, or None if there is no usable snapshot: it is missing,
+    damaged, or made from another version of the file.
+    """
+    arrays = read_snapshot_arrays(filename)
+    if arrays is None:
+        return None
+
+    try:
+        return build_catalog(*arrays)
+    except (ValueError, IndexError):
+        return None
+
+
+def read_snapshot_arrays(filename):
+    """ (str) -> (list of str, array of int, array of int, array of int, int)
+
+    Return what is saved in the snapshot of the prerequisite file filename,
+    or None if there is no usable snapshot. Courses are numbered in the
+    order they were first seen, and the snapshot holds:
+    - the name of each course
+    - the end of the prerequisites of each course in the next array
+    - the IDs of the prerequisites of all courses, end to end
+    - the IDs of the courses in topological order
+    - the ID of the root, or -1 if there are no courses
+    """
+    try:
+        with open(cache_path(filename), 'rb') as cache_file:
+            with mmap.mmap(cache_file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                return _read_arrays(data, filename)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+
+def write_snapshot(catalog, filename):
+    """ (CourseCatalog, str) -> bool
+
+    Save the snapshot of catalog, parsed from the prerequisite file
+    filename, next to the file. Return False if it could not be written.
+    """
+    names, prereq_ends, prereq_ids, order, root_id = catalog_arrays(catalog)
+
+    # Names end to end, with the end of each one
+    name_ends = array('I')
+    length = 0
+    for name in names:
+        length += len(name)
+        name_ends.append(length)
+    name_bytes = ''.join(names).encode('utf-8')
+
+    if sys.byteorder != 'little':
+        for each_array in (name_ends, prereq_ends, prereq_ids, order):
+            each_array.byteswap()
+
+    try:
+        mtime, size, digest = source_key(filename)
+        path = os.path.abspath(filename).encode('utf-8')
+        header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, mtime, size, digest,
+                              len(names), len(prereq_ids), root_id,
+                              len(path), len(name_bytes))
+
+        # Write to a new file first, so readers never see half of one
+        target = cache_path(filename)
+        partial = '%s.%d.tmp' % (target, os.getpid())
+        with open(partial, 'wb') as cache_file:
+            cache_file.write(header)
+            for each_array in (name_ends, prereq_ends, prereq_ids, order):
+                each_array.tofile(cache_file)
+            cache_file.write(path)
+            cache_file.write(name_bytes)
+        os.replace(partial, target)
+    except OSError:
+        return False
+
+    return True
+
+
+def catalog_arrays(catalog):
+    """ (CourseCatalog)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays that describe catalog, the same way as
+    read_snapshot_arrays.
+    """
+    courses = list(catalog)
+    ids = {}
+    for course_id, course in enumerate(courses):
+        ids[course] = course_id
+
+    names = [course.name for course in courses]
+
+    # Prerequisites of all courses end to end, with the end of each list
+    prereq_ends = array('I')
+    prereq_ids = array('I')
+    for course in courses:
+        for pre_course in course.prereqs:
+            prereq_ids.append(ids[pre_course])
+        prereq_ends.append(len(prereq_ids))
+
+    order = array('I', [ids[course] for course in
+                        sorted(courses, key=attrgetter('_order'))])
+
+    if catalog.root is None:
+        root_id = -1
+    else:
+        root_id = ids[catalog.root]
+
+    return names, prereq_ends, prereq_ids, order, root_id
+
+
+def _read_arrays(data, filename):
+    """ (mmap, str)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays in the snapshot data of the prerequisite file
+    filename, or None if it was made from another version of the file.
+    Raise ValueError if the snapshot is damaged.
+    """
+    (magic, version, mtime, size, digest, course_count, prereq_count,
+     root_id, path_length, names_length) = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _FORMAT_VERSION:
+        return None
+
+    # Arrays, then the source path and the names
+    offset = _HEADER.size
+    name_ends = _read_array(data, offset, course_count)
+    offset += 4 * course_count
+    prereq_ends = _read_array(data, offset, course_count)
+    offset += 4 * course_count
+    prereq_ids = _read_array(data, offset, prereq_count)
+    offset += 4 * prereq_count
+    order = _read_array(data, offset, course_count)
+    offset += 4 * course_count
+    path = data[offset:offset + path_length].decode('utf-8')
+    offset += path_length
+    names = data[offset:offset + names_length].decode('utf-8')
+
+    if path != os.path.abspath(filename):
+        return None
+    if not is_current(filename, mtime, size, digest):
+        return None
+
+    # Split the names, each of which is only in the snapshot once
+    name_starts = array('I', [0])
+    name_starts.extend(name_ends[:-1])
+    name_list = list(map(names.__getitem__, map(slice, name_starts,
+                                                name_ends)))
+
+    return name_list, prereq_ends, prereq_ids, order, root_id
+
+
+def build_catalog(names, prereq_ends, prereq_ids, order, root_id):
+    """ (list of str, array of int, array of int, array of int, int)
+        -> CourseCatalog
+
+    Return the catalog of courses described by the arrays of a snapshot.
+    Raise ValueError if they are not in topological order.
+
+    The courses are built inside collector_paused: the collector would
+    otherwise search every new course for cycles over and over, which
+    takes most of the time of a large catalog. None of the objects made
+    here are garbage, so pausing it loses nothing.
+    """
+    # Build the courses prerequisites first, then add them in the order
+    # they were first seen
+    courses = [None] * len(names)
+    course_of = courses.__getitem__
+    starts = array('I', [0])
+    starts.extend(prereq_ends)
+    with collector_paused():
+        for course_id in order:
+            prereqs = list(map(course_of, prereq_ids[starts[course_id]:
+                                                     starts[course_id + 1]]))
+            if None in prereqs:
+                raise ValueError('prerequisites out of order')
+            courses[course_id] = Course(names[course_id], prereqs)
+
+    catalog = CourseCatalog()
+    catalog.add_courses(courses)
+    if root_id >= 0:
+        catalog.root = courses[root_id]
+
+    return catalog
+
+
+def _read_array(data, offset, count):
+    """ (mmap, int, int) -> array of int
+
+    Return the count unsigned 32-bit integers in data from offset.
+    Raise ValueError if data ends before them.
+    """
+    result = array('I')
+    result.frombytes(data[offset:offset + 4 * count])
+    if len(result) != count:
+        raise ValueError('snapshot is truncated')
+    if sys.byteorder != 'little':
+        result.byteswap()
+    return result
+
+
+@contextmanager
+def collector_paused():
+    """ () -> context manager
+
+    Pause the cyclic garbage collector for the length of a with statement,
+    if it is running. The collector is paused for every thread of the
+    process, so the statement should only hold work that makes no
+    garbage, such as building courses. Statements running at once, in
+    the same thread or not, are counted: the collector runs again when
+    the last of them ends, if it was running before the first began.
+    """
+    global _pauses, _was_running
+    with _pause_lock:
+        if _pauses == 0:
+            _was_running = gc.isenabled()
+            gc.disable()
+        _pauses += 1
+    try:
+        yield
+    finally:
+        with _pause_lock:
+            _pauses -= 1
+            if _pauses == 0 and _was_running:
+                gc.enable()
+
+
+def is_current(filename, mtime, size, digest):
+    """ (str, int, int, bytes) -> bool
+
+    Return True if the file filename is the one that had the given
+    modification time, size and SHA-256 digest.
+    """
+    status = os.stat(filename)
+    if status.st_mtime_ns == mtime and status.st_size == size:
+        return True
+    # The file was touched or copied; it may still have the same content
+    return status.st_size == size and source_key(filename)[2] == digest
+
+
+def source_key(filename):
+    """ (str) -> (int, int, bytes)
+
+    Return the modification time, size and SHA-256 digest of the file
+    filename.
+    """
+    status = os.stat(filename)
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as source:
+        chunk = source.read(1 << 20)
+        while chunk:
+            digest.update(chunk)
+            chunk = source.read(1 << 20)
+    return status.st_mtime_ns, status.st_size, digest.digest()
@@ -0,0 +1,120 @@
+""" Unit tests for catalogCache.py """
+
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+from catalogCache import read_snapshot, write_snapshot, cache_path
+from catalogCache import collector_paused
+from plannerMain import TermPlanner, parse_catalog, load_catalog
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.txt')
+        shutil.copy('test3.txt', self.filename)
+        self.parsed = parse_catalog(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_no_snapshot(self):
+        self.assertIsNone(read_snapshot(self.filename))
+
+    def test_round_trip(self):
+        self.assertTrue(write_snapshot(self.parsed, self.filename))
+        loaded = read_snapshot(self.filename)
+
+        self.assertEqual([c.name for c in self.parsed],
+                         [c.name for c in loaded])
+        for course in self.parsed:
+            self.assertEqual([p.name for p in course.prereqs],
+                             [p.name for p in loaded.get(course.name).prereqs])
+        self.assertEqual('CSC201', loaded.root.name)
+
+    def test_loaded_courses_are_ordered(self):
+        write_snapshot(self.parsed, self.filename)
+        loaded = read_snapshot(self.filename)
+        for course in loaded:
+            for pre_course in course.prereqs:
+                self.assertLess(pre_course._order, course._order)
+        # New prerequisites are still checked
+        loaded.add_edge('BIO101', 'CSC101')
+
+    def test_changed_file(self):
+        write_snapshot(self.parsed, self.filename)
+        with open(self.filename, 'a') as my_file:
+            my_file.write('\nPHY101 CSC201')
+        self.assertIsNone(read_snapshot(self.filename))
+
+    def test_touched_file(self):
+        write_snapshot(self.parsed, self.filename)
+        status = os.stat(self.filename)
+        os.utime(self.filename, ns=(status.st_atime_ns,
+                                    status.st_mtime_ns + 10 ** 9))
+        self.assertIsNotNone(read_snapshot(self.filename))
+
+    def test_damaged_snapshot(self):
+        write_snapshot(self.parsed, self.filename)
+        with open(cache_path(self.filename), 'r+b') as cache_file:
+            cache_file.truncate(100)
+        self.assertIsNone(read_snapshot(self.filename))
+
+    def test_load_catalog_saves_snapshot(self):
+        load_catalog(self.filename)
+        self.assertTrue(os.path.exists(cache_path(self.filename)))
+        self.assertEqual(9, len(load_catalog(self.filename)))
+
+    def test_planner_writes_nothing(self):
+        TermPlanner(self.filename)
+        self.assertFalse(os.path.exists(cache_path(self.filename)))
+
+    def test_build_leaves_collector_running(self):
+        write_snapshot(self.parsed, self.filename)
+        read_snapshot(self.filename)
+        self.assertTrue(gc.isenabled())
+
+    def test_planner_from_snapshot(self):
+        TermPlanner(self.filename, use_cache=True)
+        planner = TermPlanner(self.filename, use_cache=True)
+        self.assertEqual([['BIO101', 'CHM101', 'MAT101', 'SOC101', 'CSC102'],
+                          ['MAT151', 'CSC101']],
+                         planner.generate_schedule(['MAT151']))
+
+
+class TestCollectorPaused(unittest.TestCase):
+
+    def test_paused_and_restored(self):
+        self.assertTrue(gc.isenabled())
+        with collector_paused():
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+
+    def test_left_off(self):
+        gc.disable()
+        try:
+            with collector_paused():
+                pass
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+    def test_nested(self):
+        with collector_paused():
+            with collector_paused():
+                pass
+            self.assertFalse(gc.isenabled())
+        self.assertTrue(gc.isenabled())
+
+    def test_restored_after_error(self):
+        with self.assertRaises(ValueError):
+            with collector_paused():
+                raise ValueError
+        self.assertTrue(gc.isenabled())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,37 @@
+"""Prerequisite delta files.
+
+A delta file lists changes to the prerequisites of a loaded catalog, one
+per line: '+ CSC101 CSC151' makes CSC101 a prerequisite of CSC151, and
+'- CSC101 CSC151' removes it. Blank lines and lines starting with '#' are
+skipped. The changes are applied in order, by CourseCatalog.apply_delta.
+
+read_delta: the changes in a delta file.
+"""
+
+# Signs of the changes of a delta file
+ADD = '+'
+REMOVE = '-'
+
+
+def read_delta(filename):
+    """ (str) -> (list of (bool, str, str), list of int)
+
+    Return the changes in the delta file filename, as taken by
+    CourseCatalog.apply_delta, and the line each one is on, counting
+    from 1.
+    Raise ValueError, with the line number, if a line that is not blank or
+    a comment is not a change.
+    """
+    changes = []
+    lines = []
+    with open(filename) as delta_file:
+        for line_number, line in enumerate(delta_file, 1):
+            words = line.split()
+            if not words or words[0].startswith('#'):
+                continue
+            if len(words) != 3 or words[0] not in (ADD, REMOVE):
+                raise ValueError('line %d: expected %s or %s, a prerequisite '
+                                 'and a course' % (line_number, ADD, REMOVE))
+            changes.append((words[0] == ADD, words[1], words[2]))
+            lines.append(line_number)
+    return changes, lines
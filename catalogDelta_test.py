@@ -0,0 +1,46 @@
+""" Unit tests for catalogDelta.py """
+
+import os
+import tempfile
+import unittest
+from catalogDelta import read_delta
+
+
+class TestReadDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'delta.txt')
+
+    def tearDown(self):
+        os.remove(self.filename)
+        os.rmdir(self.directory)
+
+    def write(self, text):
+        with open(self.filename, 'w') as delta_file:
+            delta_file.write(text)
+
+    def test_changes(self):
+        self.write('# from the registrar\n'
+                   '+ CSC101 CSC151\n'
+                   '\n'
+                   '-  MAT101\tMAT151\n')
+        self.assertEqual(([(True, 'CSC101', 'CSC151'),
+                           (False, 'MAT101', 'MAT151')], [2, 4]),
+                         read_delta(self.filename))
+
+    def test_empty(self):
+        self.write('')
+        self.assertEqual(([], []), read_delta(self.filename))
+
+    def test_bad_lines(self):
+        for text in ['CSC101 CSC151\n', '+ CSC101\n', '* CSC101 CSC151\n',
+                     '+ CSC101 CSC151 MAT101\n']:
+            self.write('+ A B\n' + text)
+            with self.assertRaises(ValueError) as context:
+                read_delta(self.filename)
+            self.assertIn('line 2', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
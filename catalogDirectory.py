@@ -0,0 +1,270 @@
+"""Catalogs made of many prerequisite files.
+
+This module loads every prerequisite file in a directory (for example, one
+file per department) as one catalog. Each file is parsed and checked on its
+own in a worker process, and the parts are then merged: courses with the
+same name in different files are the same course, and a cycle through
+several files is found when the parts are put in topological order. A
+prerequisite that a later file gives a course which already has it in its
+tree through an earlier file is rejected, as it would be if the files were
+one file read in order.
+
+parse_directory: the catalog of every prerequisite file in a directory.
+merge_arrays: the arrays of one catalog made of several.
+"""
+
+import glob
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from catalogCache import build_catalog, catalog_arrays
+from courseDataStruct import PrerequisiteError
+from plannerMain import parse_catalog
+
+# Names of the prerequisite files of a directory
+FILE_PATTERN = '*.txt'
+
+
+def parse_directory(path, max_workers=None, pattern=FILE_PATTERN):
+    """ (str, int, str) -> CourseCatalog
+
+    Read in the prerequisite files in the directory called path whose
+    names match pattern, using up to max_workers processes (by default,
+    one per CPU), and return a catalog of all the courses they mention.
+    The catalog can have several top-most courses; its root is the root
+    of the first file, by name, that is still top-most.
+
+    Raise PrerequisiteError if a file has a prerequisite that
+    parse_course_data would reject, or if prerequisites in different
+    files form a cycle or give a course a prerequisite twice.
+    """
+    filenames = sorted(glob.glob(os.path.join(path, pattern)))
+
+    if len(filenames) <= 1 or max_workers == 1:
+        parts = [_parse_part(filename) for filename in filenames]
+    else:
+        with ProcessPoolExecutor(max_workers) as executor:
+            parts = list(executor.map(_parse_part, filenames))
+
+    return build_catalog(*merge_arrays(parts, filenames))
+
+
+def merge_arrays(parts, labels=None):
+    """ (list of (list of str, array of int, array of int, array of int,
+         int), list of str)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays, as described by catalogCache.read_snapshot_arrays,
+    of the catalog made of the catalogs described by parts. A course named
+    in several parts is one course with the prerequisites of all of them;
+    a prerequisite given by several parts is kept once. labels name the
+    parts in errors (by default, by their position).
+
+    The root is the root of the first part that is still not a
+    prerequisite of any course, or else the first such course.
+
+    Raise PrerequisiteError if the prerequisites of the parts form a
+    cycle, or if a part gives a course a prerequisite that is already in
+    its tree through prerequisites given by an earlier part.
+    """
+    if labels is None:
+        labels = ['part %d' % i for i in range(len(parts))]
+
+    names = []
+    ids = {}
+    prereqs = []
+    # Index of the part that gave each prerequisite in prereqs
+    prereq_parts = []
+    # Label of the first part that named each course
+    sources = []
+    part_roots = []
+    # Indexes of the parts that name a course an earlier part named
+    overlapping = set()
+
+    for index, (part, label) in enumerate(zip(parts, labels)):
+        part_names, prereq_ends, prereq_ids, order, root_id = part
+        # ID of each course of the part in the merged catalog
+        merged_ids = []
+        for name in part_names:
+            course_id = ids.get(name)
+            if course_id is None:
+                course_id = len(names)
+                ids[name] = course_id
+                names.append(name)
+                prereqs.append([])
+                prereq_parts.append([])
+                sources.append(label)
+            elif sources[course_id] != label:
+                overlapping.add(index)
+            merged_ids.append(course_id)
+
+        start = 0
+        for local_id, end in enumerate(prereq_ends):
+            course_id = merged_ids[local_id]
+            course_prereqs = prereqs[course_id]
+            new_prereqs = [merged_ids[prereq_id]
+                           for prereq_id in prereq_ids[start:end]]
+            if course_prereqs:
+                # Named by an earlier part too; skip what it already gave
+                known = set(course_prereqs)
+                for prereq_id in new_prereqs:
+                    if prereq_id not in known:
+                        known.add(prereq_id)
+                        course_prereqs.append(prereq_id)
+                        prereq_parts[course_id].append(index)
+            else:
+                course_prereqs.extend(new_prereqs)
+                prereq_parts[course_id].extend([index] * len(new_prereqs))
+            start = end
+
+        if root_id >= 0:
+            part_roots.append(merged_ids[root_id])
+
+    order = _topological_order(names, prereqs, sources)
+    if overlapping:
+        _check_redundant(names, prereqs, prereq_parts, order, overlapping,
+                         labels)
+
+    # The courses that are still top-most after merging
+    has_dependents = [False] * len(names)
+    for course_prereqs in prereqs:
+        for prereq_id in course_prereqs:
+            has_dependents[prereq_id] = True
+    root_id = -1
+    for part_root in part_roots:
+        if not has_dependents[part_root]:
+            root_id = part_root
+            break
+    else:
+        for course_id in range(len(names)):
+            if not has_dependents[course_id]:
+                root_id = course_id
+                break
+
+    prereq_ends = array('I')
+    prereq_ids = array('I')
+    for course_prereqs in prereqs:
+        prereq_ids.extend(course_prereqs)
+        prereq_ends.append(len(prereq_ids))
+
+    return names, prereq_ends, prereq_ids, array('I', order), root_id
+
+
+def _topological_order(names, prereqs, sources):
+    """ (list of str, list of (list of int), list of str) -> list of int
+
+    Return the IDs of the courses with the given names and prerequisite
+    IDs, prerequisites first. sources name where each course came from.
+    Raise PrerequisiteError if the prerequisites form a cycle.
+    """
+    # Number of prerequisites of each course not placed yet
+    remaining = [len(course_prereqs) for course_prereqs in prereqs]
+    dependents = [[] for name in names]
+    for course_id, course_prereqs in enumerate(prereqs):
+        for prereq_id in course_prereqs:
+            dependents[prereq_id].append(course_id)
+
+    order = [course_id for course_id in range(len(names))
+             if remaining[course_id] == 0]
+    for course_id in order:
+        for dependent in dependents[course_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+
+    if len(order) < len(names):
+        # Every course left is in a cycle or depends on one
+        stuck = [course_id for course_id in range(len(names))
+                 if remaining[course_id] > 0]
+        files = sorted(set(sources[course_id] for course_id in stuck))
+        raise PrerequisiteError(
+            'prerequisites form a cycle through %s (courses: %s)' %
+            (', '.join(files),
+             ', '.join(names[course_id] for course_id in stuck[:10])))
+
+    return order
+
+
+def _check_redundant(names, prereqs, prereq_parts, order, overlapping,
+                     labels):
+    """ (list of str, list of (list of int), list of (list of int),
+         list of int, set of int, list of str) -> NoneType
+
+    Raise PrerequisiteError if a prerequisite given by one of the parts
+    whose indexes are in overlapping can be reached from its course through
+    other prerequisites, at least one of them given by an earlier part.
+    prereq_parts give the part of each prerequisite in prereqs, and order
+    is a topological order of the courses. labels name the parts.
+    """
+    # Position of each course in order; a course can only be reached
+    # from courses after it
+    positions = [0] * len(names)
+    for position, course_id in enumerate(order):
+        positions[course_id] = position
+
+    # Number of dependents of each course; a course with one dependent
+    # can only be reached through it
+    dependent_counts = [0] * len(names)
+    for course_prereqs in prereqs:
+        for prereq_id in course_prereqs:
+            dependent_counts[prereq_id] += 1
+
+    for course_id, course_prereqs in enumerate(prereqs):
+        for target, part in zip(course_prereqs, prereq_parts[course_id]):
+            if part not in overlapping or dependent_counts[target] == 1:
+                continue
+            earlier = _earlier_path(prereqs, prereq_parts, positions,
+                                    course_id, target, part)
+            if earlier is not None:
+                raise PrerequisiteError(
+                    '%s already has %s in its tree through %s; %s gives it '
+                    'again' % (names[course_id], names[target],
+                               labels[earlier], labels[part]))
+
+
+def _earlier_path(prereqs, prereq_parts, positions, course_id, target, part):
+    """ (list of (list of int), list of (list of int), list of int, int,
+         int, int) -> int or NoneType
+
+    Return the index of a part before part that gave a prerequisite on a
+    path from the course course_id to the course target, other than the
+    prerequisite target itself, or None if there is no such path.
+    """
+    lowest = positions[target]
+    # Each entry is a course and the earlier part on the path to it so far
+    stack = [(course_id, None)]
+    seen = set()
+    while stack:
+        current, earlier = stack.pop()
+        for prereq_id, prereq_part in zip(prereqs[current],
+                                          prereq_parts[current]):
+            if current == course_id and prereq_id == target:
+                continue
+            if earlier is None and prereq_part < part:
+                via = prereq_part
+            else:
+                via = earlier
+            if prereq_id == target:
+                if via is not None:
+                    return via
+            elif positions[prereq_id] > lowest:
+                key = (prereq_id, via is not None)
+                if key not in seen:
+                    seen.add(key)
+                    stack.append((prereq_id, via))
+    return None
+
+
+def _parse_part(filename):
+    """ (str) -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog of the prerequisite file filename.
+    Raise PrerequisiteError, naming the file, if it has a prerequisite
+    that parse_course_data would reject.
+    """
+    try:
+        catalog = parse_catalog(filename)
+    except PrerequisiteError as error:
+        raise PrerequisiteError('%s: %s' % (filename, error))
+    return catalog_arrays(catalog)
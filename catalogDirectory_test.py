@@ -0,0 +1,122 @@
+""" Unit tests for catalogDirectory.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+from catalogCache import catalog_arrays
+from catalogDirectory import merge_arrays, parse_directory
+from courseDataStruct import PrerequisiteError
+from plannerMain import TermPlanner, parse_catalog
+
+
+class TestParseDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.write('csc.txt', 'CSC101 CSC151\nCSC151 CSC201\nMAT151 CSC201\n')
+        self.write('mat.txt', 'MAT101 MAT151\nMAT151 MAT201\n')
+        self.write('bio.txt', 'BIO101 BIO201\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, filename, text):
+        with open(os.path.join(self.folder, filename), 'w') as my_file:
+            my_file.write(text)
+
+    def test_all_courses(self):
+        catalog = parse_directory(self.folder, max_workers=1)
+        self.assertEqual(8, len(catalog))
+        self.assertEqual(['BIO101', 'BIO201', 'CSC101', 'CSC151', 'CSC201',
+                          'MAT151', 'MAT101', 'MAT201'],
+                         [course.name for course in catalog])
+
+    def test_shared_course(self):
+        catalog = parse_directory(self.folder, max_workers=1)
+        mat151 = catalog.get('MAT151')
+        self.assertEqual(['MAT101'], [c.name for c in mat151.prereqs])
+        self.assertEqual(['CSC201', 'MAT201'],
+                         [c.name for c in mat151.dependents])
+        self.assertEqual(['CSC101', 'CSC151', 'MAT101', 'MAT151'],
+                         catalog.get('CSC201').missing_prereqs())
+
+    def test_roots(self):
+        catalog = parse_directory(self.folder, max_workers=1)
+        self.assertEqual(['BIO201', 'CSC201', 'MAT201'],
+                         [course.name for course in catalog.roots()])
+        self.assertEqual('BIO201', catalog.root.name)
+
+    def test_in_parallel(self):
+        expected = catalog_arrays(parse_directory(self.folder, 1))
+        self.assertEqual(expected,
+                         catalog_arrays(parse_directory(self.folder, 2)))
+
+    def test_cycle_between_files(self):
+        self.write('mat.txt', 'MAT101 MAT151\nCSC201 MAT101\n')
+        with self.assertRaises(PrerequisiteError) as caught:
+            parse_directory(self.folder, max_workers=2)
+        self.assertIn('csc.txt', str(caught.exception))
+        self.assertIn('mat.txt', str(caught.exception))
+
+    def test_error_in_file(self):
+        self.write('phy.txt', 'PHY101 PHY201\nPHY201 PHY101\n')
+        with self.assertRaises(PrerequisiteError) as caught:
+            parse_directory(self.folder, max_workers=2)
+        self.assertIn('phy.txt', str(caught.exception))
+
+    def test_same_prereq_twice(self):
+        self.write('mat.txt', 'MAT101 MAT151\nCSC151 CSC201\n')
+        catalog = parse_directory(self.folder, max_workers=1)
+        self.assertEqual(['CSC151', 'MAT151'],
+                         [c.name for c in catalog.get('CSC201').prereqs])
+
+    def test_redundant_between_files(self):
+        self.write('ant.txt', 'ANT101 ANT301\n')
+        self.write('art.txt', 'ART101 ANT101\nART101 ANT301\n')
+        with self.assertRaises(PrerequisiteError) as caught:
+            parse_directory(self.folder, max_workers=2)
+        self.assertIn('ant.txt', str(caught.exception))
+        self.assertIn('art.txt', str(caught.exception))
+        whole = os.path.join(self.folder, 'whole')
+        with open(whole, 'w') as my_file:
+            my_file.write('ANT101 ANT301\nART101 ANT101\nART101 ANT301\n')
+        with self.assertRaises(PrerequisiteError):
+            parse_catalog(whole)
+
+    def test_redundant_in_earlier_file(self):
+        self.write('ant.txt', 'ART101 ANT301\n')
+        self.write('art.txt', 'ANT101 ANT301\nART101 ANT101\n')
+        catalog = parse_directory(self.folder, max_workers=1)
+        self.assertEqual(['ART101', 'ANT101'],
+                         [c.name for c in catalog.get('ANT301').prereqs])
+
+    def test_empty(self):
+        catalog = parse_directory(os.path.join(self.folder, 'none'))
+        self.assertEqual(0, len(catalog))
+        self.assertIsNone(catalog.root)
+
+    def test_planner(self):
+        planner = TermPlanner.from_directory(self.folder, max_workers=1)
+        schedule = planner.generate_schedule(['CSC201', 'BIO201'])
+        self.assertTrue(planner.is_valid(schedule))
+        self.assertIn('BIO201', schedule[-1] + schedule[-2])
+
+
+class TestMergeArrays(unittest.TestCase):
+
+    def test_one_part(self):
+        arrays = catalog_arrays(parse_catalog('test3.txt'))
+        self.assertEqual(arrays[0], merge_arrays([arrays])[0])
+        self.assertEqual(arrays[4], merge_arrays([arrays])[4])
+
+    def test_labels(self):
+        first = catalog_arrays(parse_catalog('test1.txt'))
+        second = (['CSC151', 'CSC101'], [0, 1], [0], [0, 1], 1)
+        with self.assertRaises(PrerequisiteError) as caught:
+            merge_arrays([first, second])
+        self.assertIn('part 0', str(caught.exception))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,143 @@
+"""Synthetic prerequisite catalogs.
+
+This module generates prerequisite data with the shapes found in real
+catalogs, at any size, for benchmarks and tests. Every generated catalog
+is accepted by parse_course_data: it has no cycles and no prerequisite that
+is already in a course's tree, and its lines are listed from the bottom up
+so the top-most course is found as the root.
+
+chain_edges: one long chain of courses.
+fan_in_edges: one course with many prerequisites.
+diamond_edges: layers of courses that all need the whole layer below.
+random_dag_edges: random layers of courses with random prerequisites.
+write_catalog: save edges as a prerequisite file.
+"""
+
+import random
+
+# Shape names, for the generators below
+SHAPES = ('chain', 'fan_in', 'diamonds', 'random_dag')
+
+
+def chain_edges(edge_count):
+    """ (int) -> list of (str, str)
+
+    Return the (prerequisite, course) pairs of a chain of edge_count + 1
+    courses, each one the prerequisite of the next.
+    """
+    names = _names(edge_count + 1)
+    return [(names[i], names[i + 1]) for i in range(edge_count)]
+
+
+def fan_in_edges(edge_count):
+    """ (int) -> list of (str, str)
+
+    Return the (prerequisite, course) pairs of one course that has
+    edge_count prerequisites, none of which have prerequisites.
+    """
+    names = _names(edge_count + 1)
+    top = names[-1]
+    return [(names[i], top) for i in range(edge_count)]
+
+
+def diamond_edges(edge_count, width=2):
+    """ (int, int) -> list of (str, str)
+
+    Return the (prerequisite, course) pairs of layers of width courses in
+    which every course needs every course of the layer below, capped by a
+    single top course. The number of pairs is close to edge_count.
+    """
+    layer_count = max(1, (edge_count - width) // (width * width) + 1)
+    names = _names(layer_count * width + 1)
+
+    edges = []
+    for layer in range(1, layer_count):
+        below = names[(layer - 1) * width:layer * width]
+        for course in names[layer * width:(layer + 1) * width]:
+            for prereq in below:
+                edges.append((prereq, course))
+
+    top = names[-1]
+    for prereq in names[(layer_count - 1) * width:layer_count * width]:
+        edges.append((prereq, top))
+    return edges
+
+
+def random_dag_edges(edge_count, seed=0, max_width=8):
+    """ (int, int, int) -> list of (str, str)
+
+    Return the (prerequisite, course) pairs of a random catalog: layers of
+    1 to max_width courses, where every course needs at least one course
+    of the layer below and is needed by at least one course of the layer
+    above, capped by a single top course. The number of pairs is close to
+    edge_count. The same seed always gives the same catalog.
+    """
+    generator = random.Random(seed)
+
+    # Layers of course numbers, added until there are enough pairs
+    pairs = []
+    below = [0]
+    count = 1
+    while len(pairs) < edge_count:
+        width = generator.randint(1, max_width)
+        layer = list(range(count, count + width))
+        count += width
+        pairs.extend(_layer_pairs(below, layer, generator))
+        below = layer
+    pairs.extend(_layer_pairs(below, [count], generator))
+
+    names = _names(count + 1)
+    return [(names[prereq], names[course]) for prereq, course in pairs]
+
+
+def _layer_pairs(below, layer, generator):
+    """ (list of int, list of int, Random) -> list of (int, int)
+
+    Return random (prerequisite, course) pairs from the courses below to
+    the courses of layer, in which every course of both appears.
+    """
+    pairs = set()
+    for i in range(max(len(below), len(layer))):
+        pairs.add((below[i % len(below)], layer[i % len(layer)]))
+    for i in range((len(below) * len(layer)) // 4):
+        pairs.add((generator.choice(below), generator.choice(layer)))
+    return sorted(pairs)
+
+
+def generate_edges(shape, edge_count, seed=0):
+    """ (str, int, int) -> list of (str, str)
+
+    Return the (prerequisite, course) pairs of a catalog of the given
+    shape, one of SHAPES, with about edge_count pairs.
+    Raise ValueError if shape is unknown.
+    """
+    if shape == 'chain':
+        return chain_edges(edge_count)
+    elif shape == 'fan_in':
+        return fan_in_edges(edge_count)
+    elif shape == 'diamonds':
+        return diamond_edges(edge_count)
+    elif shape == 'random_dag':
+        return random_dag_edges(edge_count, seed)
+    else:
+        raise ValueError('unknown shape: %s' % shape)
+
+
+def write_catalog(edges, filename):
+    """ (list of (str, str), str) -> NoneType
+
+    Write edges to the file called filename, one "prerequisite course"
+    line each, in the format read by parse_course_data.
+    """
+    with open(filename, 'w') as my_file:
+        for prereq, course in edges:
+            my_file.write('%s %s\n' % (prereq, course))
+
+
+def _names(count):
+    """ (int) -> list of str
+
+    Return count course names, in increasing order.
+    """
+    digits = len(str(count))
+    return ['C%0*d' % (digits, i) for i in range(count)]
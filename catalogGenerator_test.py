@@ -0,0 +1,76 @@
+""" Unit tests for catalogGenerator.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+from catalogGenerator import SHAPES, generate_edges, write_catalog
+from catalogGenerator import chain_edges, diamond_edges, fan_in_edges
+from catalogGenerator import random_dag_edges
+from plannerMain import TermPlanner, parse_catalog
+
+
+class TestShapes(unittest.TestCase):
+
+    def test_chain(self):
+        self.assertEqual([('C0', 'C1'), ('C1', 'C2')], chain_edges(2))
+
+    def test_fan_in(self):
+        edges = fan_in_edges(20)
+        self.assertEqual(20, len(edges))
+        self.assertEqual(set(['C20']), set(course for pre, course in edges))
+
+    def test_diamonds(self):
+        edges = diamond_edges(10)
+        self.assertEqual([('C0', 'C2'), ('C1', 'C2'), ('C0', 'C3'),
+                          ('C1', 'C3'), ('C2', 'C4'), ('C3', 'C4'),
+                          ('C2', 'C5'), ('C3', 'C5'), ('C4', 'C6'),
+                          ('C5', 'C6')], edges)
+
+    def test_random_dag_size(self):
+        for edge_count in [1, 100, 5000]:
+            edges = random_dag_edges(edge_count)
+            self.assertGreaterEqual(len(edges), edge_count)
+            self.assertLess(len(edges), edge_count + 100)
+            self.assertEqual(len(edges), len(set(edges)))
+
+    def test_random_dag_seed(self):
+        self.assertEqual(random_dag_edges(500, 7), random_dag_edges(500, 7))
+        self.assertNotEqual(random_dag_edges(500, 7),
+                            random_dag_edges(500, 8))
+
+    def test_unknown_shape(self):
+        with self.assertRaises(ValueError):
+            generate_edges('tree', 10)
+
+
+class TestWriteCatalog(unittest.TestCase):
+    # Every shape is a valid catalog with a single top-most course
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_shapes_parse(self):
+        for shape in SHAPES:
+            for edge_count in [1, 10, 1000]:
+                write_catalog(generate_edges(shape, edge_count, 3),
+                              self.filename)
+                catalog = parse_catalog(self.filename)
+                self.assertEqual(len(catalog) - 1,
+                                 len(catalog.root.missing_prereqs()))
+
+    def test_shapes_schedule(self):
+        for shape in SHAPES:
+            write_catalog(generate_edges(shape, 300), self.filename)
+            planner = TermPlanner(self.filename, use_cache=False)
+            schedule = planner.generate_schedule([planner.course.name])
+            self.assertEqual([planner.course.name], schedule[-1])
+            self.assertTrue(planner.is_valid(schedule))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
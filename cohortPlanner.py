@@ -0,0 +1,226 @@
+"""Parallel schedule planning for whole cohorts.
+
+This module plans the schedules of many students at once over a pool of
+worker processes. The catalog is loaded once, turned into the arrays of a
+CompactCatalog, prerequisites and dependents both, and published in a
+block of shared memory. Each worker plans on a CompactCatalog whose
+arrays are views of that block, so no worker parses the prerequisite
+file, unpickles any course objects, copies the arrays or sorts them
+again. Only the names are decoded in each worker, since courses are
+looked up by name.
+
+SharedCatalog: the arrays of a catalog, in shared memory.
+attach_shared_catalog: the catalog published in shared memory.
+plan_cohort: the schedules of many students, planned in parallel.
+"""
+
+import struct
+from array import array
+from itertools import accumulate
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from catalogCache import catalog_arrays, read_snapshot_arrays
+from catalogCache import write_snapshot
+from compactCatalog import CompactCatalog
+from plannerMain import NoCourseFound, TermPlanner, parse_catalog
+
+# Number of courses, number of prerequisites, root ID (-1 if none) and
+# length of the names, in bytes
+_HEADER = struct.Struct('=IIiI')
+
+# The planner of each worker process, over the published catalog, and
+# the block of shared memory it is in
+_planner = None
+_memory = None
+
+
+class SharedCatalog:
+    """The arrays of a catalog, published in a block of shared memory.
+
+    The block holds a header, the end of each name, then the
+    prerequisite starts, prerequisite IDs, dependent starts, dependent IDs
+    and positions of a CompactCatalog, and then the names. Other processes
+    attach to it with attach_shared_catalog.
+
+    The publisher must close the catalog when it is no longer needed, which
+    frees the block; it can also be used in a with statement.
+
+    Attributes:
+    - name (str): the name of the block of shared memory
+    """
+
+    def __init__(self, arrays):
+        """ (SharedCatalog,
+             (list of str, array of int, array of int, array of int, int))
+            -> NoneType
+
+        Publish the arrays of a catalog, as returned by
+        catalogCache.catalog_arrays, in a new block of shared memory.
+        """
+        # The dependents are sorted out once, here, for every worker
+        catalog = CompactCatalog(*arrays)
+        names = catalog.names
+
+        name_ends = array('I', accumulate(map(len, names)))
+        name_bytes = ''.join(names).encode('utf-8')
+
+        chunks = [_HEADER.pack(len(names), len(catalog.prereq_ids),
+                               catalog.root_id, len(name_bytes))]
+        for each_array in (name_ends, catalog.prereq_starts,
+                           catalog.prereq_ids, catalog.dependent_starts,
+                           catalog.dependent_ids, catalog.positions):
+            chunks.append(each_array.tobytes())
+        chunks.append(name_bytes)
+
+        size = sum(len(chunk) for chunk in chunks)
+        self._memory = shared_memory.SharedMemory(create=True,
+                                                  size=max(size, 1))
+        self.name = self._memory.name
+        offset = 0
+        for chunk in chunks:
+            self._memory.buf[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+
+    def close(self):
+        """ (SharedCatalog) -> NoneType
+
+        Free the block of shared memory. Closing twice does nothing.
+        """
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self):
+        """ (SharedCatalog) -> SharedCatalog
+
+        Return this catalog, to be closed at the end of a with statement.
+        """
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        """ (SharedCatalog, type, Exception, traceback) -> NoneType
+
+        Close this catalog.
+        """
+        self.close()
+
+
+def attach_shared_catalog(name):
+    """ (str) -> (CompactCatalog, shared_memory.SharedMemory)
+
+    Return the catalog published in the block of shared memory called name
+    by a SharedCatalog, and the block. The arrays of the catalog are views
+    of the block, not copies, so the block must be kept open as long as
+    the catalog is used, and only closed once the catalog is gone.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    course_count, prereq_count, root_id, names_length = \
+        _HEADER.unpack_from(memory.buf)
+    sizes = [course_count, course_count + 1, prereq_count, course_count + 1,
+             prereq_count, course_count]
+    words = memoryview(memory.buf)[_HEADER.size:
+                                   _HEADER.size + 4 * sum(sizes)].cast('I')
+    views = []
+    start = 0
+    for size in sizes:
+        views.append(words[start:start + size])
+        start += size
+    name_ends = views.pop(0)
+
+    names_start = _HEADER.size + 4 * sum(sizes)
+    names = bytes(memory.buf[names_start:names_start + names_length]).decode(
+        'utf-8')
+    name_starts = array('I', [0])
+    name_starts.extend(name_ends[:-1])
+    name_list = list(map(names.__getitem__, map(slice, name_starts,
+                                                name_ends)))
+
+    return CompactCatalog.from_parts(name_list, *views, root_id), memory
+
+
+def plan_cohort(filename, selections, states=None, max_workers=None,
+                chunksize=64, use_cache=False):
+    """ (str, iterable of (list of str), iterable of EnrollmentState, int,
+         int, bool) -> iterator of (list of (list of str) or NoCourseFound)
+
+    Plan a schedule for each list of selected courses in selections, as
+    TermPlanner.generate_schedule does, over up to max_workers processes
+    (by default, one per CPU). If states is given, each schedule is for a
+    student who has taken the courses in the matching state; otherwise no
+    course is taken. Requests are sent to the workers chunksize at a time.
+
+    The prerequisite file filename is loaded once, from its compiled
+    snapshot if use_cache is True. Schedules are yielded in the order of
+    selections, as soon as each one and those before it are ready.
+
+    A selection with an unknown course does not stop the others: its
+    NoCourseFound error is yielded in place of its schedule.
+    """
+    arrays = _load_arrays(filename, use_cache)
+    if states is None:
+        requests = ((selected, None) for selected in selections)
+    else:
+        requests = zip(selections, states)
+
+    with SharedCatalog(arrays) as shared:
+        executor = ProcessPoolExecutor(max_workers, initializer=_start_worker,
+                                       initargs=(shared.name,))
+        try:
+            for schedule, error in executor.map(_plan_one, requests,
+                                                chunksize=chunksize):
+                if error is not None:
+                    yield error
+                else:
+                    yield schedule
+        finally:
+            # A caller that stops early only waits for the chunks already
+            # being planned, not for those still queued
+            executor.shutdown(cancel_futures=True)
+
+
+def _load_arrays(filename, use_cache):
+    """ (str, bool)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog of the prerequisite file filename,
+    from its compiled snapshot if use_cache is True and it is current.
+    """
+    if use_cache:
+        arrays = read_snapshot_arrays(filename)
+        if arrays is not None:
+            return arrays
+
+    catalog = parse_catalog(filename)
+    if use_cache:
+        write_snapshot(catalog, filename)
+    return catalog_arrays(catalog)
+
+
+def _start_worker(name):
+    """ (str) -> NoneType
+
+    Set up the planner of this worker process from the catalog published
+    in the block of shared memory called name.
+    """
+    global _planner, _memory
+    catalog, _memory = attach_shared_catalog(name)
+    _planner = TermPlanner.from_catalog(catalog)
+
+
+def _plan_one(request):
+    """ ((list of str, EnrollmentState))
+        -> (list of (list of str), NoCourseFound)
+
+    Return the schedule of one (selected courses, state) request, planned
+    by the planner of this worker process, and None; or None and the error
+    if a selected course does not exist.
+    """
+    selected, state = request
+    # Errors are returned rather than raised, so that they do not also
+    # fail the other requests sent in the same chunk
+    try:
+        return _planner.generate_schedule(selected, state), None
+    except NoCourseFound as error:
+        return None, error
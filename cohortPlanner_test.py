@@ -0,0 +1,96 @@
+""" Unit tests for cohortPlanner.py """
+
+import time
+import unittest
+from catalogCache import catalog_arrays
+from cohortPlanner import SharedCatalog, attach_shared_catalog, plan_cohort
+from compactCatalog import CompactCatalog
+from courseDataStruct import EnrollmentState
+from plannerMain import NoCourseFound, TermPlanner, parse_catalog
+
+
+class TestSharedCatalog(unittest.TestCase):
+
+    def test_round_trip(self):
+        arrays = catalog_arrays(parse_catalog('test3.txt'))
+        expected = CompactCatalog(*arrays)
+        with SharedCatalog(arrays) as shared:
+            catalog, memory = attach_shared_catalog(shared.name)
+            try:
+                self.assertEqual(expected.names, catalog.names)
+                self.assertEqual(expected.root_id, catalog.root_id)
+                for attribute in ['prereq_starts', 'prereq_ids',
+                                  'dependent_starts', 'dependent_ids',
+                                  'positions']:
+                    self.assertEqual(
+                        getattr(expected, attribute).tolist(),
+                        getattr(catalog, attribute).tolist())
+                self.assertEqual(['CSC101', 'CSC102'],
+                                 catalog.get('CSC151').missing_prereqs())
+            finally:
+                # The views must be gone before the block is closed
+                del catalog
+                memory.close()
+
+    def test_close_twice(self):
+        shared = SharedCatalog(catalog_arrays(parse_catalog('test1.txt')))
+        shared.close()
+        shared.close()
+
+
+class TestPlanCohort(unittest.TestCase):
+
+    def test_same_as_planner(self):
+        selections = [['CSC201'], ['MAT151'], ['CSC151', 'MAT101'],
+                      ['CSC101']] * 20
+        planner = TermPlanner('test3.txt')
+        expected = [planner.generate_schedule(selected)
+                    for selected in selections]
+        self.assertEqual(expected, list(plan_cohort(
+            'test3.txt', selections, max_workers=2, chunksize=3)))
+
+    def test_states(self):
+        states = [EnrollmentState(['CSC102']), EnrollmentState()]
+        self.assertEqual([[['CSC151'], ['CSC201']],
+                          [['CSC102', 'CSC151'], ['CSC201']]],
+                         list(plan_cohort('test2.txt', [['CSC201']] * 2,
+                                          states, max_workers=1,
+                                          use_cache=False)))
+
+    def test_stopped_early(self):
+        selections = [['CSC201']] * 3000
+        start = time.perf_counter()
+        list(plan_cohort('test3.txt', selections, max_workers=1,
+                         chunksize=1))
+        whole = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schedules = plan_cohort('test3.txt', selections, max_workers=1,
+                                chunksize=1)
+        next(schedules)
+        # The queued requests are dropped rather than planned
+        schedules.close()
+        self.assertLess(time.perf_counter() - start, whole)
+
+    def test_unknown_course(self):
+        schedules = list(plan_cohort(
+            'test2.txt', [['CSC201'], ['PHY101'], ['CSC151']],
+            max_workers=1, chunksize=2))
+        self.assertEqual(3, len(schedules))
+        self.assertEqual([['CSC102', 'CSC151'], ['CSC201']], schedules[0])
+        self.assertIsInstance(schedules[1], NoCourseFound)
+        self.assertEqual(('PHY101',), schedules[1].args)
+        self.assertEqual(TermPlanner('test2.txt').generate_schedule(
+            ['CSC151']), schedules[2])
+
+
+class TestFromCatalog(unittest.TestCase):
+
+    def test_from_catalog(self):
+        planner = TermPlanner.from_catalog(parse_catalog('test2.txt'))
+        self.assertEqual('CSC201', planner.course.name)
+        self.assertTrue(planner.is_valid([['CSC102'], ['CSC151']]))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
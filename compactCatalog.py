@@ -0,0 +1,406 @@
+"""Compact course catalog.
+
+This module contains a catalog that keeps the prerequisite graph in flat
+arrays of integer course IDs (compressed sparse rows) instead of one Course
+object per course, for catalogs that are too large to hold as objects.
+Queries run on the arrays directly; a CourseView is only made for a course
+that is asked for by name.
+
+The compact form has no taken flags, so courses are taken in an
+EnrollmentState.
+
+CompactCatalog: all of the courses of a prerequisite file, as arrays.
+CourseView: a course of a CompactCatalog, with the methods of Course.
+compact_catalog: convert a CourseCatalog to a CompactCatalog.
+"""
+
+from array import array
+from collections import Counter
+from itertools import accumulate, chain, count, repeat
+from operator import sub
+
+from catalogCache import catalog_arrays
+from courseDataStruct import CourseGroup, UntakeableError
+
+
+class CompactCatalog:
+    """The courses of a prerequisite file, as arrays over course IDs.
+
+    The prerequisites of the course with ID i are
+    prereq_ids[prereq_starts[i]:prereq_starts[i + 1]], and the courses that
+    have it as a prerequisite are found the same way in dependent_ids.
+
+    A CompactCatalog also provides the methods of scheduleEngine.CourseGraph
+    over course IDs, so schedules are planned without any course objects.
+
+    Attributes:
+    - names (list of str): the name of each course, by ID
+    - prereq_starts (array of int): where the prerequisites of each course
+      start in prereq_ids, followed by the number of prerequisites
+    - prereq_ids (array of int): the prerequisites of all courses
+    - dependent_starts (array of int): where the dependents of each course
+      start in dependent_ids, followed by the number of dependents
+    - dependent_ids (array of int): the dependents of all courses
+    - positions (array of int): the position of each course in a
+      topological order of the courses
+    - root_id (int): the ID of the top-most course, or -1 if there are
+      no courses
+    - version (int): always 0, as a CompactCatalog never changes (see
+      CourseCatalog.version)
+    - group (CourseGroup): its version never changes, for the same reason
+    """
+
+    def __init__(self, names, prereq_ends, prereq_ids, order, root_id):
+        """ (CompactCatalog, list of str, array of int, array of int,
+             array of int, int) -> NoneType
+
+        Create a new catalog from the arrays of a snapshot, as returned by
+        catalogCache.read_snapshot_arrays.
+        """
+        self.names = names
+        self.root_id = root_id
+        self.version = 0
+        self.group = CourseGroup()
+
+        self.prereq_starts = array('I', [0])
+        self.prereq_starts.extend(prereq_ends)
+        self.prereq_ids = prereq_ids
+
+        self._ids = dict(zip(names, count()))
+
+        # Position of each course in the topological order
+        self.positions = array('I', sorted(range(len(order)),
+                                            key=order.__getitem__))
+
+        # The course of each prerequisite, then the courses grouped by
+        # prerequisite, keeping them in order within each group
+        courses = array('I', chain.from_iterable(map(
+            repeat, range(len(names)),
+            map(sub, self.prereq_starts[1:], self.prereq_starts))))
+        dependent_counts = Counter(prereq_ids)
+        self.dependent_starts = array('I', [0])
+        self.dependent_starts.extend(accumulate(map(
+            dependent_counts.get, range(len(names)), repeat(0))))
+        self.dependent_ids = array('I', map(courses.__getitem__, sorted(
+            range(len(prereq_ids)), key=prereq_ids.__getitem__)))
+
+    @classmethod
+    def from_parts(cls, names, prereq_starts, prereq_ids, dependent_starts,
+                   dependent_ids, positions, root_id):
+        """ (type, list of str, array of int, array of int, array of int,
+             array of int, array of int, int) -> CompactCatalog
+
+        Return a catalog over arrays already in the form of the attributes
+        of a CompactCatalog, such as those of another one, without copying
+        or sorting them. The arrays can be any sequences of int, such as
+        memoryviews of shared memory.
+        """
+        catalog = cls.__new__(cls)
+        catalog.names = names
+        catalog.root_id = root_id
+        catalog.version = 0
+        catalog.group = CourseGroup()
+        catalog.prereq_starts = prereq_starts
+        catalog.prereq_ids = prereq_ids
+        catalog.dependent_starts = dependent_starts
+        catalog.dependent_ids = dependent_ids
+        catalog.positions = positions
+        catalog._ids = dict(zip(names, count()))
+        return catalog
+
+    def __len__(self):
+        """ (CompactCatalog) -> int
+
+        Return the number of courses in this catalog.
+        """
+        return len(self.names)
+
+    def __contains__(self, course_name):
+        """ (CompactCatalog, str) -> bool
+
+        Return True if a course called course_name is in this catalog.
+        """
+        return course_name in self._ids
+
+    def __iter__(self):
+        """ (CompactCatalog) -> iterator of CourseView
+
+        Iterate over the courses in the order they were first seen.
+        """
+        for course_id in range(len(self.names)):
+            yield CourseView(self, course_id)
+
+    @property
+    def root(self):
+        """ (CompactCatalog) -> CourseView
+
+        Return the top-most course, or None if there are no courses.
+        """
+        if self.root_id < 0:
+            return None
+        return CourseView(self, self.root_id)
+
+    def roots(self):
+        """ (CompactCatalog) -> list of CourseView
+
+        Return the courses that are not a prerequisite of any course, in
+        the order they were first seen.
+        """
+        starts = self.dependent_starts
+        return [CourseView(self, course_id)
+                for course_id in range(len(self.names))
+                if starts[course_id] == starts[course_id + 1]]
+
+    def get(self, course_name):
+        """ (CompactCatalog, str) -> CourseView
+
+        Return the course called course_name.
+        Raise KeyError if there is no such course.
+        """
+        return CourseView(self, self._ids[course_name])
+
+    def id_of(self, course_name):
+        """ (CompactCatalog, str) -> int
+
+        Return the ID of the course called course_name.
+        Raise KeyError if there is no such course.
+        """
+        return self._ids[course_name]
+
+    def taken_names(self):
+        """ (CompactCatalog) -> list of str
+
+        Return the names of the courses marked taken, which is always
+        empty since the compact form has no taken flags.
+        """
+        return []
+
+    def prereqs_of(self, course_id):
+        """ (CompactCatalog, int) -> array of int
+
+        Return the IDs of the prerequisites of the course with course_id.
+        """
+        starts = self.prereq_starts
+        return self.prereq_ids[starts[course_id]:starts[course_id + 1]]
+
+    def dependents_of(self, course_id):
+        """ (CompactCatalog, int) -> array of int
+
+        Return the IDs of the courses that have the course with course_id
+        as a prerequisite.
+        """
+        starts = self.dependent_starts
+        return self.dependent_ids[starts[course_id]:starts[course_id + 1]]
+
+    def name_of(self, course_id):
+        """ (CompactCatalog, int) -> str
+
+        Return the name of the course with course_id.
+        """
+        return self.names[course_id]
+
+    def taken_in(self, course_id, state):
+        """ (CompactCatalog, int, EnrollmentState) -> bool
+
+        Return True if the course with course_id is taken in state. Without
+        a state, no course is taken.
+        """
+        return state is not None and self.names[course_id] in state.taken
+
+    def missing_ids(self, course_id, state):
+        """ (CompactCatalog, int, EnrollmentState) -> list of int
+
+        Return the IDs of the prerequisites of the course with course_id
+        that are not taken in state, searching only below prerequisites
+        that are not taken, as Course.missing_prereqs does.
+        """
+        result = []
+        seen = set()
+        stack = [course_id]
+        while stack:
+            for prereq_id in self.prereqs_of(stack.pop()):
+                if (prereq_id not in seen and
+                        not self.taken_in(prereq_id, state)):
+                    seen.add(prereq_id)
+                    result.append(prereq_id)
+                    stack.append(prereq_id)
+        return result
+
+    def reaches(self, course_id, target_id):
+        """ (CompactCatalog, int, int) -> bool
+
+        Return True if the course with target_id is a prerequisite of the
+        course with course_id, directly or not.
+        """
+        # Prerequisites ordered before the target cannot lead to it
+        lowest = self.positions[target_id]
+        seen = set()
+        stack = [course_id]
+        while stack:
+            for prereq_id in self.prereqs_of(stack.pop()):
+                if prereq_id == target_id:
+                    return True
+                if (prereq_id not in seen and
+                        self.positions[prereq_id] > lowest):
+                    seen.add(prereq_id)
+                    stack.append(prereq_id)
+        return False
+
+
+class CourseView:
+    """A course of a CompactCatalog.
+
+    A view only holds its catalog and course ID, and answers the same
+    queries as Course from the catalog's arrays. Views of the same course
+    are equal.
+
+    Attributes:
+    - catalog (CompactCatalog): the catalog the course is in
+    - id (int): the ID of the course in catalog
+    """
+
+    __slots__ = ('catalog', 'id')
+
+    def __init__(self, catalog, course_id):
+        """ (CourseView, CompactCatalog, int) -> NoneType
+
+        Create a new view of the course with course_id in catalog.
+        """
+        self.catalog = catalog
+        self.id = course_id
+
+    def __eq__(self, other):
+        """ (CourseView, object) -> bool
+
+        Return True if other is a view of the same course.
+        """
+        return (isinstance(other, CourseView) and
+                self.catalog is other.catalog and self.id == other.id)
+
+    def __ne__(self, other):
+        """ (CourseView, object) -> bool
+
+        Return True if other is not a view of the same course.
+        """
+        return not self == other
+
+    def __hash__(self):
+        """ (CourseView) -> int
+
+        Return the hash of the viewed course.
+        """
+        return hash((id(self.catalog), self.id))
+
+    @property
+    def name(self):
+        """ (CourseView) -> str
+
+        Return the name of the course.
+        """
+        return self.catalog.names[self.id]
+
+    @property
+    def prereqs(self):
+        """ (CourseView) -> list of CourseView
+
+        Return views of the prerequisites of the course.
+        """
+        return [CourseView(self.catalog, prereq_id)
+                for prereq_id in self.catalog.prereqs_of(self.id)]
+
+    @property
+    def dependents(self):
+        """ (CourseView) -> list of CourseView
+
+        Return views of the courses that have this course as a prerequisite.
+        """
+        return [CourseView(self.catalog, dependent_id)
+                for dependent_id in self.catalog.dependents_of(self.id)]
+
+    @property
+    def taken(self):
+        """ (CourseView) -> bool
+
+        Return False: compact courses are only taken in an EnrollmentState.
+        """
+        return False
+
+    def is_taken(self, state=None):
+        """ (CourseView, EnrollmentState) -> bool
+
+        Return True if this course has been taken in state.
+        """
+        return self.catalog.taken_in(self.id, state)
+
+    def is_takeable(self, state=None):
+        """ (CourseView, EnrollmentState) -> bool
+
+        Return True if all of the prerequisites of this course are taken
+        in state.
+        """
+        for prereq_id in self.catalog.prereqs_of(self.id):
+            if not self.catalog.taken_in(prereq_id, state):
+                return False
+        return True
+
+    def take(self, state=None):
+        """ (CourseView, EnrollmentState) -> NoneType
+
+        If this course is takeable, record it in state.
+        Raise UntakeableError if this course is not takeable, and
+        ValueError if no state is given.
+        """
+        if state is None:
+            raise ValueError('compact courses are taken in a state')
+        if self.is_takeable(state):
+            state.take(self)
+        else:
+            raise UntakeableError
+
+    def unlocked_courses(self, state=None):
+        """ (CourseView, EnrollmentState) -> list of str
+
+        Return the names of the courses that have this course as a
+        prerequisite and are takeable but not taken in state, in
+        alphabetical order.
+        """
+        catalog = self.catalog
+        result = []
+        for dependent_id in catalog.dependents_of(self.id):
+            view = CourseView(catalog, dependent_id)
+            if not view.is_taken(state) and view.is_takeable(state):
+                result.append(view.name)
+        result.sort()
+        return result
+
+    def missing_prereqs(self, state=None):
+        """ (CourseView, EnrollmentState) -> list of str
+
+        Return a list of all of the names of the prerequisites of this
+        course that are not taken in state, in alphabetical order.
+        """
+        names = self.catalog.names
+        result = [names[prereq_id] for prereq_id in
+                  self.catalog.missing_ids(self.id, state)]
+        result.sort()
+        return result
+
+    def prereqs_in_tree(self, course):
+        """ (CourseView, CourseView) -> bool
+
+        Check if course is present in the prerequisites of this course.
+        """
+        if len(self.catalog.prereqs_of(self.id)) == 0:
+            return False
+        elif self == course:
+            return True
+        else:
+            return self.catalog.reaches(self.id, course.id)
+
+
+def compact_catalog(catalog):
+    """ (CourseCatalog) -> CompactCatalog
+
+    Return a compact copy of catalog.
+    """
+    return CompactCatalog(*catalog_arrays(catalog))
@@ -0,0 +1,110 @@
+""" Unit tests for compactCatalog.py """
+
+import unittest
+from compactCatalog import CourseView, compact_catalog
+from courseDataStruct import EnrollmentState, UntakeableError
+from plannerMain import TermPlanner, parse_catalog
+
+
+class TestCompactCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.parsed = parse_catalog('test3.txt')
+        self.catalog = compact_catalog(self.parsed)
+
+    def test_same_courses(self):
+        self.assertEqual([c.name for c in self.parsed],
+                         [c.name for c in self.catalog])
+        self.assertEqual('CSC201', self.catalog.root.name)
+
+    def test_prereqs(self):
+        for course in self.parsed:
+            self.assertEqual([p.name for p in course.prereqs],
+                             [p.name for p in
+                              self.catalog.get(course.name).prereqs])
+
+    def test_dependents(self):
+        mat151 = self.catalog.id_of('MAT151')
+        self.assertEqual([self.catalog.id_of('CSC201')],
+                         list(self.catalog.dependents_of(mat151)))
+        self.assertEqual([], list(self.catalog.dependents_of(
+            self.catalog.root_id)))
+
+    def test_get_missing(self):
+        self.assertFalse('PHY101' in self.catalog)
+        with self.assertRaises(KeyError):
+            self.catalog.get('PHY101')
+
+
+class TestCourseView(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = compact_catalog(parse_catalog('test3.txt'))
+        self.top = self.catalog.get('CSC201')
+        self.state = EnrollmentState(['CSC101', 'MAT101'])
+
+    def test_no_dict(self):
+        with self.assertRaises(AttributeError):
+            self.top.extra = 1
+
+    def test_equal_views(self):
+        self.assertEqual(self.catalog.get('MAT151'), self.top.prereqs[1])
+        self.assertEqual(1, len(set([self.top, self.catalog.root])))
+
+    def test_missing_prereqs(self):
+        self.assertEqual(['BIO101', 'CHM101', 'CSC102', 'CSC151',
+                          'MAT151', 'SOC101'],
+                         self.top.missing_prereqs(self.state))
+        self.assertEqual(8, len(self.top.missing_prereqs()))
+
+    def test_take(self):
+        csc151 = self.catalog.get('CSC151')
+        self.assertFalse(csc151.is_takeable(self.state))
+        self.catalog.get('CSC102').take(self.state)
+        csc151.take(self.state)
+        self.assertTrue(csc151.is_taken(self.state))
+        with self.assertRaises(UntakeableError):
+            self.top.take(self.state)
+
+    def test_take_without_state(self):
+        with self.assertRaises(ValueError):
+            self.catalog.get('CSC101').take()
+
+    def test_prereqs_in_tree(self):
+        self.assertTrue(self.top.prereqs_in_tree(self.catalog.get('BIO101')))
+        self.assertFalse(self.catalog.get('CSC151').prereqs_in_tree(
+            self.catalog.get('MAT101')))
+        self.assertFalse(self.catalog.get('CSC101').prereqs_in_tree(
+            self.catalog.get('CSC101')))
+
+
+class TestCompactPlanner(unittest.TestCase):
+    # The same schedules as with Course objects
+
+    def test_schedules(self):
+        for filename, selected in [('test2.txt', ['CSC201']),
+                                   ('test5.txt', ['UT199']),
+                                   ('test5.txt', ['UT400']),
+                                   ('test4.txt', ['CSC101', 'MAT151']),
+                                   ('test3.txt', ['MAT151'])]:
+            compact = TermPlanner(filename, compact=True)
+            self.assertIsInstance(compact.course, CourseView)
+            expected = TermPlanner(filename).generate_schedule(selected)
+            self.assertEqual(expected, compact.generate_schedule(selected))
+            self.assertTrue(compact.is_valid(expected))
+
+    def test_is_valid(self):
+        planner = TermPlanner('test5.txt', compact=True)
+        self.assertFalse(planner.is_valid([['UT100'], ['UT101'],
+                                           ['UT200'], ['UT199']]))
+        self.assertTrue(planner.is_valid([['UT200']], EnrollmentState(
+            ['UT100', 'UT101', 'UT199'])))
+
+    def test_without_cache(self):
+        planner = TermPlanner('test1.txt', use_cache=False, compact=True)
+        self.assertEqual([['CSC101'], ['CSC151']],
+                         planner.generate_schedule(['CSC151']))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
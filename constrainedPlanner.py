@@ -0,0 +1,387 @@
+"""Schedules under constraints, found by branch and bound.
+
+This module plans the fewest terms needed to take a set of selected courses
+when courses are only offered in some terms and each term has its own cap
+on the number of courses. Before any search, a first schedule is planned
+by filling each term with the longest chains first; schedules are then
+searched depth first, term by term, for shorter ones until the best one
+is proven or the time runs out, so an answer is always ready.
+
+A branch is dropped when a lower bound on the terms it still needs cannot
+beat the best schedule found: the longest chain of remaining courses,
+waiting for the terms they are offered in, and the room left in the terms.
+
+Constraints: when courses are offered and how many fit in each term.
+ConstrainedPlanner: finds the shortest schedule under constraints.
+PlanResult: the best schedule found, and how the search went.
+"""
+
+import time
+from itertools import combinations
+
+from scheduleEngine import TERM_SIZE
+
+
+class Constraints:
+    """The limits a schedule has to keep.
+
+    Terms are numbered from 0, the first term planned. When the offerings
+    repeat every cycle terms (for example fall, winter and summer, with a
+    cycle of 3), term t is offered like term t % cycle.
+
+    Attributes:
+    - term_size (int): the greatest number of courses in a term
+    - term_caps (dict of {int: int}): the greatest number of courses in
+      the terms numbered, instead of term_size
+    - offered (dict of {str: set of int}): the terms each course named is
+      offered in; other courses are offered in every term
+    - cycle (int): the number of terms after which offerings repeat, or
+      None if they do not
+    """
+
+    def __init__(self, term_size=TERM_SIZE, term_caps=None, offered=None,
+                 cycle=None):
+        """ (Constraints, int, dict of {int: int}, dict of {str: set of int},
+             int) -> NoneType
+
+        Create new constraints.
+        """
+        self.term_size = term_size
+        if term_caps is None:
+            self.term_caps = {}
+        else:
+            self.term_caps = dict(term_caps)
+        if offered is None:
+            self.offered = {}
+        else:
+            self.offered = dict((name, set(terms))
+                                for name, terms in offered.items())
+        self.cycle = cycle
+
+    def cap(self, term):
+        """ (Constraints, int) -> int
+
+        Return the greatest number of courses in term.
+        """
+        return self.term_caps.get(term, self.term_size)
+
+    def next_offering(self, course_name, term):
+        """ (Constraints, str, int) -> int
+
+        Return the first term from term on in which the course called
+        course_name is offered, or None if it is never offered again.
+        """
+        terms = self.offered.get(course_name)
+        if terms is None:
+            return term
+        if self.cycle:
+            for later in range(term, term + self.cycle):
+                if later % self.cycle in terms:
+                    return later
+            return None
+        later_terms = [later for later in terms if later >= term]
+        if later_terms:
+            return min(later_terms)
+        return None
+
+    def is_offered(self, course_name, term):
+        """ (Constraints, str, int) -> bool
+
+        Return True if the course called course_name is offered in term.
+        """
+        return self.next_offering(course_name, term) == term
+
+
+class PlanResult:
+    """The best schedule found by a ConstrainedPlanner.
+
+    Attributes:
+    - schedule (list of (list of str)): the best schedule found, or None if
+      the courses can never all be taken under the constraints
+    - optimal (bool): True if no schedule with fewer terms exists
+    - stats (dict of {str: object}): how the search went:
+      nodes (partial schedules looked at), pruned_bound and pruned_seen
+      (branches dropped by the lower bound and as already searched),
+      solutions (better schedules found), lower_bound (fewest terms any
+      schedule could need), elapsed (seconds) and timed_out (bool)
+    """
+
+    def __init__(self, schedule, optimal, stats):
+        """ (PlanResult, list of (list of str), bool, dict) -> NoneType
+
+        Create a new result.
+        """
+        self.schedule = schedule
+        self.optimal = optimal
+        self.stats = stats
+
+
+class ConstrainedPlanner:
+    """A planner of schedules under constraints, for one TermPlanner.
+
+    Attributes:
+    - planner (TermPlanner): where courses are looked up
+    """
+
+    def __init__(self, planner):
+        """ (ConstrainedPlanner, TermPlanner) -> NoneType
+
+        Create a new planner for the courses of planner.
+        """
+        self.planner = planner
+
+    def plan(self, selected_courses, constraints=None, time_limit=1.0,
+             state=None):
+        """ (ConstrainedPlanner, list of str, Constraints, float,
+             EnrollmentState) -> PlanResult
+
+        Return the schedule with the fewest terms that contains the
+        courses in selected_courses and keeps constraints (by default, five
+        courses a term, all offered every term), for a student who has
+        taken the courses in state (by default, the courses marked taken).
+        Only the selected courses and their missing prerequisites are
+        scheduled. If the search takes more than time_limit seconds, the
+        best schedule found so far is returned.
+        Raise NoCourseFound if a selected course does not exist.
+        """
+        if constraints is None:
+            constraints = Constraints()
+        search = _Search(self._needed(selected_courses, state), constraints,
+                         time.monotonic() + time_limit)
+        return search.run()
+
+    def _needed(self, selected_courses, state):
+        """ (ConstrainedPlanner, list of str, EnrollmentState)
+            -> list of (str, list of str)
+
+        Return each course that has to be taken to take selected_courses,
+        with the names of its prerequisites that also have to be taken,
+        prerequisites first.
+        """
+        if state is None:
+            state = self.planner.flag_state()
+
+        courses = {}
+        for name in selected_courses:
+            course = self.planner.get_course(name)
+            if not course.is_taken(state):
+                courses[course.name] = course
+            for prereq_name in course.missing_prereqs(state):
+                courses[prereq_name] = self.planner.get_course(prereq_name)
+
+        # Prerequisites that are not needed are taken
+        needed = {}
+        for name, course in courses.items():
+            needed[name] = [pre_course.name for pre_course in course.prereqs
+                            if pre_course.name in courses]
+
+        # Prerequisites first
+        ordered = []
+        placed = set()
+        for name in sorted(needed):
+            stack = [name]
+            while stack:
+                current = stack[-1]
+                if current in placed:
+                    stack.pop()
+                    continue
+                waiting = [prereq_name for prereq_name in needed[current]
+                           if prereq_name not in placed]
+                if waiting:
+                    stack.extend(waiting)
+                else:
+                    placed.add(current)
+                    ordered.append((current, needed[current]))
+                    stack.pop()
+        return ordered
+
+
+class _Search:
+    """One branch and bound search over the needed courses, as bitmasks."""
+
+    def __init__(self, needed, constraints, deadline):
+        """ (_Search, list of (str, list of str), Constraints, float)
+            -> NoneType
+
+        Prepare to search schedules of the needed courses, each given with
+        its needed prerequisites, prerequisites first.
+        """
+        self.constraints = constraints
+        self.deadline = deadline
+        self.names = [name for name, prereqs in needed]
+        ids = dict((name, course_id)
+                   for course_id, name in enumerate(self.names))
+        self.prereqs = [[ids[prereq_name] for prereq_name in prereqs]
+                        for name, prereqs in needed]
+        self.prereq_masks = [sum(1 << prereq_id for prereq_id in prereqs)
+                             for prereqs in self.prereqs]
+        self.all_done = (1 << len(self.names)) - 1
+
+        # Longest chain of needed courses from each course up
+        self.height = [1] * len(self.names)
+        for course_id in range(len(self.names) - 1, -1, -1):
+            for prereq_id in self.prereqs[course_id]:
+                self.height[prereq_id] = max(self.height[prereq_id],
+                                             self.height[course_id] + 1)
+
+        self.best = None
+        # Fewest terms reached for each set of courses taken
+        self.seen = {}
+        self.stats = {'nodes': 0, 'pruned_bound': 0, 'pruned_seen': 0,
+                      'solutions': 0, 'lower_bound': 0, 'elapsed': 0.0,
+                      'timed_out': False}
+
+    def run(self):
+        """ (_Search) -> PlanResult
+
+        Search until the best schedule is proven or the deadline passes.
+        """
+        start = time.monotonic()
+        root_bound = self.lower_bound(0, 0)
+        self.stats['lower_bound'] = root_bound
+
+        if root_bound is not None:
+            first = self.first_schedule()
+            if first is not None:
+                self.found(first)
+        # The first schedule may already be as short as any can be
+        if root_bound is not None and (self.best is None or
+                                       len(self.best) > root_bound):
+            # Each entry: (term, courses taken, terms so far, choices left)
+            stack = [(0, 0, [], self.choices(0, 0))]
+            while stack:
+                if time.monotonic() > self.deadline:
+                    self.stats['timed_out'] = True
+                    break
+                term, done, terms, choices = stack[-1]
+                choice = next(choices, None)
+                if choice is None:
+                    stack.pop()
+                    continue
+
+                self.stats['nodes'] += 1
+                next_done = done
+                for course_id in choice:
+                    next_done |= 1 << course_id
+                next_terms = terms + [choice]
+                if next_done == self.all_done:
+                    self.found(next_terms)
+                    if len(next_terms) == root_bound:
+                        # Nothing can be shorter
+                        break
+                    continue
+
+                next_term = term + 1
+                bound = self.lower_bound(next_term, next_done)
+                if bound is None or (self.best is not None and
+                                     next_term + bound >= len(self.best)):
+                    self.stats['pruned_bound'] += 1
+                    continue
+                # Reaching the same courses in an earlier term is never
+                # worse; a term with nothing to take only waits for one
+                if choice and self.seen.get(next_done, next_term + 1) <= \
+                        next_term:
+                    self.stats['pruned_seen'] += 1
+                    continue
+                self.seen[next_done] = next_term
+                stack.append((next_term, next_done, next_terms,
+                              self.choices(next_term, next_done)))
+
+        self.stats['elapsed'] = time.monotonic() - start
+        if self.best is None:
+            schedule = None
+        else:
+            schedule = [[self.names[course_id] for course_id in term]
+                        for term in self.best]
+        optimal = self.best is not None and not self.stats['timed_out']
+        return PlanResult(schedule, optimal, self.stats)
+
+    def first_schedule(self):
+        """ (_Search) -> list of tuple of int
+
+        Return the schedule that takes as many takeable courses as fit in
+        each term, longest chain first, which is the first one the search
+        would reach. Return None if it runs into a course that can no
+        longer be taken, though the search may still find a schedule.
+        """
+        terms = []
+        done = 0
+        term = 0
+        while done != self.all_done:
+            if self.lower_bound(term, done) is None:
+                return None
+            choice = next(self.choices(term, done))
+            for course_id in choice:
+                done |= 1 << course_id
+            terms.append(choice)
+            term += 1
+        return terms
+
+    def found(self, terms):
+        """ (_Search, list of tuple of int) -> NoneType
+
+        Keep terms if it is the shortest schedule found yet.
+        """
+        if self.best is None or len(terms) < len(self.best):
+            self.best = terms
+            self.stats['solutions'] += 1
+
+    def choices(self, term, done):
+        """ (_Search, int, int) -> iterator of tuple of int
+
+        Yield the sets of courses worth taking in term, after the courses
+        in done: as many takeable courses as fit, longest chain first.
+        Taking more courses never makes a schedule longer, so smaller sets
+        are only tried when everything takeable fits.
+        """
+        takeable = [course_id for course_id in range(len(self.names))
+                    if not done >> course_id & 1 and
+                    self.prereq_masks[course_id] & done ==
+                    self.prereq_masks[course_id] and
+                    self.constraints.is_offered(self.names[course_id], term)]
+        takeable.sort(key=lambda course_id: -self.height[course_id])
+        cap = self.constraints.cap(term)
+        if len(takeable) <= cap:
+            return iter([tuple(takeable)])
+        return combinations(takeable, cap)
+
+    def lower_bound(self, term, done):
+        """ (_Search, int, int) -> int
+
+        Return the fewest terms still needed from term on, after the
+        courses in done, or None if the courses left can never be taken.
+        """
+        remaining = [course_id for course_id in range(len(self.names))
+                     if not done >> course_id & 1]
+        if not remaining:
+            return 0
+
+        # The earliest term each course left could be taken in, waiting
+        # for its prerequisites and its offerings
+        earliest = {}
+        last = term
+        for course_id in remaining:
+            ready = term
+            for prereq_id in self.prereqs[course_id]:
+                if prereq_id in earliest:
+                    ready = max(ready, earliest[prereq_id] + 1)
+            offered = self.constraints.next_offering(self.names[course_id],
+                                                     ready)
+            if offered is None:
+                return None
+            earliest[course_id] = offered
+            last = max(last, offered)
+        chain_bound = last - term + 1
+
+        # Enough terms for the room they have
+        last_capped = max(self.constraints.term_caps, default=-1)
+        room = 0
+        room_bound = 0
+        while room < len(remaining):
+            if (term + room_bound > last_capped and
+                    self.constraints.term_size < 1):
+                return None
+            room += self.constraints.cap(term + room_bound)
+            room_bound += 1
+
+        return max(chain_bound, room_bound)
@@ -0,0 +1,168 @@
+""" Unit tests for constrainedPlanner.py """
+
+import random
+import unittest
+from itertools import combinations
+from constrainedPlanner import Constraints, ConstrainedPlanner
+from courseCatalog import CourseCatalog
+from courseDataStruct import EnrollmentState
+from plannerMain import TermPlanner, NoCourseFound
+
+
+def _planner(edges):
+    catalog = CourseCatalog()
+    for prereq_name, course_name in edges:
+        catalog.add_edge(prereq_name, course_name)
+    return TermPlanner.from_catalog(catalog)
+
+
+def _fewest_terms(prereqs, constraints, limit=20):
+    # Every set of courses each term, not only the largest ones
+    names = sorted(prereqs)
+    states = {frozenset()}
+    for term in range(limit):
+        next_states = set()
+        for done in states:
+            takeable = [name for name in names if name not in done and
+                        prereqs[name] <= done and
+                        constraints.is_offered(name, term)]
+            for size in range(min(len(takeable),
+                                  constraints.cap(term)) + 1):
+                for choice in combinations(takeable, size):
+                    next_done = done | frozenset(choice)
+                    if len(next_done) == len(names):
+                        return term + 1
+                    next_states.add(next_done)
+        states = next_states
+    return None
+
+
+class TestConstraints(unittest.TestCase):
+
+    def test_defaults(self):
+        constraints = Constraints()
+        self.assertEqual(5, constraints.cap(0))
+        self.assertTrue(constraints.is_offered('A', 7))
+
+    def test_term_caps(self):
+        constraints = Constraints(term_size=3, term_caps={1: 0})
+        self.assertEqual(3, constraints.cap(0))
+        self.assertEqual(0, constraints.cap(1))
+
+    def test_cycle(self):
+        constraints = Constraints(offered={'A': [1]}, cycle=2)
+        self.assertFalse(constraints.is_offered('A', 0))
+        self.assertTrue(constraints.is_offered('A', 3))
+        self.assertEqual(5, constraints.next_offering('A', 4))
+
+    def test_no_cycle(self):
+        constraints = Constraints(offered={'A': [2, 6]})
+        self.assertEqual(2, constraints.next_offering('A', 0))
+        self.assertEqual(6, constraints.next_offering('A', 3))
+        self.assertIsNone(constraints.next_offering('A', 7))
+
+
+class TestConstrainedPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+        self.constrained = ConstrainedPlanner(self.planner)
+
+    def test_unconstrained(self):
+        result = self.constrained.plan(['CSC201'])
+        self.assertTrue(result.optimal)
+        self.assertEqual(4, len(result.schedule))
+        self.assertEqual(['CSC201'], result.schedule[-1])
+        self.assertTrue(self.planner.is_valid(result.schedule))
+
+    def test_only_needed_courses(self):
+        result = self.constrained.plan(['CSC151'])
+        self.assertEqual([['CSC101', 'CSC102'], ['CSC151']],
+                         [sorted(term) for term in result.schedule])
+
+    def test_offerings_and_caps(self):
+        constraints = Constraints(term_size=2, offered={'CSC151': [0]},
+                                  cycle=2)
+        result = self.constrained.plan(['CSC201'], constraints)
+        self.assertTrue(result.optimal)
+        self.assertTrue(self.planner.is_valid(result.schedule))
+        for term_index, term in enumerate(result.schedule):
+            self.assertLessEqual(len(term), 2)
+            if 'CSC151' in term:
+                self.assertEqual(0, term_index % 2)
+
+    def test_state(self):
+        state = EnrollmentState(['CSC101', 'CSC102', 'MAT101', 'CHM101',
+                                 'SOC101', 'BIO101'])
+        result = self.constrained.plan(['CSC201'], state=state)
+        self.assertEqual([['CSC151', 'MAT151'], ['CSC201']],
+                         [sorted(term) for term in result.schedule])
+
+    def test_never_offered(self):
+        constraints = Constraints(offered={'CSC151': []})
+        result = self.constrained.plan(['CSC201'], constraints)
+        self.assertIsNone(result.schedule)
+        self.assertFalse(result.optimal)
+
+    def test_unknown_course(self):
+        with self.assertRaises(NoCourseFound):
+            self.constrained.plan(['CSC999'])
+
+    def test_time_limit(self):
+        edges = [('L%02d' % i, 'TOP') for i in range(40)]
+        planner = _planner(edges)
+        # Every course alone is offered in a different term
+        constraints = Constraints(term_size=3, offered=dict(
+            ('L%02d' % i, [i % 7]) for i in range(40)), cycle=7)
+        result = ConstrainedPlanner(planner).plan(['TOP'], constraints,
+                                                  time_limit=0.0)
+        self.assertTrue(result.stats['timed_out'])
+        self.assertFalse(result.optimal)
+        self.assertEqual(result.stats['nodes'], 0)
+        # The first schedule is ready before any search
+        self.assertEqual(['TOP'], result.schedule[-1])
+        self.assertTrue(planner.is_valid(result.schedule))
+
+    def test_no_time(self):
+        result = self.constrained.plan(['CSC201'], Constraints(term_size=2),
+                                       time_limit=0)
+        self.assertTrue(self.planner.is_valid(result.schedule))
+        self.assertEqual(['CSC201'], result.schedule[-1])
+        self.assertTrue(all(len(term) <= 2 for term in result.schedule))
+
+    def test_stats(self):
+        result = self.constrained.plan(['CSC201'],
+                                       Constraints(term_size=2))
+        self.assertGreaterEqual(result.stats['solutions'], 1)
+        self.assertEqual(len(result.schedule), result.stats['lower_bound'])
+        for key in ['nodes', 'pruned_bound', 'pruned_seen', 'elapsed']:
+            self.assertIn(key, result.stats)
+
+    def test_matches_exhaustive_search(self):
+        generator = random.Random(3)
+        for trial in range(40):
+            count = generator.randint(2, 7)
+            names = ['C%d' % i for i in range(count)]
+            edges = [(names[i], names[j]) for j in range(count)
+                     for i in range(j) if generator.random() < 0.3]
+            edges += [(name, 'TOP') for name in names]
+            planner = _planner(edges)
+            prereqs = dict((name, frozenset()) for name in names + ['TOP'])
+            for prereq_name, course_name in edges:
+                prereqs[course_name] |= {prereq_name}
+            constraints = Constraints(
+                term_size=generator.randint(1, 3),
+                offered=dict((name, [generator.randint(0, 1)])
+                             for name in names if generator.random() < 0.4),
+                cycle=2)
+
+            result = ConstrainedPlanner(planner).plan(['TOP'], constraints,
+                                                      time_limit=10.0)
+            self.assertTrue(result.optimal)
+            self.assertEqual(_fewest_terms(prereqs, constraints),
+                             len(result.schedule))
+            self.assertTrue(planner.is_valid(result.schedule))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
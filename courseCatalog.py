@@ -0,0 +1,438 @@
+"""Course catalog index.
+
+This module contains the class that keeps every course read from a
+prerequisite file, indexed by name, so that a course can be found without
+walking the prerequisite tree.
+
+CourseCatalog: all of the courses of a prerequisite file.
+PrerequisiteClosures: precomputed transitive prerequisites of the courses.
+"""
+
+import heapq
+from operator import attrgetter
+
+from courseDataStruct import Course, CourseGroup, PrerequisiteError
+
+
+class CourseCatalog:
+    """An index of courses by name.
+
+    Courses are created the first time their name is seen and shared by
+    every prerequisite relationship that mentions them.
+
+    Attributes:
+    - root (Course): the top-most course, or None if the catalog is empty.
+      A catalog can have more than one top-most course (see roots); root
+      is the one found by add_edge.
+    - closures (PrerequisiteClosures): the precomputed closures of the
+      courses, or None if they have not been built
+    - version (int): the number of times prerequisites have been added to
+      or removed from the catalog
+    - group (CourseGroup): what the courses share; its version changes
+      whenever a prerequisite of one of them is added or removed, through
+      the catalog or not
+    """
+
+    def __init__(self):
+        """ (CourseCatalog) -> NoneType
+
+        Create a new empty catalog.
+        """
+        self.root = None
+        self.closures = None
+        self.version = 0
+        self.group = CourseGroup()
+        self._courses = {}
+
+    def __len__(self):
+        """ (CourseCatalog) -> int
+
+        Return the number of courses in this catalog.
+        """
+        return len(self._courses)
+
+    def __contains__(self, course_name):
+        """ (CourseCatalog, str) -> bool
+
+        Return True if a course called course_name is in this catalog.
+        """
+        return course_name in self._courses
+
+    def __iter__(self):
+        """ (CourseCatalog) -> iterator of Course
+
+        Iterate over the courses in the order they were first seen.
+        """
+        return iter(self._courses.values())
+
+    def get(self, course_name):
+        """ (CourseCatalog, str) -> Course
+
+        Return the course called course_name.
+        Raise KeyError if there is no such course.
+        """
+        return self._courses[course_name]
+
+    def roots(self):
+        """ (CourseCatalog) -> list of Course
+
+        Return the courses that are not a prerequisite of any course, in
+        the order they were first seen. Every course is in the tree under
+        one of them.
+        """
+        return [course for course in self._courses.values()
+                if course.dependents == []]
+
+    def taken_names(self):
+        """ (CourseCatalog) -> list of str
+
+        Return the names of the courses marked taken.
+        """
+        return [course.name for course in self._courses.values()
+                if course.taken]
+
+    def get_or_create(self, course_name):
+        """ (CourseCatalog, str) -> Course
+
+        Return the course called course_name, creating it (with no
+        prerequisites) if it is not in the catalog yet.
+        """
+        course = self._courses.get(course_name)
+        if course is None:
+            course = Course(course_name)
+            course._group = self.group
+            self._courses[course_name] = course
+        return course
+
+    def add_course(self, course):
+        """ (CourseCatalog, Course) -> NoneType
+
+        Add course, which was built with all of its prerequisites, to the
+        catalog without checking them. Its prerequisites have to be added
+        as well.
+        Raise ValueError if a course with the same name is in the catalog.
+        """
+        if course.name in self._courses:
+            raise ValueError(course.name)
+        course._group = self.group
+        self._courses[course.name] = course
+
+    def add_courses(self, courses):
+        """ (CourseCatalog, list of Course) -> NoneType
+
+        Add every course of courses to the catalog, in order, as
+        add_course does.
+        Raise ValueError if two courses have the same name, or a course
+        has the name of one in the catalog; the catalog is then left as
+        it was.
+        """
+        added = dict(zip(map(attrgetter('name'), courses), courses))
+        if (len(added) != len(courses) or
+                not self._courses.keys().isdisjoint(added)):
+            raise ValueError('course names are not unique')
+        group = self.group
+        for course in courses:
+            course._group = group
+        self._courses.update(added)
+
+    def add_edge(self, prereq_name, course_name):
+        """ (CourseCatalog, str, str) -> NoneType
+
+        Record that the course called prereq_name is a prerequisite of the
+        course called course_name, creating either course if needed.
+
+        Raise PrerequisiteError if the relationship is rejected by
+        Course.add_prereq. The catalog is then left as it was.
+        """
+        created = [name for name in (prereq_name, course_name)
+                   if name not in self._courses]
+        prereq = self.get_or_create(prereq_name)
+        course = self.get_or_create(course_name)
+
+        closures = self.closures
+        if closures is not None and not closures.valid:
+            closures = None
+        try:
+            course.add_prereq(prereq)
+        except PrerequisiteError:
+            # Forget the courses made for this relationship only
+            for name in created:
+                self._courses.pop(name, None)
+            raise
+        self.version += 1
+        if closures is not None:
+            closures.refresh([course])
+
+        if self.root is None:
+            self.root = course
+        # If the top course becomes a prerequisite, the course on the
+        # top will become the new top
+        elif prereq is self.root:
+            self.root = course
+
+    def remove_edge(self, prereq_name, course_name):
+        """ (CourseCatalog, str, str) -> NoneType
+
+        Remove the course called prereq_name from the prerequisites of the
+        course called course_name, as apply_delta does.
+        Raise PrerequisiteError if it is not one of them.
+        """
+        self.apply_delta([(False, prereq_name, course_name)])
+
+    def apply_delta(self, changes, labels=None):
+        """ (CourseCatalog, list of (bool, str, str), list of str) -> int
+
+        Apply changes to the prerequisites in order, and return the new
+        version of the catalog. A change (True, prereq_name, course_name)
+        adds a prerequisite as add_edge does, and a change (False,
+        prereq_name, course_name) removes one. Courses left with no
+        prerequisites and no dependents are removed from the catalog; if
+        the root is one of them, the first top-most course becomes the
+        root. labels name the changes in errors (by default, by their
+        position).
+
+        Each change only visits the courses around it (see
+        Course.add_prereq and Course.remove_prereq), and precomputed
+        closures are updated in place for the courses whose prerequisites
+        changed.
+
+        Raise PrerequisiteError if a change adds a prerequisite that
+        add_edge would reject or removes one that does not exist. The
+        catalog is then left as it was.
+        """
+        if labels is None:
+            labels = ['change %d' % (i + 1) for i in range(len(changes))]
+        closures = self.closures
+        if closures is not None and not closures.valid:
+            closures = None
+        root = self.root
+
+        # (course, prereq, where the prerequisite was if it was removed)
+        done = []
+        created = []
+        try:
+            for (adding, prereq_name, course_name), label in zip(changes,
+                                                                 labels):
+                if adding:
+                    for name in (prereq_name, course_name):
+                        if name not in self._courses:
+                            created.append(name)
+                    prereq = self.get_or_create(prereq_name)
+                    course = self.get_or_create(course_name)
+                    try:
+                        course.add_prereq(prereq)
+                    except PrerequisiteError:
+                        raise PrerequisiteError(
+                            '%s: %s cannot be a prerequisite of %s' %
+                            (label, prereq_name, course_name))
+                    done.append((course, prereq, None))
+                    if self.root is None or prereq is self.root:
+                        self.root = course
+                else:
+                    prereq = self._courses.get(prereq_name)
+                    course = self._courses.get(course_name)
+                    try:
+                        if prereq is None or course is None:
+                            raise PrerequisiteError
+                        positions = course._unlink(prereq)
+                    except PrerequisiteError:
+                        raise PrerequisiteError(
+                            '%s: %s is not a prerequisite of %s' %
+                            (label, prereq_name, course_name))
+                    done.append((course, prereq, positions))
+        except PrerequisiteError:
+            # Undo the changes made, last first
+            for course, prereq, positions in reversed(done):
+                if positions is None:
+                    course._unlink(prereq)
+                else:
+                    course._relink(prereq, *positions)
+            for name in created:
+                del self._courses[name]
+            self.root = root
+            if closures is not None:
+                closures.valid = True
+            raise
+
+        for course, prereq, positions in done:
+            for each_course in (course, prereq):
+                if (each_course.prereqs == [] and
+                        each_course.dependents == [] and
+                        self._courses.get(each_course.name) is each_course):
+                    del self._courses[each_course.name]
+        if (self.root is not None and
+                self._courses.get(self.root.name) is not self.root):
+            roots = self.roots()
+            self.root = roots[0] if roots else None
+
+        self.version += 1
+        if closures is not None:
+            closures.refresh([course for course, prereq, positions in done])
+        return self.version
+
+    def build_closures(self):
+        """ (CourseCatalog) -> PrerequisiteClosures
+
+        Precompute the transitive prerequisites of every course, so that
+        Course.missing_prereqs and Course.prereqs_in_tree can answer with
+        bit operations. Prerequisites added or removed through the catalog
+        keep them up to date; after a prerequisite is added to a course
+        directly, they have to be built again.
+        """
+        self.closures = PrerequisiteClosures(list(self._courses.values()))
+        return self.closures
+
+    def copy(self):
+        """ (CourseCatalog) -> CourseCatalog
+
+        Return a new catalog of new courses with the same names,
+        prerequisites, dependents, taken marks, order, root and version
+        as this one, which can be changed without changing this one. Its
+        closures are built again if this catalog has valid ones.
+        """
+        copies = {}
+        for course in self._courses.values():
+            copies[course] = Course(course.name)
+        for course, course_copy in copies.items():
+            # In the same order, so schedules come out the same
+            course_copy.prereqs = [copies[pre_course]
+                                   for pre_course in course.prereqs]
+            course_copy.dependents = [copies[dependent]
+                                      for dependent in course.dependents]
+            course_copy._order = course._order
+            course_copy._taken = course._taken
+
+        catalog = CourseCatalog()
+        catalog.add_courses(list(copies.values()))
+        if self.root is not None:
+            catalog.root = copies[self.root]
+        catalog.version = self.version
+        if self.closures is not None and self.closures.valid:
+            catalog.build_closures()
+        return catalog
+
+
+class PrerequisiteClosures:
+    """The transitive prerequisites of a group of courses, as bitmasks.
+
+    Every course gets an integer ID, in topological order when the
+    closures are built and in the order they are added after that, and bit
+    i of a mask stands for the course with ID i.
+
+    Attributes:
+    - names (list of str): the name of each course, by ID
+    - ids (dict of {str: int}): the ID of each course, by name
+    - closures (list of int): the mask of all the prerequisites of each
+      course, direct or not, by ID
+    - valid (bool): False once a prerequisite has been added to one of
+      the courses
+    - version (int): the number of times the closures have been refreshed
+    """
+
+    def __init__(self, courses):
+        """ (PrerequisiteClosures, list of Course) -> NoneType
+
+        Compute the closures of courses in one pass over their topological
+        order. Every prerequisite of a course must be in courses.
+        """
+        courses = sorted(courses, key=attrgetter('_order'))
+
+        self.names = []
+        self.ids = {}
+        self.closures = []
+        self.valid = True
+        self.version = 0
+
+        for course_id, course in enumerate(courses):
+            # Prerequisites come first in the order, so theirs are done
+            closure = 0
+            for pre_course in course.prereqs:
+                closure |= 1 << pre_course._id | self.closures[pre_course._id]
+
+            self.names.append(course.name)
+            self.ids[course.name] = course_id
+            self.closures.append(closure)
+            course._id = course_id
+            course._closures = self
+
+    def closure_of(self, course):
+        """ (PrerequisiteClosures, Course) -> int
+
+        Return the mask of all the prerequisites of course.
+        """
+        return self.closures[course._id]
+
+    def refresh(self, courses):
+        """ (PrerequisiteClosures, list of Course) -> NoneType
+
+        Update the closures after the prerequisites of courses changed,
+        and make them valid again. Courses that are not in the closures
+        yet are added. Only the courses in courses, and the dependents of
+        courses whose closures changed, are visited, prerequisites first.
+        """
+        # {position in the topological order: course} of the courses to
+        # visit, and the heap of their positions
+        waiting = {}
+        for course in courses:
+            waiting[course._order] = course
+        heap = list(waiting)
+        heapq.heapify(heap)
+
+        while heap:
+            course = waiting.pop(heapq.heappop(heap))
+            if course._closures is not self:
+                self._add(course)
+            closure = 0
+            for pre_course in course.prereqs:
+                if pre_course._closures is not self:
+                    self._add(pre_course)
+                closure |= 1 << pre_course._id | self.closures[pre_course._id]
+
+            if closure != self.closures[course._id]:
+                self.closures[course._id] = closure
+                for dependent in course.dependents:
+                    if dependent._order not in waiting:
+                        waiting[dependent._order] = dependent
+                        heapq.heappush(heap, dependent._order)
+
+        self.version += 1
+        self.valid = True
+
+    def _add(self, course):
+        """ (PrerequisiteClosures, Course) -> NoneType
+
+        Give course the next ID, with no prerequisites in its closure yet.
+        """
+        course._id = len(self.names)
+        course._closures = self
+        self.names.append(course.name)
+        self.ids[course.name] = course._id
+        self.closures.append(0)
+
+    def mask(self, course_names):
+        """ (PrerequisiteClosures, iterable of str) -> int
+
+        Return the mask of the courses named in course_names. Names of
+        courses that are not in the closures are ignored.
+        """
+        mask = 0
+        for name in course_names:
+            course_id = self.ids.get(name)
+            if course_id is not None:
+                mask |= 1 << course_id
+        return mask
+
+    def names_of(self, mask):
+        """ (PrerequisiteClosures, int) -> list of str
+
+        Return the names of the courses in mask, by ID.
+        """
+        result = []
+        # Bits of the mask from the lowest, found with str.find
+        bits = bin(mask)[:1:-1]
+        course_id = bits.find('1')
+        while course_id != -1:
+            result.append(self.names[course_id])
+            course_id = bits.find('1', course_id + 1)
+        return result
+
@@ -0,0 +1,323 @@
+""" Unit tests for courseCatalog.py """
+
+import gc
+import random
+import unittest
+from courseCatalog import CourseCatalog
+from courseDataStruct import Course, PrerequisiteError, EnrollmentState
+
+
+class TestCatalogLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = CourseCatalog()
+        self.catalog.add_edge('CSC101', 'CSC151')
+        self.catalog.add_edge('CSC151', 'CSC201')
+        self.catalog.add_edge('MAT101', 'CSC201')
+
+    def test_len(self):
+        self.assertEqual(4, len(self.catalog))
+
+    def test_get_shares_courses(self):
+        top = self.catalog.get('CSC201')
+        self.assertIs(self.catalog.get('CSC151'), top.prereqs[0])
+        self.assertIs(self.catalog.get('CSC101'),
+                      self.catalog.get('CSC151').prereqs[0])
+
+    def test_get_missing(self):
+        self.assertFalse('BIO101' in self.catalog)
+        with self.assertRaises(KeyError):
+            self.catalog.get('BIO101')
+
+    def test_iter_in_first_seen_order(self):
+        self.assertEqual(['CSC101', 'CSC151', 'CSC201', 'MAT101'],
+                         [c.name for c in self.catalog])
+
+    def test_add_courses(self):
+        first = Course('BIO101')
+        self.catalog.add_courses([first, Course('BIO201', [first])])
+        self.assertEqual(['CSC101', 'CSC151', 'CSC201', 'MAT101', 'BIO101',
+                          'BIO201'], [c.name for c in self.catalog])
+        for courses in ([Course('PHY101'), Course('PHY101')],
+                        [Course('PHY101'), Course('CSC101')]):
+            with self.assertRaises(ValueError):
+                self.catalog.add_courses(courses)
+            self.assertEqual(6, len(self.catalog))
+
+
+class TestCatalogRoot(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertIsNone(CourseCatalog().root)
+
+    def test_root_moves_up(self):
+        catalog = CourseCatalog()
+        catalog.add_edge('CSC101', 'CSC151')
+        self.assertEqual('CSC151', catalog.root.name)
+        catalog.add_edge('CSC151', 'CSC201')
+        self.assertEqual('CSC201', catalog.root.name)
+
+    def test_roots(self):
+        catalog = CourseCatalog()
+        catalog.add_edge('CSC101', 'CSC151')
+        catalog.add_edge('MAT101', 'MAT151')
+        catalog.add_edge('CSC101', 'CSC148')
+        self.assertEqual(['CSC151', 'MAT151', 'CSC148'],
+                         [course.name for course in catalog.roots()])
+        self.assertEqual([], CourseCatalog().roots())
+
+    def test_rejected_edge(self):
+        catalog = CourseCatalog()
+        catalog.add_edge('CSC101', 'CSC151')
+        with self.assertRaises(PrerequisiteError):
+            catalog.add_edge('CSC151', 'CSC101')
+
+    def test_rejected_edge_adds_nothing(self):
+        catalog = CourseCatalog()
+        catalog.add_edge('CSC101', 'CSC151')
+        with self.assertRaises(PrerequisiteError):
+            catalog.add_edge('PHY101', 'PHY101')
+        self.assertFalse('PHY101' in catalog)
+        self.assertEqual(['CSC151'],
+                         [course.name for course in catalog.roots()])
+        self.assertEqual('CSC151', catalog.root.name)
+
+
+class TestApplyDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = CourseCatalog()
+        for line in ['CSC151 CSC201', 'MAT151 CSC201', 'CSC101 CSC151',
+                     'CSC102 CSC151', 'MAT101 MAT151']:
+            self.catalog.add_edge(*line.split())
+
+    def prereq_names(self):
+        return dict((course.name, [pre.name for pre in course.prereqs])
+                    for course in self.catalog)
+
+    def test_add_and_remove(self):
+        version = self.catalog.version
+        new_version = self.catalog.apply_delta(
+            [(False, 'CSC102', 'CSC151'), (True, 'MAT101', 'CSC151')])
+        self.assertEqual(version + 1, new_version)
+        self.assertEqual(new_version, self.catalog.version)
+        self.assertEqual(['CSC101', 'MAT101'],
+                         self.prereq_names()['CSC151'])
+        # Left with no prerequisites and no dependents
+        self.assertFalse('CSC102' in self.catalog)
+
+    def test_remove_edge(self):
+        self.catalog.remove_edge('MAT151', 'CSC201')
+        self.assertEqual(['CSC201', 'MAT151'],
+                         sorted(course.name
+                                for course in self.catalog.roots()))
+        self.assertEqual('CSC201', self.catalog.root.name)
+        with self.assertRaises(PrerequisiteError):
+            self.catalog.remove_edge('MAT151', 'CSC201')
+        with self.assertRaises(PrerequisiteError):
+            self.catalog.remove_edge('BIO101', 'CSC201')
+
+    def test_root_removed(self):
+        self.catalog.apply_delta([(False, 'CSC151', 'CSC201'),
+                                  (False, 'MAT151', 'CSC201')])
+        self.assertFalse('CSC201' in self.catalog)
+        self.assertEqual('CSC151', self.catalog.root.name)
+
+    def test_root_added(self):
+        self.catalog.apply_delta([(True, 'CSC201', 'CSC301')])
+        self.assertEqual('CSC301', self.catalog.root.name)
+
+    def test_cycle_through_removed_edge(self):
+        self.catalog.apply_delta([(False, 'CSC101', 'CSC151'),
+                                  (True, 'CSC151', 'CSC101')])
+        self.assertEqual(['CSC151'], self.prereq_names()['CSC101'])
+
+    def test_rejected_delta_undone(self):
+        before = self.prereq_names()
+        courses = list(self.catalog)
+        version = self.catalog.version
+        with self.assertRaises(PrerequisiteError) as context:
+            self.catalog.apply_delta(
+                [(False, 'CSC101', 'CSC151'), (True, 'CSC151', 'CSC101'),
+                 (True, 'BIO101', 'MAT151'), (True, 'CSC201', 'CSC102')],
+                ['line 1', 'line 2', 'line 3', 'line 4'])
+        self.assertIn('line 4', str(context.exception))
+        self.assertEqual(before, self.prereq_names())
+        self.assertEqual(courses, list(self.catalog))
+        self.assertEqual(version, self.catalog.version)
+        self.assertEqual('CSC201', self.catalog.root.name)
+        for course in self.catalog:
+            for pre_course in course.prereqs:
+                self.assertLess(pre_course._order, course._order)
+
+    def test_matches_full_parse(self):
+        generator = random.Random(5)
+        for trial in range(20):
+            names = ['C%d' % i for i in range(12)]
+            edges = [(names[i], names[j]) for j in range(12)
+                     for i in range(j) if generator.random() < 0.25]
+            catalog = CourseCatalog()
+            for edge in edges:
+                catalog.add_edge(*edge)
+            catalog.build_closures()
+
+            removed = generator.sample(edges, len(edges) // 3)
+            kept = [edge for edge in edges if edge not in removed]
+            # New edges that a full parse of the new file accepts
+            added = []
+            check = CourseCatalog()
+            for edge in kept:
+                check.add_edge(*edge)
+            for i in range(8):
+                edge = tuple(generator.sample(names + ['NEW'], 2))
+                try:
+                    check.add_edge(*edge)
+                except PrerequisiteError:
+                    continue
+                added.append(edge)
+
+            catalog.apply_delta([(False,) + edge for edge in removed] +
+                                [(True,) + edge for edge in added])
+            state = EnrollmentState(generator.sample(names, 3))
+            self.assertEqual(sorted(course.name for course in check),
+                             sorted(course.name for course in catalog))
+            for course in check:
+                mine = catalog.get(course.name)
+                self.assertEqual([pre.name for pre in course.prereqs],
+                                 [pre.name for pre in mine.prereqs])
+                self.assertEqual(course.missing_prereqs(state),
+                                 mine.missing_prereqs(state))
+            self.assertTrue(catalog.closures.valid)
+
+    def test_copy(self):
+        self.catalog.get('CSC101').taken = True
+        self.catalog.build_closures()
+        copy = self.catalog.copy()
+        self.assertEqual(self.prereq_names(),
+                         dict((course.name, [pre.name for pre in
+                                             course.prereqs])
+                              for course in copy))
+        self.assertEqual('CSC201', copy.root.name)
+        self.assertEqual(self.catalog.version, copy.version)
+        self.assertEqual(['CSC101'], copy.taken_names())
+        self.assertTrue(copy.closures.valid)
+        copy.apply_delta([(False, 'CSC102', 'CSC151')])
+        self.assertEqual(['CSC101', 'CSC102'],
+                         [pre.name for pre in
+                          self.catalog.get('CSC151').prereqs])
+
+    def test_dropped_catalog_freed(self):
+        catalog = CourseCatalog()
+        catalog.add_edge('DROP101', 'DROP201')
+        catalog.get('DROP201').missing_prereqs()
+        self.assertEqual(1, len(catalog.group.flag_memo))
+        del catalog
+        gc.collect()
+        # Nothing remembered about its courses keeps them alive
+        self.assertFalse(any(isinstance(each, Course) and
+                             each.name.startswith('DROP')
+                             for each in gc.get_objects()))
+
+    def test_memo_per_catalog(self):
+        other = CourseCatalog()
+        other.add_edge('BIO101', 'BIO201')
+        state = EnrollmentState()
+        top = self.catalog.get('CSC201')
+        top.missing_prereqs(state)
+        other.add_edge('BIO201', 'BIO301')
+        # Only a change to its own catalog forgets the course
+        self.assertIsNotNone(state.missing_memo().get(top))
+        self.catalog.add_edge('BIO101', 'MAT101')
+        self.assertIsNone(state.missing_memo().get(top))
+
+
+class TestPrerequisiteClosures(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = CourseCatalog()
+        for line in ['CSC151 CSC201', 'MAT151 CSC201', 'CSC101 CSC151',
+                     'CSC102 CSC151', 'MAT101 MAT151', 'CSC101 MAT151']:
+            self.catalog.add_edge(*line.split())
+        self.closures = self.catalog.build_closures()
+
+    def test_ids_in_topological_order(self):
+        for course in self.catalog:
+            for pre_course in course.prereqs:
+                self.assertLess(self.closures.ids[pre_course.name],
+                                self.closures.ids[course.name])
+
+    def test_closure(self):
+        top = self.catalog.get('CSC201')
+        self.assertEqual(['CSC101', 'CSC102', 'CSC151', 'MAT101', 'MAT151'],
+                         sorted(self.closures.names_of(
+                             self.closures.closure_of(top))))
+
+    def test_mask(self):
+        mask = self.closures.mask(['CSC101', 'MAT101', 'PHY101'])
+        self.assertEqual(['CSC101', 'MAT101'],
+                         sorted(self.closures.names_of(mask)))
+
+    def test_prereqs_in_tree(self):
+        top = self.catalog.get('CSC201')
+        self.assertTrue(top.prereqs_in_tree(self.catalog.get('CSC101')))
+        self.assertFalse(self.catalog.get('MAT151').prereqs_in_tree(
+            self.catalog.get('CSC102')))
+
+    def test_missing_prereqs(self):
+        top = self.catalog.get('CSC201')
+        state = EnrollmentState(['CSC101', 'MAT101'])
+        self.assertEqual(['CSC102', 'CSC151', 'MAT151'],
+                         top.missing_prereqs(state))
+        self.catalog.get('MAT151').take(state)
+        self.assertEqual(['CSC102', 'CSC151'], top.missing_prereqs(state))
+
+    def test_missing_prereqs_under_taken_course(self):
+        # MAT151 is taken without its prerequisites, which are then not
+        # searched, as without closures
+        top = self.catalog.get('CSC201')
+        state = EnrollmentState(['MAT151', 'CSC151'])
+        self.assertEqual([], top.missing_prereqs(state))
+
+    def test_masks_follow_untake(self):
+        state = EnrollmentState(['CSC101'])
+        self.assertEqual(['CSC101'], self.closures.names_of(
+            state.masks(self.closures)[0]))
+        # Untaking one course and taking another keeps the same number
+        state.untake(self.catalog.get('CSC101'))
+        self.catalog.get('MAT101').take(state)
+        taken, covered = state.masks(self.closures)
+        self.assertEqual(['MAT101'], self.closures.names_of(taken))
+        self.assertEqual(['MAT101'], self.closures.names_of(covered))
+        self.assertEqual(['CSC101', 'CSC102', 'CSC151', 'MAT151'],
+                         self.catalog.get('CSC201').missing_prereqs(state))
+
+    def test_updated_by_new_prereq(self):
+        self.catalog.add_edge('BIO101', 'MAT101')
+        self.assertTrue(self.closures.valid)
+        self.assertEqual(['BIO101', 'MAT101'],
+                         self.catalog.get('MAT151').missing_prereqs(
+                             EnrollmentState(['CSC101'])))
+
+    def test_invalidated_by_course_change(self):
+        self.catalog.get('MAT101').add_prereq(self.catalog.get('CSC101'))
+        self.assertFalse(self.closures.valid)
+
+    def test_updated_by_delta(self):
+        state = EnrollmentState(['CSC101'])
+        top = self.catalog.get('CSC201')
+        top.missing_prereqs(state)
+        self.catalog.apply_delta([(False, 'MAT101', 'MAT151'),
+                                  (True, 'NEW101', 'CSC102')])
+        self.assertTrue(self.closures.valid)
+        self.assertEqual(['CSC102', 'CSC151', 'MAT151', 'NEW101'],
+                         top.missing_prereqs(state))
+        rebuilt = self.catalog.build_closures()
+        for course in self.catalog:
+            self.assertEqual(
+                sorted(rebuilt.names_of(rebuilt.closure_of(course))),
+                sorted(self.closures.names_of(self.closures.closures[
+                    self.closures.ids[course.name]])))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -3,11 +3,30 @@
 This module contains the class that should store all of the
 data about course prerequisites and track taken courses. Restricting the use
 of this class to be one instance per student (otherwise, "taken" doesn't make
-sense).
+sense), unless the taken courses are tracked in an EnrollmentState instead.
 
 Course: a course and its prerequisites.
+EnrollmentState: the courses taken by one student.
+MissingMemo: remembered missing prerequisites of courses.
+CourseGroup: what the courses of one catalog share.
 """
 
+import itertools
+from collections import OrderedDict
+
+import plannerMetrics
+
+# Hands out the initial position of every new course in the topological
+# order. A course created later starts after every existing course, so the
+# prerequisites given to the constructor are already ordered before it.
+_next_order = itertools.count()
+# Positions before every existing course, for courses moved to the bottom
+_next_low_order = itertools.count(-1, -1)
+
+# Greatest number of courses whose missing prerequisites are remembered,
+# for the courses marked taken and for each EnrollmentState
+MISSING_MEMO_SIZE = 1024
+
 class UntakeableError(Exception):
     pass
 
@@ -26,8 +45,14 @@ class Course:
     - name (str): the name of the course
     - prereqs (list of Course): a list of the course's prerequisites
     - taken (bool): represents whether the course has been taken or not
+    - dependents (list of Course): the courses that have this course as a
+      prerequisite
     """
 
+    # Catalogs hold a great many courses, so they are kept small
+    __slots__ = ('name', 'prereqs', '_taken', '_order', 'dependents',
+                 '_closures', '_id', '_group')
+
     def __init__(self, name, prereqs=None):
         """ (Course, str, list of Courses) -> NoneType
 
@@ -41,31 +66,100 @@ class Course:
             self.prereqs = []
         else:
             self.prereqs = prereqs
-        self.taken = False
+        self._taken = False
 
-    def is_takeable(self):
+        # Position in a topological order of all courses (prerequisites
+        # first), kept up to date by add_prereq
+        self._order = next(_next_order)
+        self.dependents = []
+        for pre_course in self.prereqs:
+            pre_course.dependents.append(self)
+
+        # Set by PrerequisiteClosures when the closures are precomputed
+        self._closures = None
+        self._id = None
+        # Replaced by the version of the catalog the course is added to
+        self._group = _loose_group
+
+    @property
+    def taken(self):
         """ (Course) -> bool
 
+        Return True if this course is marked taken.
+        """
+        return self._taken
+
+    @taken.setter
+    def taken(self, value):
+        """ (Course, bool) -> NoneType
+
+        Mark this course taken or not taken, forgetting the remembered
+        missing prerequisites that this changes.
+        """
+        if value != self._taken:
+            self._taken = value
+            if value:
+                self._group.flag_memo.forget_taken(self)
+            else:
+                self._group.flag_memo.forget_not_taken(self)
+
+    def is_taken(self, state=None):
+        """ (Course, EnrollmentState) -> bool
+
+        Return True if this course has been taken, according to state if
+        it is given and to self.taken otherwise.
+        """
+        if state is None:
+            return self._taken
+        else:
+            return state.is_taken(self)
+
+    def is_takeable(self, state=None):
+        """ (Course, EnrollmentState) -> bool
+
         Return True if the user can take this course.
         A course is takeable if and only if all of its prerequisites are taken.
         """
-        if self.missing_prereqs() == []:
-            return True
-        else:
-            return False
+        # Missing prerequisites are only searched below prerequisites that
+        # are not taken, so checking the direct ones is enough
+        for pre_course in self.prereqs:
+            if not pre_course.is_taken(state):
+                return False
+        return True
 
-    def take(self):
-        """ (Course) -> NoneType
+    def take(self, state=None):
+        """ (Course, EnrollmentState) -> NoneType
 
-        If this course is takeable, change self.taken to True.
-        Do nothing if self.taken is already True.
+        If this course is takeable, change self.taken to True, or record
+        it in state if state is given.
+        Do nothing if the course is already taken.
         Raise UntakeableError if this course is not takeable.
         """
-        if self.is_takeable():
-            self.taken = True
+        if self.is_takeable(state):
+            if state is None:
+                self.taken = True
+            else:
+                state.take(self)
         else:
             raise UntakeableError
 
+    def unlocked_courses(self, state=None):
+        """ (Course, EnrollmentState) -> list of str
+
+        Return the names of the courses that have this course as a
+        prerequisite and are takeable but not taken in state, in
+        alphabetical order. Right after this course is taken, these are
+        the courses that taking it unlocked.
+        """
+        # Only the direct dependents are checked, never the whole tree
+        result = []
+        for dependent in self.dependents:
+            if (not dependent.is_taken(state) and
+                    dependent.is_takeable(state)):
+                result.append(dependent.name)
+        result.sort()
+        return result
+
     def add_prereq(self, prereq):
         """ (Course, Course) -> NoneType
 
@@ -75,12 +169,138 @@ class Course:
         - prereq has this course in its prerequisite tree, or
         - this course already has prereq in its prerequisite tree
         """
-        if prereq.prereqs_in_tree(self):
-            raise PrerequisiteError
-        if self.prereqs_in_tree(prereq):
+        if prereq is self:
             raise PrerequisiteError
 
+        if prereq._order < self._order:
+            # prereq is already ordered first, so it cannot depend on this
+            # course; it can only be in this course's tree already.
+            if self._search_prereqs(prereq, set()):
+                raise PrerequisiteError
+        elif prereq.prereqs == []:
+            # Nothing has to come before prereq, so it can be moved below
+            # every course (this is how a chain grows downwards)
+            prereq._order = next(_next_low_order)
+        elif self.dependents == []:
+            # Nothing has to come after this course, so it can be moved
+            # above every course
+            self._order = next(_next_order)
+        else:
+            # This course cannot already have prereq in its tree, but prereq
+            # might depend on it.
+            self._reorder(prereq)
+
         self.prereqs.append(prereq)
+        prereq.dependents.append(self)
+        self._prereqs_changed(prereq)
+
+    def remove_prereq(self, prereq):
+        """ (Course, Course) -> NoneType
+
+        Remove prereq from the prerequisites of this course. Removing a
+        prerequisite keeps the topological order valid, so no other course
+        is visited.
+
+        Raise PrerequisiteError if prereq is not a prerequisite of this
+        course.
+        """
+        self._unlink(prereq)
+
+    def _unlink(self, prereq):
+        """ (Course, Course) -> (int, int)
+
+        Remove prereq from the prerequisites of this course, and return
+        where it was in prereqs and where this course was in its
+        dependents, for _relink.
+        Raise PrerequisiteError if prereq is not a prerequisite of this
+        course.
+        """
+        try:
+            index = self.prereqs.index(prereq)
+        except ValueError:
+            raise PrerequisiteError
+        dependent_index = prereq.dependents.index(self)
+        del self.prereqs[index]
+        del prereq.dependents[dependent_index]
+        self._prereqs_changed(prereq)
+        return index, dependent_index
+
+    def _relink(self, prereq, index, dependent_index):
+        """ (Course, Course, int, int) -> NoneType
+
+        Put back prereq, removed by _unlink, where it was in prereqs and
+        where this course was in its dependents. prereq must not depend
+        on this course.
+        """
+        if prereq._order > self._order:
+            self._reorder(prereq)
+        self.prereqs.insert(index, prereq)
+        prereq.dependents.insert(dependent_index, self)
+        self._prereqs_changed(prereq)
+
+    def _prereqs_changed(self, prereq):
+        """ (Course, Course) -> NoneType
+
+        Record that prereq was added to or removed from the prerequisites
+        of this course.
+        """
+        # Remembered missing prerequisites may now be wrong, but only in
+        # the catalogs of the two courses
+        self._group.version += 1
+        if prereq._group is not self._group:
+            prereq._group.version += 1
+
+        # Precomputed closures do not know about the change
+        if self._closures is not None:
+            self._closures.valid = False
+        if prereq._closures is not None:
+            prereq._closures.valid = False
+
+    def _reorder(self, prereq):
+        """ (Course, Course) -> NoneType
+
+        Move prereq and its prerequisites before this course and the
+        courses depending on it in the topological order. Only courses
+        ordered between this course and prereq are visited (Pearce-Kelly).
+
+        Raise PrerequisiteError if prereq depends on this course.
+        """
+        lower = self._order
+        upper = prereq._order
+
+        # This course and its dependents that are ordered before prereq
+        forward = [self]
+        stack = [self]
+        seen = set(forward)
+        while stack:
+            course = stack.pop()
+            for dependent in course.dependents:
+                if dependent is prereq:
+                    raise PrerequisiteError
+                if dependent not in seen and dependent._order < upper:
+                    seen.add(dependent)
+                    forward.append(dependent)
+                    stack.append(dependent)
+
+        # prereq and its prerequisites that are ordered after this course
+        backward = [prereq]
+        stack = [prereq]
+        seen = set(backward)
+        while stack:
+            course = stack.pop()
+            for pre_course in course.prereqs:
+                if pre_course not in seen and pre_course._order > lower:
+                    seen.add(pre_course)
+                    backward.append(pre_course)
+                    stack.append(pre_course)
+
+        # Reuse the same positions, giving the first ones to backward
+        forward.sort(key=_order_key)
+        backward.sort(key=_order_key)
+        affected = backward + forward
+        positions = sorted(course._order for course in affected)
+        for course, position in zip(affected, positions):
+            course._order = position
 
     def prereqs_in_tree(self, course):
         """(Course, Course) -> bool
@@ -91,21 +311,50 @@ class Course:
         else:
             if self == course:
                 return True
+            elif self._has_closures() and course._closures is self._closures:
+                return self._closures.closure_of(self) >> course._id & 1 == 1
             else:
-                # First search course in prereqs, then recurse on them
-                for pre_course in self.prereqs:
-                    if pre_course == course:
-                        return True
-                    else:
-                        if pre_course.prereqs_in_tree(course):
-                            return True
-                return False
+                visited = set()
+                found = self._search_prereqs(course, visited)
+                recorder = plannerMetrics.active
+                if recorder is not None:
+                    recorder.count('prereqs_in_tree.nodes', len(visited))
+                return found
 
-    def missing_prereqs(self):
-        """ (Course) -> list of str
+    def _has_closures(self):
+        """ (Course) -> bool
+
+        Return True if this course has up to date precomputed closures.
+        """
+        return self._closures is not None and self._closures.valid
+
+    def _search_prereqs(self, course, visited):
+        """ (Course, Course, set of Course) -> bool
+
+        Return True if course is reachable from this course through
+        prerequisites, skipping courses in visited (which were already
+        searched through another path).
+        """
+        stack = [self]
+        while stack:
+            for pre_course in stack.pop().prereqs:
+                if pre_course == course:
+                    return True
+                # Prerequisites ordered before course cannot lead to it
+                elif (pre_course not in visited and
+                      pre_course._order > course._order):
+                    visited.add(pre_course)
+                    stack.append(pre_course)
+        return False
+
+    def missing_prereqs(self, state=None):
+        """ (Course, EnrollmentState) -> list of str
 
         Return a list of all of the names of the prerequisites of this course
-        that are not taken.
+        that are not taken (in state, if it is given).
+
+        The answers for the last MISSING_MEMO_SIZE courses asked about are
+        remembered, until a course that changes them is taken.
         """
         result = []
 
@@ -113,13 +362,338 @@ class Course:
         if self.prereqs == []:
             return result
         else:
-            for pre_course in self.prereqs:
-                #If a prerequisite is not taken, add to the list
-                # and go recursively
-                if pre_course.taken is False:
-                    result.append(pre_course.name)
-                    result += pre_course.missing_prereqs()
-            
+            if state is None:
+                memo = self._group.flag_memo
+            else:
+                memo = state.missing_memo()
+            remembered = memo.get(self)
+            recorder = plannerMetrics.active
+            if recorder is not None:
+                recorder.hit('missing_prereqs.memo', remembered is not None)
+            if remembered is not None:
+                return remembered
+
+            if state is not None and self._has_closures():
+                closures = self._closures
+                taken, covered = state.masks(closures)
+            else:
+                taken = covered = None
+
+            # When no taken course is missing a prerequisite, every
+            # prerequisite that is not taken is missing
+            if taken is not None and taken == covered:
+                result = closures.names_of(closures.closure_of(self) & ~taken)
+                if recorder is not None:
+                    recorder.count('missing_prereqs.closures')
+            else:
+                visited = set()
+                self._collect_missing(visited, result, state)
+                if recorder is not None:
+                    recorder.count('missing_prereqs.nodes', len(visited))
+
             # alphabetical order
             result.sort()
+            memo.put(self, result)
             return result
+
+    def _collect_missing(self, visited, result, state):
+        """ (Course, set of Course, list of str, EnrollmentState) -> NoneType
+
+        Add to result the names of the prerequisites of this course that
+        are not taken and not in visited. A prerequisite shared by several
+        courses is only collected (and searched) once.
+        """
+        stack = [self]
+        while stack:
+            for pre_course in stack.pop().prereqs:
+                #If a prerequisite is not taken, add to the list
+                # and search its prerequisites too
+                if (not pre_course.is_taken(state) and
+                        pre_course not in visited):
+                    visited.add(pre_course)
+                    result.append(pre_course.name)
+                    stack.append(pre_course)
+
+
+class EnrollmentState:
+    """The courses taken by one student.
+
+    Keeping taken courses here instead of in Course.taken lets many
+    students share the same courses at once. Courses are recorded by name,
+    and only through take and untake, so that what is computed from them
+    can tell when they change.
+
+    Attributes:
+    - taken (frozenset of str): the names of the courses taken
+    """
+
+    def __init__(self, taken=None):
+        """ (EnrollmentState, iterable of str) -> NoneType
+
+        Create a new state in which the courses named in taken (by default
+        none) are taken.
+        """
+        if taken is None:
+            self._taken = set()
+        else:
+            self._taken = set(taken)
+        # Counts the changes to the taken courses, and the taken courses
+        # as a frozenset, made by the taken property until they change
+        self._changes = 0
+        self._frozen = None
+
+        # (closures, their version, number of changes, taken mask, covered
+        # mask) as last computed by masks
+        self._masks = None
+        # Missing prerequisites in this state, made by missing_memo, and
+        # the number of changes it was made for
+        self._memo = None
+        self._memo_changes = 0
+
+    @property
+    def taken(self):
+        """ (EnrollmentState) -> frozenset of str
+
+        Return the names of the courses taken.
+        """
+        if self._frozen is None:
+            self._frozen = frozenset(self._taken)
+        return self._frozen
+
+    def is_taken(self, course):
+        """ (EnrollmentState, Course) -> bool
+
+        Return True if course has been taken.
+        """
+        return course.name in self._taken
+
+    def take(self, course):
+        """ (EnrollmentState, Course) -> NoneType
+
+        Record that course has been taken, without checking its
+        prerequisites (use Course.take for that).
+        """
+        if course.name in self._taken:
+            return
+        self._taken.add(course.name)
+        self._changes += 1
+        self._frozen = None
+
+        if (self._memo is not None and
+                self._memo_changes + 1 == self._changes):
+            self._memo.forget_taken(course)
+            self._memo_changes += 1
+
+        # Keep the masks up to date, as long as they are
+        if self._masks is not None:
+            closures, version, count, taken, covered = self._masks
+            course_id = closures.ids.get(course.name)
+            if count + 1 == self._changes and course_id is not None:
+                bit = 1 << course_id
+                self._masks = (closures, version, count + 1, taken | bit,
+                               covered | bit | closures.closures[course_id])
+
+    def masks(self, closures):
+        """ (EnrollmentState, PrerequisiteClosures) -> (int, int)
+
+        Return the bitmask of the taken courses in closures, and the
+        bitmask of the taken courses together with all of their
+        prerequisites.
+        """
+        # Closures can be updated in place when prerequisites change
+        if (self._masks is None or self._masks[0] is not closures or
+                self._masks[1] != closures.version or
+                self._masks[2] != self._changes):
+            taken = 0
+            covered = 0
+            for name in self._taken:
+                course_id = closures.ids.get(name)
+                if course_id is not None:
+                    bit = 1 << course_id
+                    taken |= bit
+                    covered |= bit | closures.closures[course_id]
+            self._masks = (closures, closures.version, self._changes, taken,
+                           covered)
+
+        return self._masks[3], self._masks[4]
+
+    def untake(self, course):
+        """ (EnrollmentState, Course) -> NoneType
+
+        Record that course is no longer taken. Do nothing if it was not
+        taken.
+        """
+        if course.name not in self._taken:
+            return
+        self._taken.remove(course.name)
+        self._changes += 1
+        self._frozen = None
+        if (self._memo is not None and
+                self._memo_changes + 1 == self._changes):
+            self._memo.forget_not_taken(course)
+            self._memo_changes += 1
+
+        # Bits cannot be taken back out of the covered mask
+        self._masks = None
+
+    def missing_memo(self):
+        """ (EnrollmentState) -> MissingMemo
+
+        Return the memo of missing prerequisites in this state.
+        """
+        if self._memo is None or self._memo_changes != self._changes:
+            self._memo = MissingMemo()
+            self._memo_changes = self._changes
+        return self._memo
+
+    def copy(self):
+        """ (EnrollmentState) -> EnrollmentState
+
+        Return a new state with the same taken courses, which can be
+        changed without changing this one.
+        """
+        state = EnrollmentState(self._taken)
+        state._changes = self._changes
+        state._masks = self._masks
+        return state
+
+
+class MissingMemo:
+    """The missing prerequisites of recently asked about courses.
+
+    At most size courses are remembered; the one asked about least
+    recently is forgotten first. A course is forgotten as soon as taking
+    (or no longer taking) another course changes its missing prerequisites,
+    or a prerequisite is added to or removed from a course of its catalog.
+
+    Attributes:
+    - size (int): the greatest number of courses remembered
+    """
+
+    def __init__(self, size=MISSING_MEMO_SIZE):
+        """ (MissingMemo, int) -> NoneType
+
+        Create a new, empty memo of at most size courses.
+        """
+        self.size = size
+        # {Course: [sorted names, set of the same names or None until
+        # it is needed, CourseGroup of the course, its version]}
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """ (MissingMemo) -> int
+
+        Return the number of courses remembered.
+        """
+        return len(self._entries)
+
+    def get(self, course):
+        """ (MissingMemo, Course) -> list of str
+
+        Return a copy of the missing prerequisites remembered for course,
+        or None if they are not remembered.
+        """
+        entry = self._entries.get(course)
+        if entry is None:
+            return None
+        group = course._group
+        if entry[2] is not group or entry[3] != group.version:
+            # A prerequisite changed in its catalog since
+            del self._entries[course]
+            return None
+        self._entries.move_to_end(course)
+        return list(entry[0])
+
+    def put(self, course, names):
+        """ (MissingMemo, Course, list of str) -> NoneType
+
+        Remember that names are the missing prerequisites of course.
+        """
+        self._entries[course] = [list(names), None, course._group,
+                                 course._group.version]
+        self._entries.move_to_end(course)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def forget_taken(self, course):
+        """ (MissingMemo, Course) -> NoneType
+
+        Forget the courses whose missing prerequisites change now that
+        course is taken: exactly those that were missing it.
+        """
+        if self._entries:
+            stale = [each_course for each_course, entry
+                     in self._entries.items()
+                     if course.name in self._name_set(entry)]
+            for each_course in stale:
+                del self._entries[each_course]
+
+    def forget_not_taken(self, course):
+        """ (MissingMemo, Course) -> NoneType
+
+        Forget the courses whose missing prerequisites change now that
+        course is no longer taken: those that have it as a prerequisite,
+        or that are missing a course that does.
+        """
+        if self._entries:
+            dependents = set(course.dependents)
+            names = set(dependent.name for dependent in dependents)
+            stale = [each_course for each_course, entry
+                     in self._entries.items()
+                     if each_course in dependents or
+                     not names.isdisjoint(self._name_set(entry))]
+            for each_course in stale:
+                del self._entries[each_course]
+
+    def clear(self):
+        """ (MissingMemo) -> NoneType
+
+        Forget every course.
+        """
+        self._entries.clear()
+
+    def _name_set(self, entry):
+        """ (MissingMemo, list) -> set of str
+
+        Return the set of the names remembered in entry.
+        """
+        if entry[1] is None:
+            entry[1] = set(entry[0])
+        return entry[1]
+
+
+class CourseGroup:
+    """What a group of courses, such as the courses of one catalog, share.
+    Nothing in a group refers to the courses of another, so a catalog
+    that is no longer used is freed with everything remembered about it.
+    Courses that are in no catalog share one group.
+
+    Attributes:
+    - version (int): changed every time a prerequisite is added to or
+      removed from one of the courses, so that anything computed from
+      them can tell when it is out of date
+    - flag_memo (MissingMemo): the missing prerequisites of the courses,
+      with the courses marked taken
+    """
+
+    __slots__ = ('version', 'flag_memo')
+
+    def __init__(self):
+        """ (CourseGroup) -> NoneType
+
+        Create a new, empty group of courses.
+        """
+        self.version = 0
+        self.flag_memo = MissingMemo()
+
+
+# The group of the courses that are in no catalog
+_loose_group = CourseGroup()
+
+
+def _order_key(course):
+    """ (Course) -> int
+
+    Return the position of course in the topological order.
+    """
+    return course._order
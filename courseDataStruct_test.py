@@ -1,7 +1,9 @@
 """ Unit tests for courseDataStruct.py """
 
+import random
 import unittest
 from courseDataStruct import Course, UntakeableError, PrerequisiteError
+from courseDataStruct import EnrollmentState, MissingMemo
 
 
 class TestCourseInit(unittest.TestCase):
@@ -159,6 +161,93 @@ class TestCourseAddPrereq(unittest.TestCase):
         with self.assertRaises(PrerequisiteError):
             self.c6.add_prereq(self.c4)
 
+    def test_add_prereq_in_tree(self):
+        # self.c1 is a prereq of self.c4, which is a prereq of self.c6
+        with self.assertRaises(PrerequisiteError):
+            self.c6.add_prereq(self.c1)
+
+    def test_add_course_as_own_prereq(self):
+        with self.assertRaises(PrerequisiteError):
+            self.c3.add_prereq(self.c3)
+
+    def test_add_direct_cycle(self):
+        with self.assertRaises(PrerequisiteError):
+            self.c1.add_prereq(self.c4)
+
+    def test_add_indirect_cycle(self):
+        with self.assertRaises(PrerequisiteError):
+            self.c1.add_prereq(self.c6)
+        # the rejected prereq is not added
+        self.assertEqual([], self.c1.prereqs)
+
+
+class TestCourseAddPrereqOrder(unittest.TestCase):
+    # Courses created after their dependents have to be moved before them
+
+    def assert_ordered(self, courses):
+        for course in courses:
+            for pre_course in course.prereqs:
+                self.assertLess(pre_course._order, course._order)
+
+    def test_chain_added_top_down(self):
+        chain = [Course('C%d' % i) for i in range(200)]
+        for i in range(199):
+            chain[i].add_prereq(chain[i + 1])
+        self.assert_ordered(chain)
+        with self.assertRaises(PrerequisiteError):
+            chain[199].add_prereq(chain[0])
+        with self.assertRaises(PrerequisiteError):
+            chain[0].add_prereq(chain[150])
+
+    def test_branches_merged(self):
+        left = [Course('L%d' % i) for i in range(5)]
+        right = [Course('R%d' % i) for i in range(5)]
+        for i in range(4):
+            left[i + 1].add_prereq(left[i])
+            right[i].add_prereq(right[i + 1])
+        left[0].add_prereq(right[0])
+        right[4].add_prereq(Course('BASE'))
+        self.assert_ordered(left + right)
+        with self.assertRaises(PrerequisiteError):
+            right[3].add_prereq(left[2])
+
+
+class TestCourseRemovePrereq(unittest.TestCase):
+
+    def setUp(self):
+        self.a = Course('A')
+        self.b = Course('B', [self.a])
+        self.c = Course('C', [self.a, self.b])
+
+    def test_remove(self):
+        self.c.remove_prereq(self.a)
+        self.assertEqual([self.b], self.c.prereqs)
+        self.assertEqual([self.b], self.a.dependents)
+        self.assertEqual(['A', 'B'], self.c.missing_prereqs())
+
+    def test_remove_missing(self):
+        with self.assertRaises(PrerequisiteError):
+            self.b.remove_prereq(self.c)
+
+    def test_memo_forgotten(self):
+        self.assertEqual(['A', 'B'], self.c.missing_prereqs())
+        self.b.remove_prereq(self.a)
+        self.c.remove_prereq(self.a)
+        self.assertEqual(['B'], self.c.missing_prereqs())
+
+    def test_readd_after_remove(self):
+        # A course that was implied by another prerequisite can be added
+        # once that one is removed
+        self.c.remove_prereq(self.b)
+        self.c.remove_prereq(self.a)
+        self.c.add_prereq(self.b)
+        with self.assertRaises(PrerequisiteError):
+            self.c.add_prereq(self.a)
+        self.b.remove_prereq(self.a)
+        self.c.add_prereq(self.a)
+        self.a.add_prereq(self.b)
+        self.assertLess(self.b._order, self.a._order)
+
 
 class TestCourseMissingPrereqs(unittest.TestCase):
 
@@ -191,5 +280,207 @@ class TestCourseMissingPrereqs(unittest.TestCase):
         self.assertEqual([], self.c1.missing_prereqs())
 
 
+class TestCourseSharedPrereqs(unittest.TestCase):
+    # Layered diamonds: every course of a layer needs both courses of the
+    # layer below, so the number of paths doubles with each layer.
+
+    def setUp(self):
+        self.layers = [[Course('L0A'), Course('L0B')]]
+        for level in range(1, 40):
+            below = self.layers[-1]
+            self.layers.append([Course('L%dA' % level, below[:]),
+                                Course('L%dB' % level, below[:])])
+        self.top = Course('TOP', self.layers[-1][:])
+
+    def test_missing_prereqs_no_duplicates(self):
+        missing = self.top.missing_prereqs()
+        self.assertEqual(80, len(missing))
+        self.assertEqual(sorted(set(missing)), missing)
+
+    def test_missing_prereqs_some_taken(self):
+        self.layers[0][0].take()
+        self.layers[0][1].take()
+        self.assertEqual(['L1A', 'L1B'],
+                         self.layers[2][0].missing_prereqs())
+
+    def test_prereqs_in_tree_shared(self):
+        self.assertTrue(self.top.prereqs_in_tree(self.layers[0][1]))
+        self.assertFalse(self.layers[5][0].prereqs_in_tree(self.top))
+        self.assertFalse(self.top.prereqs_in_tree(Course('L0A')))
+
+
+class TestCourseUnlocked(unittest.TestCase):
+
+    def setUp(self):
+        self.c1 = Course('CSC101')
+        self.c2 = Course('MAT101')
+        self.c3 = Course('CSC151', [self.c1])
+        self.c4 = Course('CSC148', [self.c1, self.c2])
+        self.c5 = Course('CSC201', [self.c3])
+
+    def test_dependents(self):
+        self.assertEqual([self.c3, self.c4], self.c1.dependents)
+        self.assertEqual([], self.c5.dependents)
+        self.c5.add_prereq(self.c2)
+        self.assertEqual([self.c4, self.c5], self.c2.dependents)
+
+    def test_unlocked(self):
+        self.c1.take()
+        self.assertEqual(['CSC151'], self.c1.unlocked_courses())
+        self.c2.take()
+        self.assertEqual(['CSC148'], self.c2.unlocked_courses())
+
+    def test_taken_not_unlocked(self):
+        self.c1.take()
+        self.c3.take()
+        self.assertEqual([], self.c1.unlocked_courses())
+
+    def test_unlocked_in_state(self):
+        state = EnrollmentState(['MAT101'])
+        self.c1.take(state)
+        self.assertEqual(['CSC148', 'CSC151'],
+                         self.c1.unlocked_courses(state))
+        self.assertEqual([], self.c1.unlocked_courses())
+
+
+class TestEnrollmentState(unittest.TestCase):
+
+    def setUp(self):
+        self.c1 = Course('CSC101')
+        self.c2 = Course('CSC151', [self.c1])
+        self.c3 = Course('CSC201', [self.c2])
+        self.alice = EnrollmentState()
+        self.bob = EnrollmentState(['CSC101'])
+
+    def test_states_are_separate(self):
+        self.assertFalse(self.c2.is_takeable(self.alice))
+        self.assertTrue(self.c2.is_takeable(self.bob))
+        self.assertEqual(['CSC101', 'CSC151'],
+                         self.c3.missing_prereqs(self.alice))
+        self.assertEqual(['CSC151'], self.c3.missing_prereqs(self.bob))
+
+    def test_take_in_state(self):
+        self.c2.take(self.bob)
+        self.assertTrue(self.c2.is_taken(self.bob))
+        self.assertFalse(self.c2.taken)
+        self.assertEqual([], self.c3.missing_prereqs(self.bob))
+
+    def test_take_untakeable_in_state(self):
+        with self.assertRaises(UntakeableError):
+            self.c3.take(self.alice)
+        self.assertEqual(set(), self.alice.taken)
+
+    def test_flags_ignored_with_state(self):
+        self.c1.taken = True
+        self.assertEqual(['CSC101'], self.c2.missing_prereqs(self.alice))
+
+    def test_copy(self):
+        copy = self.bob.copy()
+        self.c2.take(copy)
+        self.assertEqual(set(['CSC101']), self.bob.taken)
+
+    def test_untake(self):
+        self.c1.take(self.alice)
+        self.c2.take(self.alice)
+        self.assertEqual([], self.c3.missing_prereqs(self.alice))
+        self.alice.untake(self.c1)
+        self.alice.untake(self.c3)
+        self.assertEqual(set(['CSC151']), self.alice.taken)
+        self.assertEqual([], self.c3.missing_prereqs(self.alice))
+        self.alice.untake(self.c2)
+        self.assertEqual(['CSC101', 'CSC151'],
+                         self.c3.missing_prereqs(self.alice))
+
+    def test_taken_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.bob.taken.add('CSC151')
+
+
+
+class TestMissingMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.c1 = Course('CSC101')
+        self.c2 = Course('CSC151', [self.c1])
+        self.c3 = Course('CSC201', [self.c2])
+        self.memo = MissingMemo(2)
+
+    def test_remembered(self):
+        self.memo.put(self.c3, ['CSC101', 'CSC151'])
+        self.assertEqual(['CSC101', 'CSC151'], self.memo.get(self.c3))
+        self.assertIsNone(self.memo.get(self.c2))
+
+    def test_bounded(self):
+        self.memo.put(self.c3, ['CSC101', 'CSC151'])
+        self.memo.put(self.c2, ['CSC101'])
+        self.memo.get(self.c3)
+        self.memo.put(self.c1, [])
+        self.assertEqual(2, len(self.memo))
+        self.assertIsNone(self.memo.get(self.c2))
+
+    def test_forget_taken(self):
+        self.memo.put(self.c3, ['CSC101', 'CSC151'])
+        self.memo.put(self.c2, ['CSC101'])
+        self.memo.forget_taken(self.c2)
+        self.assertIsNone(self.memo.get(self.c3))
+        self.assertEqual(['CSC101'], self.memo.get(self.c2))
+
+    def test_forget_not_taken(self):
+        self.memo.put(self.c3, ['CSC151'])
+        self.memo.put(self.c2, [])
+        self.memo.forget_not_taken(self.c1)
+        self.assertEqual(0, len(self.memo))
+
+    def test_new_prereq(self):
+        c4 = Course('MAT101')
+        self.assertEqual(['CSC101', 'CSC151'], self.c3.missing_prereqs())
+        self.c1.add_prereq(c4)
+        self.assertEqual(['CSC101', 'CSC151', 'MAT101'],
+                         self.c3.missing_prereqs())
+
+    def test_untake_and_take_in_state(self):
+        # Untaking one course and taking another keeps the same number of
+        # taken courses
+        state = EnrollmentState(['CSC101'])
+        self.assertEqual(['CSC151'], self.c3.missing_prereqs(state))
+        state.untake(self.c1)
+        state.take(self.c2)
+        self.assertEqual([], self.c3.missing_prereqs(state))
+        self.assertEqual(['CSC101'], self.c2.missing_prereqs(state))
+
+    def test_answers_are_copies(self):
+        self.c3.missing_prereqs().append('PHY101')
+        self.assertEqual(['CSC101', 'CSC151'], self.c3.missing_prereqs())
+
+    def test_same_as_search(self):
+        # Take and untake random courses, comparing every answer with a
+        # search that remembers nothing
+        generator = random.Random(1)
+        courses = []
+        for i in range(60):
+            prereqs = generator.sample(courses, min(len(courses), 3))
+            courses.append(Course('C%d' % i, prereqs))
+        state = EnrollmentState()
+        for i in range(2000):
+            course = generator.choice(courses)
+            action = generator.randrange(5)
+            if action == 0:
+                course.taken = not course.taken
+            elif action == 1:
+                state.take(course)
+            elif action == 4:
+                state.untake(course)
+            else:
+                if action == 2:
+                    each_state = None
+                else:
+                    each_state = state
+                expected = []
+                course._collect_missing(set(), expected, each_state)
+                expected.sort()
+                self.assertEqual(expected,
+                                 course.missing_prereqs(each_state))
+
+
 if __name__ == '__main__':
     unittest.main(exit=False)
@@ -0,0 +1,369 @@
+"""Parsers for prerequisite edge lists exported as CSV or JSON lines.
+
+This module reads prerequisites from a CSV file with a header row, or from
+a file with one JSON object per line, where each row or object names a
+prerequisite and a course in two of its fields. Any other fields are
+ignored. Like bulkParser, it makes no Course object: the file is
+memory-mapped and read a large chunk at a time, course names are numbered as
+they are first seen, in one table that holds each name once, and the
+prerequisites are gathered as arrays of those numbers, which are then
+checked and turned into a CompactCatalog by bulkParser.edge_catalog.
+
+In a CSV chunk with no quotes and the same number of fields on every line,
+the two columns are split out of the whole chunk at once, with no object per
+row. A JSON lines chunk is decoded as one JSON array, which still makes an
+object per line, so JSON lines take longer to load than CSV. Only a chunk
+with a blank, quoted, short or otherwise unusual row is read row by row.
+
+A CSV file loads in about the time parse_catalog takes on the same
+prerequisites (faster on some, slower on others), and faster than parsing
+and then compacting them. The catalog holds about half the memory of a
+parsed one.
+
+A prerequisite listed again for the same course is skipped, so exports
+that repeat rows give the same catalog as if each was listed once.
+
+read_csv_arrays: the arrays of the catalog of a CSV file.
+read_jsonl_arrays: the arrays of the catalog of a JSON lines file.
+parse_catalog_csv: the compact catalog of a CSV file.
+parse_catalog_jsonl: the compact catalog of a JSON lines file.
+"""
+
+import csv
+import io
+import json
+import mmap
+import os
+from array import array
+from itertools import count, filterfalse, repeat
+from operator import add, itemgetter, mul
+
+from bulkParser import edge_arrays, edge_catalog
+
+# Default names of the fields that hold the prerequisite and the course
+PREREQ_FIELD = 'prereq'
+COURSE_FIELD = 'course'
+
+# Size of the chunks a file is read in, in bytes
+CHUNK_SIZE = 1 << 23
+
+
+def parse_catalog_csv(filename, prereq_field=PREREQ_FIELD,
+                      course_field=COURSE_FIELD):
+    """ (str, str, str) -> CompactCatalog
+
+    Read in the prerequisites in the CSV file called filename, from the
+    columns named prereq_field and course_field in its header row, and
+    return a compact catalog of all the courses they mention. The courses,
+    their prerequisites and the root are the same as those of
+    bulkParser.parse_catalog_bulk for a file with the same prerequisites,
+    each listed once.
+
+    Raise ValueError, with the line number, if a column is missing or a
+    row that is not blank has an empty prerequisite or course. Raise
+    PrerequisiteError, with the line number, if a course is its own
+    prerequisite or already has the prerequisite in its tree, or if
+    prerequisites form a cycle.
+    """
+    return edge_catalog(*_read_csv(filename, prereq_field, course_field),
+                        unique=True)
+
+
+def parse_catalog_jsonl(filename, prereq_field=PREREQ_FIELD,
+                        course_field=COURSE_FIELD):
+    """ (str, str, str) -> CompactCatalog
+
+    Read in the prerequisites in the JSON lines file called filename, from
+    the fields prereq_field and course_field of each object, and return a
+    compact catalog of all the courses they mention, as parse_catalog_csv
+    does. Blank lines are skipped.
+
+    Raise ValueError, with the line number, if a line that is not blank is
+    not an object with both fields as non-empty strings. Other errors are
+    raised as by parse_catalog_csv.
+    """
+    return edge_catalog(*_read_jsonl(filename, prereq_field, course_field),
+                        unique=True)
+
+
+def read_csv_arrays(filename, prereq_field=PREREQ_FIELD,
+                    course_field=COURSE_FIELD):
+    """ (str, str, str)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog of the CSV file filename, as
+    described by catalogCache.read_snapshot_arrays. Errors are raised as
+    by parse_catalog_csv.
+    """
+    return edge_arrays(*_read_csv(filename, prereq_field, course_field),
+                       unique=True)
+
+
+def read_jsonl_arrays(filename, prereq_field=PREREQ_FIELD,
+                      course_field=COURSE_FIELD):
+    """ (str, str, str)
+        -> (list of str, array of int, array of int, array of int, int)
+
+    Return the arrays of the catalog of the JSON lines file filename, as
+    described by catalogCache.read_snapshot_arrays. Errors are raised as
+    by parse_catalog_jsonl.
+    """
+    return edge_arrays(*_read_jsonl(filename, prereq_field, course_field),
+                       unique=True)
+
+
+def _read_csv(filename, prereq_field, course_field):
+    """ (str, str, str)
+        -> (list of str, array of int, array of int, array of int)
+
+    Return the names, the prerequisite and course IDs and the lines of
+    the prerequisites of the CSV file filename, each given once.
+    """
+    with open(filename, 'rb') as my_file:
+        if os.fstat(my_file.fileno()).st_size == 0:
+            raise ValueError('line 1: expected columns %s and %s' %
+                             (prereq_field, course_field))
+        with mmap.mmap(my_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as data:
+            header_end = data.find(b'\n') + 1 or len(data)
+            header = next(csv.reader([data[:header_end].decode('utf-8')]),
+                          [])
+            try:
+                prereq_column = header.index(prereq_field)
+                course_column = header.index(course_field)
+            except ValueError:
+                raise ValueError('line 1: expected columns %s and %s' %
+                                 (prereq_field, course_field))
+            names, prereq_ids, course_ids, lines = _edge_lists(
+                _csv_chunks(data, header_end, len(header), prereq_column,
+                            course_column), b'')
+    # Decode the names all at once, unless a quoted one holds a line break
+    text = b'\n'.join(names).decode('utf-8')
+    if text.count('\n') == len(names) - 1:
+        names = text.split('\n') if names else []
+    else:
+        names = [name.decode('utf-8') for name in names]
+    return names, prereq_ids, course_ids, lines
+
+
+def _read_jsonl(filename, prereq_field, course_field):
+    """ (str, str, str)
+        -> (list of str, array of int, array of int, array of int)
+
+    Return the names, the prerequisite and course IDs and the lines of
+    the prerequisites of the JSON lines file filename, each given once.
+    """
+    with open(filename, 'rb') as my_file:
+        if os.fstat(my_file.fileno()).st_size == 0:
+            return _edge_lists(iter([]), '')
+        with mmap.mmap(my_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as data:
+            return _edge_lists(_jsonl_chunks(data, prereq_field,
+                                             course_field), '')
+
+
+def _line_chunks(data, start, quoted=False):
+    """ (bytes or mmap, int, bool) -> iterator of bytes
+
+    Yield data from start on, about CHUNK_SIZE bytes at a time, in chunks
+    that end at the end of a line. If quoted is True, a chunk does not
+    end inside a quoted CSV field, which can hold line breaks.
+    """
+    while start < len(data):
+        end = data.rfind(b'\n', start, start + CHUNK_SIZE) + 1
+        if end <= start:
+            end = data.find(b'\n', start + CHUNK_SIZE) + 1 or len(data)
+        chunk = data[start:end]
+        # Quotes in a field are doubled, so an odd number of them means
+        # the chunk ends inside a quoted field
+        while quoted and chunk.count(b'"') % 2 and end < len(data):
+            end = data.find(b'\n', end) + 1 or len(data)
+            chunk = data[start:end]
+        yield chunk
+        start = end
+
+
+def _lines(chunk):
+    """ (bytes) -> list of bytes
+
+    Return the lines of chunk, without their line breaks.
+    """
+    lines = chunk.split(b'\n')
+    if chunk.endswith(b'\n'):
+        del lines[-1]
+    return lines
+
+
+def _csv_chunks(data, start, columns, prereq_column, course_column):
+    """ (bytes or mmap, int, int, int, int)
+        -> iterator of (list of bytes, list of bytes, iterable of int)
+
+    Yield the prerequisites, the courses and the lines of the rows of data
+    from start on that are not blank, from the columns prereq_column and
+    course_column of rows of columns fields, a chunk of rows at a time.
+    """
+    line = 2
+    for chunk in _line_chunks(data, start, quoted=True):
+        rows = _lines(chunk)
+        if (b'"' not in chunk and
+                set(map(bytes.count, rows, repeat(b','))) == {columns - 1}):
+            # Every line is a row of plain fields: the fields of all of
+            # them, one after the other
+            fields = b','.join(rows).split(b',')
+            yield (list(map(bytes.strip, fields[prereq_column::columns])),
+                   list(map(bytes.strip, fields[course_column::columns])),
+                   range(line, line + len(rows)))
+        else:
+            yield _csv_rows(chunk, line, prereq_column, course_column)
+        line += len(rows)
+
+
+def _csv_rows(chunk, line, prereq_column, course_column):
+    """ (bytes, int, int, int) -> (list of bytes, list of bytes, list of int)
+
+    Return the prerequisites, the courses and the lines of the rows of
+    chunk that are not blank, read with the csv module, given that chunk
+    starts on line line.
+    Raise ValueError, with the line number, if a row has too few fields.
+    """
+    reader = csv.reader(io.StringIO(chunk.decode('utf-8'), newline=''))
+    prereq_names = []
+    course_names = []
+    lines = []
+    row_line = line
+    for row in reader:
+        if row:
+            try:
+                prereq_name = row[prereq_column].strip()
+                course_name = row[course_column].strip()
+            except IndexError:
+                raise ValueError('line %d: expected a prerequisite and a '
+                                 'course' % row_line)
+            prereq_names.append(prereq_name.encode('utf-8'))
+            course_names.append(course_name.encode('utf-8'))
+            lines.append(row_line)
+        # Quoted fields can hold line breaks
+        row_line = line + reader.line_num
+    return prereq_names, course_names, lines
+
+
+def _jsonl_chunks(data, prereq_field, course_field):
+    """ (bytes or mmap, str, str)
+        -> iterator of (list of str, list of str, iterable of int)
+
+    Yield the prerequisites, the courses and the lines of the lines of
+    data that are not blank, from the fields prereq_field and
+    course_field, a chunk of lines at a time.
+    Raise ValueError, with the line number, if a line is not an object
+    with both fields as strings.
+    """
+    decode = json.JSONDecoder().decode
+    line = 1
+    for chunk in _line_chunks(data, 0):
+        texts = _lines(chunk)
+        # The objects of all of the lines at once, as one JSON array; a
+        # blank line makes it invalid, and a line with more than one value
+        # makes it too long
+        try:
+            objects = decode('[%s]' % b','.join(texts).decode('utf-8'))
+            if len(objects) != len(texts):
+                raise ValueError
+            prereq_names = list(map(itemgetter(prereq_field), objects))
+            course_names = list(map(itemgetter(course_field), objects))
+        except (ValueError, KeyError, TypeError, IndexError):
+            pass
+        else:
+            if set(map(type, prereq_names + course_names)) == {str}:
+                yield (prereq_names, course_names,
+                       range(line, line + len(texts)))
+                line += len(texts)
+                continue
+
+        yield _jsonl_lines(texts, line, prereq_field, course_field)
+        line += len(texts)
+
+
+def _jsonl_lines(texts, line, prereq_field, course_field):
+    """ (list of bytes, int, str, str) -> (list of str, list of str, list of int)
+
+    Return the prerequisites, the courses and the lines of the lines texts
+    that are not blank, read one at a time, given that the first is line
+    line.
+    Raise ValueError, with the line number, if a line is not an object
+    with both fields as strings.
+    """
+    decode = json.JSONDecoder().decode
+    fields = itemgetter(prereq_field, course_field)
+    prereq_names = []
+    course_names = []
+    lines = []
+    for text in texts:
+        if text.strip():
+            try:
+                prereq_name, course_name = fields(decode(
+                    text.decode('utf-8')))
+            except (ValueError, KeyError, TypeError, IndexError):
+                prereq_name = course_name = None
+            if not (isinstance(prereq_name, str) and
+                    isinstance(course_name, str)):
+                raise ValueError('line %d: expected an object with %s and '
+                                 '%s' % (line, prereq_field, course_field))
+            prereq_names.append(prereq_name)
+            course_names.append(course_name)
+            lines.append(line)
+        line += 1
+    return prereq_names, course_names, lines
+
+
+def _edge_lists(chunks, empty):
+    """ (iterator of (list of str, list of str, iterable of int), str)
+        -> (list of str, array of int, array of int, array of int)
+
+    Return the names, the prerequisite and course IDs and the lines of the
+    prerequisites in chunks, each a list of prerequisites, the list of
+    their courses and their lines, in the form bulkParser.edge_arrays
+    takes them. Names are numbered in the order they are first seen, and
+    a prerequisite seen before for the same course is skipped. Names can
+    also be bytes, with empty as the empty name in either case.
+    Raise ValueError, with the line number, if a name is empty.
+    """
+    ids = {}
+    prereq_ids = array('I')
+    course_ids = array('I')
+    lines = array('I')
+
+    for prereq_names, course_names, chunk_lines in chunks:
+        # Prerequisite and course of each row, one after the other
+        words = [None] * (2 * len(prereq_names))
+        words[0::2] = prereq_names
+        words[1::2] = course_names
+        # Number the new names in the order they are first seen, without
+        # a loop over them or over the names already numbered
+        ids.update(zip(filterfalse(ids.__contains__, dict.fromkeys(words)),
+                       count(len(ids))))
+        numbers = array('I', map(ids.__getitem__, words))
+        prereq_ids.extend(numbers[0::2])
+        course_ids.extend(numbers[1::2])
+        lines.extend(chunk_lines)
+
+    if empty in ids:
+        empty_id = ids[empty]
+        index = min(ids_of.index(empty_id) for ids_of in
+                    (prereq_ids, course_ids) if empty_id in ids_of)
+        raise ValueError('line %d: expected a prerequisite and a course' %
+                         lines[index])
+
+    # One number for each pair, so the set holds no tuples
+    pairs = list(map(add, map(mul, prereq_ids, repeat(len(ids))),
+                     course_ids))
+    if len(set(pairs)) < len(pairs):
+        # Keep the first of each prerequisite given more than once
+        seen = set()
+        kept = [index for index, pair in enumerate(pairs)
+                if not (pair in seen or seen.add(pair))]
+        prereq_ids = array('I', map(prereq_ids.__getitem__, kept))
+        course_ids = array('I', map(course_ids.__getitem__, kept))
+        lines = array('I', map(lines.__getitem__, kept))
+    pairs = None
+
+    return list(ids), prereq_ids, course_ids, lines
@@ -0,0 +1,222 @@
+""" Unit tests for edgeListParser.py """
+
+import gc
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import edgeListParser
+from bulkParser import read_edge_arrays
+from compactCatalog import CompactCatalog
+from courseDataStruct import PrerequisiteError
+from edgeListParser import parse_catalog_csv, parse_catalog_jsonl
+from edgeListParser import read_csv_arrays, read_jsonl_arrays
+from plannerMain import TermPlanner
+
+
+def read_pairs(filename):
+    """ (str) -> list of (str, str)
+
+    Return the prerequisite and course of each line of a prerequisite file.
+    """
+    with open(filename) as my_file:
+        return [tuple(line.split()) for line in my_file if line.split()]
+
+
+class TestSameAsText(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write_csv(self, pairs):
+        filename = os.path.join(self.folder, 'courses.csv')
+        with open(filename, 'w') as my_file:
+            my_file.write('term,prereq,course,credits\n')
+            for prereq, course in pairs:
+                my_file.write('F24,%s,%s,0.5\n' % (prereq, course))
+        return filename
+
+    def write_jsonl(self, pairs):
+        filename = os.path.join(self.folder, 'courses.jsonl')
+        with open(filename, 'w') as my_file:
+            for prereq, course in pairs:
+                my_file.write(json.dumps({'course': course, 'prereq': prereq,
+                                          'credits': 0.5}) + '\n')
+        return filename
+
+    def test_test_files(self):
+        for filename in ['test1.txt', 'test2.txt', 'test3.txt', 'test4.txt',
+                         'test5.txt']:
+            expected = read_edge_arrays(filename)
+            pairs = read_pairs(filename)
+            self.assertEqual(expected,
+                             read_csv_arrays(self.write_csv(pairs)))
+            self.assertEqual(expected,
+                             read_jsonl_arrays(self.write_jsonl(pairs)))
+
+    def test_duplicates_collapsed(self):
+        pairs = read_pairs('test3.txt')
+        repeated = pairs[:3] + pairs + pairs[2:]
+        self.assertEqual(read_edge_arrays('test3.txt'),
+                         read_csv_arrays(self.write_csv(repeated)))
+        self.assertEqual(read_edge_arrays('test3.txt'),
+                         read_jsonl_arrays(self.write_jsonl(repeated)))
+
+    def test_names_shared(self):
+        catalog = parse_catalog_csv(self.write_csv(read_pairs('test3.txt')))
+        course = catalog.get('CSC151')
+        self.assertIs(course.name, course.dependents[0].prereqs[0].name)
+
+    def test_planner(self):
+        catalog = parse_catalog_csv(self.write_csv(read_pairs('test3.txt')))
+        planner = TermPlanner.from_catalog(catalog)
+        self.assertEqual(TermPlanner('test3.txt').generate_schedule(
+            ['CSC201']), planner.generate_schedule(['CSC201']))
+
+    def test_collector_left_alone(self):
+        parse_catalog_csv(self.write_csv(read_pairs('test3.txt')))
+        self.assertTrue(gc.isenabled())
+
+    def test_compact(self):
+        catalog = parse_catalog_jsonl(
+            self.write_jsonl(read_pairs('test5.txt')))
+        self.assertIsInstance(catalog, CompactCatalog)
+        self.assertEqual('UT400', catalog.root.name)
+
+
+class TestCsvFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.csv')
+        self.chunk_size = edgeListParser.CHUNK_SIZE
+
+    def tearDown(self):
+        edgeListParser.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.folder)
+
+    def write(self, text):
+        with open(self.filename, 'w') as my_file:
+            my_file.write(text)
+
+    def test_empty(self):
+        self.write('prereq,course\n')
+        names, prereq_ends, prereq_ids, order, root_id = \
+            read_csv_arrays(self.filename)
+        self.assertEqual([], names)
+        self.assertEqual(-1, root_id)
+
+    def test_other_columns(self):
+        self.write('from,to\nCSC101,CSC151\n')
+        catalog = parse_catalog_csv(self.filename, prereq_field='from',
+                                    course_field='to')
+        self.assertEqual('CSC151', catalog.root.name)
+
+    def test_missing_column(self):
+        self.write('prereq,name\nCSC101,CSC151\n')
+        with self.assertRaisesRegex(ValueError, 'line 1'):
+            read_csv_arrays(self.filename)
+
+    def test_blank_and_quoted_rows(self):
+        self.write('prereq,course,note\n\nA,B,"two\nlines"\n B ,C,x\n')
+        catalog = parse_catalog_csv(self.filename)
+        self.assertEqual(['A', 'B'], catalog.get('C').missing_prereqs())
+
+    def test_small_chunks(self):
+        edgeListParser.CHUNK_SIZE = 40
+        self.write('prereq,course\n' + ''.join(
+            'C%d,C%d\n' % (i, i + 1) for i in range(100)) + '\nC3,C4\n')
+        names, prereq_ends, prereq_ids, order, root_id = \
+            read_csv_arrays(self.filename)
+        self.assertEqual(101, len(names))
+        self.assertEqual(100, len(prereq_ids))
+        self.assertEqual('C100', names[root_id])
+
+    def test_quoted_row_between_chunks(self):
+        edgeListParser.CHUNK_SIZE = 16
+        self.write('prereq,course,note\nA,B,x\nB,C,"a\nlong\nnote"\n'
+                   'C,D,x\nD,E,x\n\nE\n')
+        with self.assertRaisesRegex(ValueError, 'line 9'):
+            read_csv_arrays(self.filename)
+
+    def test_quoted_name(self):
+        self.write('prereq,course\n"CSC\n101",CSC151\nCSC151,CSC201\n')
+        names, prereq_ends, prereq_ids, order, root_id = \
+            read_csv_arrays(self.filename)
+        self.assertEqual(['CSC\n101', 'CSC151', 'CSC201'], names)
+
+    def test_windows_line_ends(self):
+        edgeListParser.CHUNK_SIZE = 16
+        with open(self.filename, 'wb') as my_file:
+            my_file.write(b'prereq,course\r\nA,B\r\nB,C\r\nC,D\r\n')
+        self.assertEqual(['A', 'B', 'C'],
+                         parse_catalog_csv(self.filename).get(
+                             'D').missing_prereqs())
+
+    def test_short_row(self):
+        self.write('prereq,course\nA,B\n\nC\n')
+        with self.assertRaisesRegex(ValueError, 'line 4'):
+            read_csv_arrays(self.filename)
+
+    def test_empty_name(self):
+        self.write('prereq,course\nA,B\nB, \n')
+        with self.assertRaisesRegex(ValueError, 'line 3'):
+            read_csv_arrays(self.filename)
+
+    def test_own_prereq(self):
+        self.write('prereq,course\nA,B\nB,B\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'line 3'):
+            read_csv_arrays(self.filename)
+
+    def test_cycle(self):
+        self.write('prereq,course\nA,B\nB,C\nC,A\n')
+        with self.assertRaisesRegex(PrerequisiteError, 'cycle'):
+            read_csv_arrays(self.filename)
+
+
+class TestJsonlFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.jsonl')
+        self.chunk_size = edgeListParser.CHUNK_SIZE
+
+    def tearDown(self):
+        edgeListParser.CHUNK_SIZE = self.chunk_size
+        shutil.rmtree(self.folder)
+
+    def write(self, text):
+        with open(self.filename, 'w') as my_file:
+            my_file.write(text)
+
+    def test_blank_lines(self):
+        self.write('{"prereq": "A", "course": "B"}\n\n'
+                   '{"prereq": "B", "course": "C", "term": "F24"}\n')
+        catalog = parse_catalog_jsonl(self.filename)
+        self.assertEqual(['A', 'B'], catalog.get('C').missing_prereqs())
+
+    def test_unusual_objects(self):
+        edgeListParser.CHUNK_SIZE = 64
+        self.write('{"prereq": "A", "course": "B"}\n'
+                   '{"prereq": "\\u0042", "course": "C", "at": [1]}\n'
+                   '{"prereq": "X", "course": "D", "prereq": "C"}\n'
+                   '{"course": "E", "prereq": "D", "credits": -0.5e1}\n')
+        catalog = parse_catalog_jsonl(self.filename)
+        self.assertEqual(['A', 'B', 'C', 'D'],
+                         catalog.get('E').missing_prereqs())
+        self.assertNotIn('X', catalog)
+
+    def test_bad_lines(self):
+        for line in ['{"prereq": "A"}', '[1, 2]', '{"prereq": "A", '
+                     '"course": 3}', 'not json']:
+            self.write('{"prereq": "A", "course": "B"}\n' + line + '\n')
+            with self.assertRaisesRegex(ValueError, 'line 2'):
+                read_jsonl_arrays(self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
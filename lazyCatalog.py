@@ -0,0 +1,394 @@
+"""Lazily loaded catalogs.
+
+This module saves an index of a prerequisite file next to it, and loads
+courses from it only when they are asked for. A course is loaded with all
+of its prerequisites, direct or not, so a query about a few courses only
+makes the Course objects under them; the rest of the index stays on disk,
+since it is memory-mapped rather than read.
+
+The index holds the course names once each, the IDs of the courses sorted
+by name (to find a name by binary search), and the prerequisites and
+dependents of every course as arrays of integer IDs. Like a snapshot (see
+catalogCache), it is only used while the file it was made from is
+unchanged.
+
+LazyCatalog: the courses of a prerequisite file, loaded as they are needed.
+index_path: the name of the index of a prerequisite file.
+open_index: open the index of a prerequisite file.
+write_index: save the index of a prerequisite file.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from catalogCache import is_current, source_key
+from courseCatalog import CourseCatalog
+from courseDataStruct import Course, CourseGroup
+
+# Added to the name of a prerequisite file to get the name of its index
+INDEX_SUFFIX = '.planindex'
+
+# The arrays are mapped as they are, so the byte order is part of the magic
+_MAGIC = b'PLNINDX' + (b'L' if sys.byteorder == 'little' else b'B')
+_FORMAT_VERSION = 1
+
+# Magic, format version, source mtime (ns), source size, source SHA-256,
+# number of courses, number of prerequisites, root ID (-1 if none),
+# length of the source path and length of the names, in bytes
+_HEADER = struct.Struct('=8sIqq32sIIiII')
+
+
+class LazyCatalog:
+    """The courses of a prerequisite file, loaded from its index as they
+    are needed.
+
+    A lazy catalog answers like a CourseCatalog. Courses are only made
+    when they, or a course that needs them, are asked for with get, and
+    the dependents of a loaded course only list the courses loaded so far
+    until load_dependents is called. Anything that needs every course
+    (iterating, roots, load_all) loads the whole catalog.
+
+    Attributes:
+    - version (int): always 0, since a lazy catalog cannot change
+    - group (CourseGroup): what the loaded courses share (see
+      CourseCatalog.group)
+    """
+
+    def __init__(self, data, course_count, prereq_count, root_id,
+                 names_length):
+        """ (LazyCatalog, mmap, int, int, int, int) -> NoneType
+
+        Create a new lazy catalog over the index data, which holds
+        course_count courses and prereq_count prerequisites, with the
+        course with ID root_id as its root and names_length bytes of names.
+        Nothing is loaded yet. The catalog closes data when it is closed.
+        """
+        self.version = 0
+        self.group = CourseGroup()
+        self._data = data
+        self._count = course_count
+        self._root_id = root_id
+
+        # The arrays, one after the other, then the source path and names
+        sizes = [course_count, course_count, course_count, prereq_count,
+                 course_count, prereq_count]
+        words = memoryview(data)[_HEADER.size:
+                                 _HEADER.size + 4 * sum(sizes)].cast('I')
+        self._views = [words]
+        start = 0
+        for size in sizes:
+            self._views.append(words[start:start + size])
+            start += size
+        (self._name_ends, self._sorted_ids, self._prereq_ends,
+         self._prereq_ids, self._dependent_ends,
+         self._dependent_ids) = self._views[1:]
+        names_start = len(data) - names_length
+        self._names = memoryview(data)[names_start:]
+        self._views.append(self._names)
+
+        # Loaded courses, by ID and by name
+        self._loaded = {}
+        self._courses = {}
+        self._all = None
+
+    def __len__(self):
+        """ (LazyCatalog) -> int
+
+        Return the number of courses in this catalog, loaded or not.
+        """
+        return self._count
+
+    def __contains__(self, course_name):
+        """ (LazyCatalog, str) -> bool
+
+        Return True if a course called course_name is in this catalog,
+        without loading it.
+        """
+        return course_name in self._courses or self._find(course_name) >= 0
+
+    def __iter__(self):
+        """ (LazyCatalog) -> iterator of Course
+
+        Iterate over all of the courses in the order they were first seen,
+        loading them all.
+        """
+        return iter(self.load_all())
+
+    @property
+    def root(self):
+        """ (LazyCatalog) -> Course
+
+        Return the top-most course found when the file was parsed, loaded
+        with its prerequisites, or None if the catalog is empty.
+        """
+        if self._root_id < 0:
+            return None
+        return self._load(self._root_id)
+
+    def loaded_count(self):
+        """ (LazyCatalog) -> int
+
+        Return the number of courses loaded so far.
+        """
+        return len(self._loaded)
+
+    def get(self, course_name):
+        """ (LazyCatalog, str) -> Course
+
+        Return the course called course_name, loading it and its
+        prerequisites if they are not loaded yet.
+        Raise KeyError if there is no such course.
+        """
+        course = self._courses.get(course_name)
+        if course is not None:
+            return course
+        course_id = self._find(course_name)
+        if course_id < 0:
+            raise KeyError(course_name)
+        return self._load(course_id)
+
+    def load_dependents(self, course):
+        """ (LazyCatalog, Course) -> list of Course
+
+        Load every course that depends directly on the loaded course
+        course, so that its dependents are all listed, and return them.
+        """
+        course_id = self._find(course.name)
+        dependents = [self._load(dependent_id) for dependent_id in
+                      self._ids_in(self._dependent_ends, self._dependent_ids,
+                                   course_id)]
+        course.dependents = dependents
+        return dependents
+
+    def roots(self):
+        """ (LazyCatalog) -> list of Course
+
+        Return the courses that are not a prerequisite of any course, as
+        CourseCatalog.roots does, loading the whole catalog.
+        """
+        return self.load_all().roots()
+
+    def taken_names(self):
+        """ (LazyCatalog) -> list of str
+
+        Return the names of the courses marked taken. Only loaded courses
+        can be.
+        """
+        return [course.name for course in self._courses.values()
+                if course.taken]
+
+    def load_all(self):
+        """ (LazyCatalog) -> CourseCatalog
+
+        Load every course, and return a catalog of them, made of the same
+        Course objects as this one, just as if the file had been parsed.
+        """
+        if self._all is not None:
+            return self._all
+
+        for course_id in range(self._count):
+            if course_id not in self._loaded:
+                self._load(course_id)
+
+        catalog = CourseCatalog()
+        for course_id in range(self._count):
+            course = self._loaded[course_id]
+            # Dependents in the order a parsed catalog lists them
+            course.dependents = [
+                self._loaded[dependent_id] for dependent_id in
+                self._ids_in(self._dependent_ends, self._dependent_ids,
+                             course_id)]
+            catalog.add_course(course)
+        catalog.root = self.root
+
+        self._all = catalog
+        return catalog
+
+    def close(self):
+        """ (LazyCatalog) -> NoneType
+
+        Close the index. Courses already loaded can still be used.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._data.close()
+
+    def _load(self, course_id):
+        """ (LazyCatalog, int) -> Course
+
+        Return the course with ID course_id, loading it and then any of
+        its prerequisites that are not loaded yet, prerequisites first.
+        """
+        course = self._loaded.get(course_id)
+        if course is not None:
+            return course
+
+        # (ID, whether its prerequisites are loaded) of the courses to load
+        stack = [(course_id, False)]
+        while stack:
+            each_id, ready = stack.pop()
+            if each_id in self._loaded:
+                continue
+            prereq_ids = self._ids_in(self._prereq_ends, self._prereq_ids,
+                                      each_id)
+            if ready:
+                name = sys.intern(self._name_of(each_id))
+                course = Course(name, [self._loaded[prereq_id]
+                                       for prereq_id in prereq_ids])
+                course._group = self.group
+                self._loaded[each_id] = course
+                self._courses[name] = course
+            else:
+                stack.append((each_id, True))
+                for prereq_id in prereq_ids:
+                    if prereq_id not in self._loaded:
+                        stack.append((prereq_id, False))
+
+        return self._loaded[course_id]
+
+    def _find(self, course_name):
+        """ (LazyCatalog, str) -> int
+
+        Return the ID of the course called course_name, or -1 if there is
+        no such course, by binary search over the names in the index.
+        """
+        key = course_name.encode('utf-8')
+        low = 0
+        high = self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(self._sorted_ids[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._name_bytes(
+                self._sorted_ids[low]) == key:
+            return self._sorted_ids[low]
+        return -1
+
+    def _name_bytes(self, course_id):
+        """ (LazyCatalog, int) -> bytes
+
+        Return the encoded name of the course with ID course_id.
+        """
+        start = self._name_ends[course_id - 1] if course_id else 0
+        return bytes(self._names[start:self._name_ends[course_id]])
+
+    def _name_of(self, course_id):
+        """ (LazyCatalog, int) -> str
+
+        Return the name of the course with ID course_id.
+        """
+        return self._name_bytes(course_id).decode('utf-8')
+
+    def _ids_in(self, ends, ids, course_id):
+        """ (LazyCatalog, memoryview, memoryview, int) -> list of int
+
+        Return the IDs listed for the course with ID course_id in ids,
+        where ends holds the end of the list of each course.
+        """
+        start = ends[course_id - 1] if course_id else 0
+        return ids[start:ends[course_id]].tolist()
+
+
+def index_path(filename):
+    """ (str) -> str
+
+    Return the name of the index of the prerequisite file filename.
+    """
+    return filename + INDEX_SUFFIX
+
+
+def open_index(filename):
+    """ (str) -> LazyCatalog
+
+    Return a lazy catalog over the index of the prerequisite file filename,
+    or None if there is no usable index: it is missing, damaged, or made
+    from another version of the file.
+    """
+    try:
+        with open(index_path(filename), 'rb') as index_file:
+            data = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        (magic, version, mtime, size, digest, course_count, prereq_count,
+         root_id, path_length, names_length) = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError('not an index')
+        # Arrays, then the source path and the names
+        offset = _HEADER.size + 4 * (4 * course_count + 2 * prereq_count)
+        if len(data) != offset + path_length + names_length:
+            raise ValueError('index is truncated')
+        path = data[offset:offset + path_length].decode('utf-8')
+        if (path != os.path.abspath(filename) or
+                not is_current(filename, mtime, size, digest)):
+            raise ValueError('index is out of date')
+    except (OSError, ValueError, struct.error):
+        data.close()
+        return None
+
+    return LazyCatalog(data, course_count, prereq_count, root_id,
+                       names_length)
+
+
+def write_index(arrays, filename):
+    """ (tuple, str) -> bool
+
+    Save the index of the prerequisite file filename next to it, from the
+    arrays of its catalog, as returned by catalogCache.catalog_arrays.
+    Return False if it could not be written.
+    """
+    names, prereq_ends, prereq_ids, order, root_id = arrays
+    encoded = [name.encode('utf-8') for name in names]
+
+    name_ends = array('I')
+    length = 0
+    for name in encoded:
+        length += len(name)
+        name_ends.append(length)
+    sorted_ids = array('I', sorted(range(len(names)),
+                                   key=encoded.__getitem__))
+
+    # Dependents in the order a catalog built from the arrays lists them:
+    # the order their courses are made in
+    dependents = [[] for name in names]
+    for course_id in order:
+        start = prereq_ends[course_id - 1] if course_id else 0
+        for prereq_id in prereq_ids[start:prereq_ends[course_id]]:
+            dependents[prereq_id].append(course_id)
+    dependent_ends = array('I')
+    dependent_ids = array('I')
+    for course_dependents in dependents:
+        dependent_ids.extend(course_dependents)
+        dependent_ends.append(len(dependent_ids))
+
+    try:
+        mtime, size, digest = source_key(filename)
+        path = os.path.abspath(filename).encode('utf-8')
+        name_bytes = b''.join(encoded)
+        header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, mtime, size, digest,
+                              len(names), len(prereq_ids), root_id,
+                              len(path), len(name_bytes))
+
+        # Write to a new file first, so readers never see half of one
+        target = index_path(filename)
+        partial = '%s.%d.tmp' % (target, os.getpid())
+        with open(partial, 'wb') as index_file:
+            index_file.write(header)
+            for each_array in (name_ends, sorted_ids, array('I', prereq_ends),
+                               array('I', prereq_ids), dependent_ends,
+                               dependent_ids):
+                each_array.tofile(index_file)
+            index_file.write(path)
+            index_file.write(name_bytes)
+        os.replace(partial, target)
+    except OSError:
+        return False
+
+    return True
@@ -0,0 +1,169 @@
+""" Unit tests for lazyCatalog.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+from catalogCache import catalog_arrays
+from catalogGenerator import random_dag_edges, write_catalog
+from courseDataStruct import EnrollmentState
+from lazyCatalog import LazyCatalog, index_path, open_index, write_index
+from plannerMain import TermPlanner, NoCourseFound, parse_catalog
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.txt')
+        shutil.copy('test3.txt', self.filename)
+        self.parsed = parse_catalog(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _open(self):
+        self.assertTrue(write_index(catalog_arrays(self.parsed),
+                                    self.filename))
+        catalog = open_index(self.filename)
+        self.addCleanup(catalog.close)
+        return catalog
+
+    def test_no_index(self):
+        self.assertIsNone(open_index(self.filename))
+
+    def test_nothing_loaded(self):
+        catalog = self._open()
+        self.assertEqual(len(self.parsed), len(catalog))
+        self.assertIn('CSC101', catalog)
+        self.assertNotIn('CSC999', catalog)
+        self.assertEqual(0, catalog.loaded_count())
+
+    def test_get_loads_closure(self):
+        catalog = self._open()
+        course = catalog.get('CSC151')
+        self.assertEqual(['CSC101', 'CSC102'],
+                         [p.name for p in course.prereqs])
+        self.assertEqual(3, catalog.loaded_count())
+        self.assertIs(course.prereqs[0], catalog.get('CSC101'))
+        self.assertEqual(3, catalog.loaded_count())
+
+    def test_unknown_course(self):
+        catalog = self._open()
+        with self.assertRaises(KeyError):
+            catalog.get('CSC999')
+        with self.assertRaises(KeyError):
+            catalog.get('')
+
+    def test_load_dependents(self):
+        catalog = self._open()
+        course = catalog.get('CSC101')
+        self.assertEqual([], course.dependents)
+        self.assertEqual(['CSC151'],
+                         [d.name for d in catalog.load_dependents(course)])
+        self.assertEqual(['CSC151'], [d.name for d in course.dependents])
+
+    def test_load_all(self):
+        catalog = self._open()
+        catalog.get('MAT151')
+        loaded = catalog.load_all()
+        self.assertEqual([c.name for c in self.parsed],
+                         [c.name for c in loaded])
+        for course in self.parsed:
+            each = loaded.get(course.name)
+            self.assertEqual([p.name for p in course.prereqs],
+                             [p.name for p in each.prereqs])
+            self.assertEqual([d.name for d in course.dependents],
+                             [d.name for d in each.dependents])
+        self.assertIs(catalog.get('MAT151'), loaded.get('MAT151'))
+        self.assertEqual('CSC201', loaded.root.name)
+
+    def test_stale(self):
+        write_index(catalog_arrays(self.parsed), self.filename)
+        with open(self.filename, 'a') as my_file:
+            my_file.write('\nCSC201 CSC301\n')
+        self.assertIsNone(open_index(self.filename))
+
+    def test_damaged(self):
+        write_index(catalog_arrays(self.parsed), self.filename)
+        with open(index_path(self.filename), 'r+b') as index_file:
+            index_file.truncate(100)
+        self.assertIsNone(open_index(self.filename))
+        with open(index_path(self.filename), 'wb'):
+            pass
+        self.assertIsNone(open_index(self.filename))
+
+
+class TestLazyPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'courses.txt')
+        write_catalog(random_dag_edges(400, seed=3), self.filename)
+        self.full = TermPlanner(self.filename, use_cache=False)
+        self.lazy = TermPlanner(self.filename, lazy=True)
+
+    def tearDown(self):
+        if isinstance(self.lazy.catalog, LazyCatalog):
+            self.lazy.catalog.close()
+        shutil.rmtree(self.folder)
+
+    def _leaf(self):
+        for course in self.full.catalog:
+            if course.prereqs == [] and course.dependents:
+                return course.dependents[0].name
+
+    def test_index_saved(self):
+        self.assertIsInstance(self.lazy.catalog, LazyCatalog)
+        self.assertTrue(os.path.exists(index_path(self.filename)))
+        self.assertEqual(0, self.lazy.catalog.loaded_count())
+
+    def test_query_loads_closure_only(self):
+        name = self._leaf()
+        expected = self.full.get_course(name).missing_prereqs()
+        self.assertEqual(sorted(expected),
+                         sorted(self.lazy.get_course(name).missing_prereqs()))
+        self.assertEqual(len(expected) + 1,
+                         self.lazy.catalog.loaded_count())
+        self.assertLess(self.lazy.catalog.loaded_count(),
+                        len(self.full.catalog))
+
+    def test_is_valid(self):
+        name = self._leaf()
+        schedule = [[prereq.name] for prereq in
+                    self.full.get_course(name).prereqs] + [[name]]
+        self.assertEqual(self.full.is_valid(schedule),
+                         self.lazy.is_valid(schedule))
+        self.assertEqual(self.full.is_valid([[name]]),
+                         self.lazy.is_valid([[name]]))
+        self.assertIsInstance(self.lazy.catalog, LazyCatalog)
+
+    def test_take_course(self):
+        name = self._leaf()
+        prereq = self.full.get_course(name).prereqs[0].name
+        self.assertEqual(self.full.take_course(prereq, EnrollmentState()),
+                         self.lazy.take_course(prereq, EnrollmentState()))
+
+    def test_generate_schedule(self):
+        names = [course.name for course in self.full.catalog][-3:]
+        state = EnrollmentState([self._leaf()])
+        self.assertEqual(self.full.generate_schedule(names, state),
+                         self.lazy.generate_schedule(names, state))
+        self.assertNotIsInstance(self.lazy.catalog, LazyCatalog)
+        self.assertEqual(len(self.full.catalog), len(self.lazy.catalog))
+
+    def test_unknown_course(self):
+        with self.assertRaises(NoCourseFound):
+            self.lazy.get_course('CSC999')
+
+    def test_stale_index_replaced(self):
+        with open(self.filename, 'a') as my_file:
+            my_file.write('\nNEW101 NEW201\n')
+        planner = TermPlanner(self.filename, lazy=True)
+        self.addCleanup(planner.catalog.close)
+        self.assertEqual(['NEW101'],
+                         planner.get_course('NEW201').missing_prereqs())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
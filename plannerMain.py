@@ -5,7 +5,29 @@ who are trying to plan their schedules. It requires the course module
 to store prerequisite information.
 """
 
-from courseDataStruct import Course
+import weakref
+from collections import OrderedDict
+
+import plannerMetrics
+from catalogCache import build_catalog, catalog_arrays, read_snapshot
+from catalogCache import read_snapshot_arrays, write_snapshot
+from catalogDelta import read_delta
+from compactCatalog import CompactCatalog, CourseView, compact_catalog
+from courseCatalog import CourseCatalog
+from courseDataStruct import EnrollmentState
+from lazyCatalog import LazyCatalog, open_index, write_index
+from scheduleCache import catalog_hash, schedule_key
+from scheduleEngine import TERM_SIZE, CriticalPathScheduler, GreedyScheduler
+from scheduleValidator import ScheduleValidator
+
+
+# Ways generate_schedule can fill terms
+GREEDY = 'greedy'
+CRITICAL_PATH = 'critical_path'
+
+# Greatest number of schedulers a planner keeps, one for each mode and
+# term size asked for most recently
+SCHEDULER_CACHE_SIZE = 8
 
 
 class NoCourseFound(Exception):
@@ -19,63 +41,85 @@ def parse_course_data(filename):
     create the Course data structures for the data,
     and then return the root (top-most) course.
     """
-    all_courses = []
-    top_course = None
+    return parse_catalog(filename).root
+
+
+def parse_catalog(filename):
+    """ (str) -> CourseCatalog
+
+    Read in prerequisite data from the file called filename and return a
+    catalog of all the courses it mentions, indexed by name.
+    """
+    catalog = CourseCatalog()
 
     with open(filename, 'r') as my_file:
         for line in my_file:
             one_line = line.split()
-            add_courses(one_line[0], one_line[1], all_courses)
+            # Skip blank lines
+            if not one_line:
+                continue
+            catalog.add_edge(one_line[0], one_line[1])
+
+    return catalog
 
-            course_1 = parse_get_course(one_line[0], all_courses)
-            course_2 = parse_get_course(one_line[1], all_courses)
 
-            course_2.add_prereq(course_1)
+def load_catalog(filename):
+    """ (str) -> CourseCatalog
 
-            if top_course is None:
-                top_course = course_2
-            # If the top course becomes a prerequisite, the course on the
-            # top will become the new top
-            elif course_1 == top_course:
-                top_course = course_2
+    Return the catalog of the prerequisite file called filename, loaded
+    from its compiled snapshot if the file has not changed since the
+    snapshot was saved. Otherwise parse the file and save a new snapshot.
+    """
+    catalog = read_snapshot(filename)
+    if catalog is None:
+        catalog = parse_catalog(filename)
+        write_snapshot(catalog, filename)
+    return catalog
 
-    return top_course
 
-def add_courses(course_1_name, course_2_name, all_courses):
-    """ (str, str, list of Course) -> Nonetype
+def load_compact_catalog(filename, use_cache=False):
+    """ (str, bool) -> CompactCatalog
 
-    Add course_1_name and course_2_name to all_courses if they do not
-    exist in all_courses.
+    Return the compact catalog of the prerequisite file called filename.
+    If use_cache is True, it is loaded straight from the arrays of the
+    compiled snapshot when the snapshot is current, without making any
+    Course objects; otherwise the file is parsed (and the snapshot saved).
     """
-    course_1 = None
-    course_2 = None
-
-    # Check if the courses has been created before
-    for course in all_courses:
-        if course.name == course_1_name:
-            course_1 = course
-    for course in all_courses:
-        if course.name == course_2_name:
-            course_2 = course
-
-    # If any course was not created, then create and add to the list
-    if course_1 is None:
-        course_1 = Course(course_1_name)
-        all_courses.append(course_1)
-    if course_2 is None:
-        course_2 = Course(course_2_name)
-        all_courses.append(course_2)
-
-
-def parse_get_course(course_name, all_courses):
-    """ (str, list) -> Course
-
-    Return an object Course that has the same name as course_name
-    from all_courses.
+    if use_cache:
+        arrays = read_snapshot_arrays(filename)
+        if arrays is not None:
+            return CompactCatalog(*arrays)
+
+    catalog = parse_catalog(filename)
+    if use_cache:
+        write_snapshot(catalog, filename)
+    return compact_catalog(catalog)
+
+
+def load_lazy_catalog(filename):
+    """ (str) -> LazyCatalog
+
+    Return a lazy catalog of the prerequisite file called filename, which
+    loads courses from the index of the file as they are needed (see
+    lazyCatalog). If the index is missing or out of date, a new one is
+    saved from the compiled snapshot, or from the file if the snapshot is
+    not current either. If it cannot be saved, the whole catalog is
+    returned instead, as a CourseCatalog.
     """
-    for each_course in all_courses:
-        if course_name == each_course.name:
-            return each_course
+    catalog = open_index(filename)
+    if catalog is not None:
+        return catalog
+
+    arrays = read_snapshot_arrays(filename)
+    if arrays is None:
+        parsed = parse_catalog(filename)
+        write_snapshot(parsed, filename)
+        arrays = catalog_arrays(parsed)
+    if write_index(arrays, filename):
+        catalog = open_index(filename)
+    if catalog is None:
+        catalog = build_catalog(*arrays)
+    return catalog
 
 """ TermPlanner: answers queries about schedules based on prerequisite tree."""
 class TermPlanner:
@@ -83,28 +127,147 @@ class TermPlanner:
 
     Attributes:
     - course (Course): tree containing all available courses
+    - catalog (CourseCatalog): every available course, indexed by name
+    - schedule_cache (ScheduleCache): where generate_schedule remembers
+      the schedules it returns, or None
     """
 
-    def __init__(self, filename):
-        """ (TermPlanner, str) -> NoneType
+    def __init__(self, filename, precompute=False, use_cache=False,
+                 compact=False, lazy=False, schedule_cache=None):
+        """ (TermPlanner, str, bool, bool, bool, bool, ScheduleCache)
+            -> NoneType
 
         Create a new term planning tool based on the data in the file
-        named filename.
+        named filename. If precompute is True, the transitive prerequisites
+        of every course are computed up front to speed up queries.
+        If use_cache is True, the file is loaded from (and saved to) its
+        compiled snapshot, next to it, instead of being parsed each time.
+        Nothing is written unless it is asked for.
+
+        If compact is True, the courses are kept in a CompactCatalog, and
+        course and catalog hold CourseView objects instead of Course
+        objects. Courses are then only taken in an EnrollmentState, and
+        precompute has no effect.
+
+        If lazy is True, the catalog is a LazyCatalog, which only loads
+        the courses a query needs, with their prerequisites, from an index
+        saved next to the file (see load_lazy_catalog). Queries about a
+        few courses, such as is_valid, take_course or missing
+        prerequisites, then stay lazy; the first one that needs every
+        course, such as generate_schedule, loads the rest of the catalog.
+        use_cache and precompute have no effect.
+
+        Schedules are remembered in schedule_cache, if it is given, which
+        may be shared with other planners.
+        """
+        if lazy:
+            self.catalog = load_lazy_catalog(filename)
+        elif compact:
+            self.catalog = load_compact_catalog(filename, use_cache)
+        elif use_cache:
+            self.catalog = load_catalog(filename)
+        else:
+            self.catalog = parse_catalog(filename)
+        # The root is only looked up when it is first needed, since that
+        # loads a whole tree of a lazy catalog
+        self._course = None
+        self._course_found = False
+        if precompute and not compact and not lazy:
+            self.catalog.build_closures()
+        self.schedule_cache = schedule_cache
+        # {(mode, term size): (catalog, its group version, scheduler)},
+        # least recently used first
+        self._schedulers = OrderedDict()
+        # (catalog, its version, its group version, digest of the catalog)
+        self._content = None
+        # (catalog, its version, its group version, ScheduleValidator)
+        self._validator = None
+        # Schedules being iterated over, which apply_delta must not change
+        self._iterations = weakref.WeakSet()
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """ (type, CourseCatalog) -> TermPlanner
+
+        Return a new term planning tool for the courses of catalog, which
+        may also be a CompactCatalog, without reading any file.
+        """
+        planner = cls.__new__(cls)
+        planner.catalog = catalog
+        planner._course = None
+        planner._course_found = False
+        planner.schedule_cache = None
+        planner._schedulers = OrderedDict()
+        planner._content = None
+        planner._validator = None
+        planner._iterations = weakref.WeakSet()
+        return planner
+
+    @classmethod
+    def from_directory(cls, path, max_workers=None):
+        """ (type, str, int) -> TermPlanner
+
+        Return a new term planning tool for the courses of every
+        prerequisite file in the directory called path, parsed in up to
+        max_workers processes (see catalogDirectory.parse_directory).
         """
-        self.course = parse_course_data(filename)
+        # Imported here, since catalogDirectory parses files with this
+        # module
+        from catalogDirectory import parse_directory
+        return cls.from_catalog(parse_directory(path, max_workers))
 
-    def is_valid(self, schedule):
-        """ (TermPlanner, list of (list of str)) -> bool
+    @property
+    def course(self):
+        """ (TermPlanner) -> Course
 
-        Return True if schedule is a valid schedule.
+        Return the top-most course of the catalog.
         """
+        if not self._course_found:
+            self.course = self.catalog.root
+        return self._course
+
+    @course.setter
+    def course(self, course):
+        """ (TermPlanner, Course) -> NoneType
+
+        Make course the top-most course.
+        """
+        self._course = course
+        self._course_found = True
+
+    def _full_catalog(self):
+        """ (TermPlanner) -> CourseCatalog
+
+        Return the catalog, with every course loaded. A LazyCatalog is
+        replaced with the catalog of all of its courses.
+        """
+        if isinstance(self.catalog, LazyCatalog):
+            catalog = self.catalog.load_all()
+            self.catalog.close()
+            self.catalog = catalog
+        return self.catalog
+
+    @plannerMetrics.timed('is_valid')
+    def is_valid(self, schedule, state=None):
+        """ (TermPlanner, list of (list of str), EnrollmentState) -> bool
+
+        Return True if schedule is a valid schedule for a student who has
+        taken the courses in state (by default, the courses marked taken).
+        Neither state nor the courses are changed.
+        """
+        if state is None:
+            state = self.flag_state()
+        else:
+            state = state.copy()
+
         for term in schedule:
             for each_course in term:
                 # a string is given => find the course itself
                 one_course = self.get_course(each_course)
 
-                if one_course.is_takeable() and one_course.taken is False:
-                    one_course.take()
+                if (one_course.is_takeable(state) and
+                        not one_course.is_taken(state)):
+                    one_course.take(state)
                 else:
                     # if any course at a specific term is not takeable,
                     # then the schedule is not valid
@@ -112,33 +275,231 @@ class TermPlanner:
 
         return True
 
-    def generate_schedule(self, selected_courses):
-        """ (TermPlanner, list of str) -> list of (list of str)
+    @plannerMetrics.timed('validate_schedules')
+    def validate_schedules(self, schedules, state=None):
+        """ (TermPlanner, list of (list of (list of str)), EnrollmentState)
+            -> list of (bool, int, int)
 
-        Return a schedule containing the courses in selected_courses.
+        Check each of schedules as is_valid does, for a student who has
+        taken the courses in state (by default, the courses marked taken).
+        Return, for each schedule in order, whether it is valid and, if
+        not, the index of the first failing term and of the failing course
+        in that term (see ScheduleValidator.validate).
+        """
+        if state is None:
+            state = self.flag_state()
+        return self._schedule_validator().validate_all(schedules,
+                                                       state.taken)
+
+    @plannerMetrics.timed('validate_plans')
+    def validate_plans(self, plans):
+        """ (TermPlanner, list of (list of (list of str), EnrollmentState))
+            -> list of (bool, int, int)
+
+        Check each (schedule, state) pair of plans as validate_schedules
+        does, each for its own state (or the courses marked taken, if it
+        is None), and return the results in the same order.
         """
-        schedule = []
-        must_courses = self.direct_prerequisites(selected_courses)
-
-        while self.is_schedule_done(selected_courses, schedule) is False:
-            # All takeable courses at the tree
-            takeable = self.all_takeable(self.course)
-            # All courses that must be taken to reach the selected courses
-            # among all courses that are available to be taken
-            must_list = self.must_takeable(takeable, must_courses)
-            # Fill term deals with the number by term
-            final_term = self.fill_term(must_list)
-            # Take all the courses at this generated term
-            self.take_term(final_term)
-            # Add the term with all courses already taken at schedule
-            schedule.append(final_term)
-
-        for terms in schedule:
-            for course in terms:
-                resetcourse = self.get_course(course)
-                resetcourse.taken = False
+        validator = self._schedule_validator()
+        flag_taken = None
+        results = []
+        for schedule, state in plans:
+            if state is not None:
+                taken = state.taken
+            else:
+                if flag_taken is None:
+                    flag_taken = self.catalog.taken_names()
+                taken = flag_taken
+            results.append(validator.validate(schedule, taken))
+        return results
+
+    def _schedule_validator(self):
+        """ (TermPlanner) -> ScheduleValidator
+
+        Return the validator of the catalog, made again only when a
+        prerequisite has been changed since it was made.
+        """
+        catalog = self._full_catalog()
+        validator = self._validator
+        recorder = plannerMetrics.active
+        fresh = (validator is not None and validator[0] is catalog and
+                 validator[1] == catalog.version and
+                 validator[2] == catalog.group.version)
+        if recorder is not None:
+            recorder.hit('validator_cache', fresh)
+        if not fresh:
+            validator = (catalog, catalog.version,
+                         catalog.group.version,
+                         ScheduleValidator(catalog))
+            self._validator = validator
+        return validator[3]
+
+    @plannerMetrics.timed('generate_schedule')
+    def generate_schedule(self, selected_courses, state=None, mode=GREEDY,
+                          term_size=TERM_SIZE):
+        """ (TermPlanner, list of str, EnrollmentState, str, int)
+            -> list of (list of str)
+
+        Return a schedule containing the courses in selected_courses, for a
+        student who has taken the courses in state (by default, the
+        courses marked taken), with up to term_size courses in each term.
+
+        With mode GREEDY, terms are filled the same way as fill_term. With
+        mode CRITICAL_PATH, the courses with the longest chains still to
+        take after them are taken first, which can need fewer terms (see
+        scheduleEngine.CriticalPathScheduler).
+        Raise ValueError if mode is neither, or if term_size is less than 1.
+
+        If the planner has a schedule cache, a schedule already planned
+        for the same courses, over a catalog with the same courses and
+        prerequisites, is returned from it instead.
+        """
+        recorder = plannerMetrics.active
+        cache = self.schedule_cache
+        schedule = None
+        if cache is not None:
+            if state is None:
+                taken = self.catalog.taken_names()
+            else:
+                taken = state.taken
+            # Only the greedy mode depends on the order of the selection
+            key = schedule_key(self._catalog_hash(), selected_courses, taken,
+                               mode, term_size, ordered=mode == GREEDY)
+            schedule = cache.get(key)
+            if recorder is not None:
+                recorder.hit('schedule_cache', schedule is not None)
+
+        if schedule is None:
+            schedule = list(self.iter_schedule(selected_courses, state, mode,
+                                               term_size))
+            if cache is not None:
+                cache.put(key, schedule)
+        if recorder is not None:
+            recorder.count('generate_schedule.terms', len(schedule))
         return schedule
 
+    def _catalog_hash(self):
+        """ (TermPlanner) -> str
+
+        Return the digest of the catalog (see scheduleCache.catalog_hash),
+        computed again only when a prerequisite has been changed since.
+        """
+        catalog = self._full_catalog()
+        content = self._content
+        if (content is None or content[0] is not catalog or
+                content[1] != catalog.version or
+                content[2] != catalog.group.version):
+            content = (catalog, catalog.version, catalog.group.version,
+                       catalog_hash(catalog))
+            self._content = content
+        return content[3]
+
+    def iter_schedule(self, selected_courses, state=None, mode=GREEDY,
+                      term_size=TERM_SIZE):
+        """ (TermPlanner, list of str, EnrollmentState, str, int)
+            -> iterator of (list of str)
+
+        Return an iterator over the terms of the schedule returned by
+        generate_schedule, which plans each term only when it is asked for.
+        No course is taken, so the iteration can be stopped after any term.
+        The whole schedule is planned over the catalog as it was when the
+        iteration started, even if a delta is applied before it ends (see
+        apply_delta).
+        Raise NoCourseFound at once if a selected course does not exist.
+        """
+        scheduler = self._scheduler(mode, term_size)
+
+        # All courses that must be taken to reach the selected courses
+        must_courses = self.direct_prerequisites(selected_courses, state)
+        terms = scheduler.iter_schedule(selected_courses, must_courses, state)
+        self._iterations.add(terms)
+        return terms
+
+    def _scheduler(self, mode, term_size):
+        """ (TermPlanner, str, int) -> GreedyScheduler
+
+        Return the scheduler for mode and term_size, made again only when
+        a prerequisite has been added since it was made.
+        Raise ValueError if mode is unknown or term_size is less than 1.
+        """
+        if mode not in (GREEDY, CRITICAL_PATH):
+            raise ValueError('unknown schedule mode: %s' % mode)
+        if term_size < 1:
+            raise ValueError('a term must hold at least one course')
+        catalog = self._full_catalog()
+        scheduler_catalog, version, scheduler = self._schedulers.get(
+            (mode, term_size), (None, None, None))
+        fresh = (scheduler is not None and scheduler_catalog is catalog and
+                 version == catalog.group.version)
+        recorder = plannerMetrics.active
+        if recorder is not None:
+            recorder.hit('scheduler_cache', fresh)
+        if fresh:
+            self._schedulers.move_to_end((mode, term_size))
+            return scheduler
+
+        # Every top-most course is scheduled from, not only self.course
+        roots = catalog.roots()
+        if isinstance(self.course, CourseView):
+            # Schedule on the arrays, by course ID
+            root = self.course.id
+            graph = self.course.catalog
+            roots = [each_root.id for each_root in roots]
+        else:
+            root = self.course
+            graph = None
+
+        if mode == GREEDY:
+            # The scheduler fills each term the same way as fill_term, but
+            # only updates the courses unlocked by the previous term
+            scheduler = GreedyScheduler(root, graph, roots, term_size)
+        else:
+            scheduler = CriticalPathScheduler(roots, graph, term_size)
+        self._schedulers[(mode, term_size)] = (
+            catalog, catalog.group.version, scheduler)
+        self._schedulers.move_to_end((mode, term_size))
+        if len(self._schedulers) > SCHEDULER_CACHE_SIZE:
+            self._schedulers.popitem(last=False)
+        return scheduler
+
+    def apply_delta(self, filename):
+        """ (TermPlanner, str) -> int
+
+        Apply the prerequisite changes in the delta file filename (see
+        catalogDelta) to the catalog in place, and return its new version.
+        If schedules are still being iterated over (see iter_schedule),
+        the catalog is copied first and the delta applied to the copy, so
+        that they finish over the courses they started with; courses got
+        from the catalog before then are not changed either.
+
+        Raise ValueError if the catalog is a CompactCatalog, which cannot
+        change, or if a line of the file is not a change. Raise
+        PrerequisiteError, with the line number, if a change is rejected;
+        the catalog is then left as it was.
+        """
+        if isinstance(self.catalog, CompactCatalog):
+            raise ValueError('a compact catalog cannot be changed')
+        changes, lines = read_delta(filename)
+        catalog = self._full_catalog()
+        # A finished iteration no longer reads the courses
+        if any(terms.gi_frame is not None for terms in self._iterations):
+            catalog = catalog.copy()
+        version = catalog.apply_delta(changes,
+                                      ['line %d' % line for line in lines])
+        if catalog is not self.catalog:
+            self.catalog = catalog
+            self._iterations = weakref.WeakSet()
+        self.course = self.catalog.root
+        return version
+
+    def flag_state(self):
+        """ (TermPlanner) -> EnrollmentState
+
+        Return a new state in which the courses marked taken are taken.
+        """
+        return EnrollmentState(self.catalog.taken_names())
+
+    @plannerMetrics.timed('all_takeable')
     def all_takeable(self, course):
         """ (TermPlanner, Course) -> list of str
 
@@ -146,14 +507,43 @@ class TermPlanner:
         takeable and has not been taken.
         """
         takeable_list = []
+        visited = set()
+        self._collect_takeable(course, visited, takeable_list)
+        recorder = plannerMetrics.active
+        if recorder is not None:
+            recorder.count('all_takeable.nodes', len(visited))
+
+        # Each course is listed once, where its last occurrence in a
+        # walk of the whole tree would be.
+        takeable_list.reverse()
+        return takeable_list
+
+    def _collect_takeable(self, course, visited, takeable_list):
+        """ (TermPlanner, Course, set of Course, list of str) -> NoneType
+
+        Add to takeable_list the takeable courses under course, walking
+        prerequisites last to first and skipping courses in visited.
+        """
+        visited.add(course)
 
         if course.is_takeable() and course.taken is False:
             takeable_list.append(course.name)
-        else:
-            for each_prereq in course.prereqs:
-                takeable_list += self.all_takeable(each_prereq)
-
-        return takeable_list
+            return
+
+        # Prerequisites left to walk, for each course being walked
+        stack = [reversed(course.prereqs)]
+        while stack:
+            for each_prereq in stack[-1]:
+                if each_prereq not in visited:
+                    visited.add(each_prereq)
+                    if (each_prereq.is_takeable() and
+                            each_prereq.taken is False):
+                        takeable_list.append(each_prereq.name)
+                    else:
+                        stack.append(reversed(each_prereq.prereqs))
+                        break
+            else:
+                stack.pop()
 
     def must_takeable(self, takeable_courses, must_courses):
         """ (TermPlanner, list of str, list of str) -> list of str
@@ -176,8 +566,9 @@ class TermPlanner:
 
         return filtered
 
-    def direct_prerequisites(self, selected_courses):
-        """ (TermPlanner, list of str) -> list of str
+    @plannerMetrics.timed('direct_prerequisites')
+    def direct_prerequisites(self, selected_courses, state=None):
+        """ (TermPlanner, list of str, EnrollmentState) -> list of str
 
         Return a list of courses that are directly prerequisites from the
         selected_courses, plus the course itself, given by the user.
@@ -186,10 +577,11 @@ class TermPlanner:
         for each_course in selected_courses:
             course = self.get_course(each_course)
             all_must_prereqs += course.name
-            all_must_prereqs += course.missing_prereqs()
+            all_must_prereqs += course.missing_prereqs(state)
 
         return all_must_prereqs
 
+    @plannerMetrics.timed('fill_term')
     def fill_term(self, must_term_courses):
         """ (TermPlanner, list of str) -> list of str
 
@@ -226,14 +618,36 @@ class TermPlanner:
             course = self.get_course(each_course)
             course.take()
 
+    @plannerMetrics.timed('take_course')
+    def take_course(self, course_name, state=None):
+        """ (TermPlanner, str, EnrollmentState) -> list of str
+
+        Take the course called course_name, in state if state is given,
+        and return the names of the courses that taking it unlocked, in
+        alphabetical order. Only the courses that depend on it directly
+        are checked.
+        Raise NoCourseFound if there is no such course, and
+        UntakeableError if it is not takeable.
+        """
+        course = self.get_course(course_name)
+        course.take(state)
+        if isinstance(self.catalog, LazyCatalog):
+            # Only loaded dependents are listed until they are all loaded
+            self.catalog.load_dependents(course)
+        return course.unlocked_courses(state)
+
+    @plannerMetrics.timed('is_schedule_done')
     def is_schedule_done(self, selected_courses, schedule):
         """ (TermPlanner, list of str, list of str) -> bool
 
         Return True if all selected_courses given by the user is already
         in the schedule provided.
         """
+        recorder = plannerMetrics.active
         # Check if each course given by the user is inside the schedule
         for each_selected in selected_courses:
+            if recorder is not None:
+                recorder.count('is_schedule_done.scans')
             not_found = True
             for term in schedule:
                 for each_course in term:
@@ -249,19 +663,50 @@ class TermPlanner:
         """ (TermPlanner, str) -> Course
 
         Return an object Course that has the same name as course_name.
+        Raise NoCourseFound if there is no such course.
         """
-        return self.get_course_helper(course_name, self.course)[0]
-
-    def get_course_helper(self, course_name, course):
-        """ (TermPlanner, str, Course) -> list of Course
+        recorder = plannerMetrics.active
+        try:
+            course = self.catalog.get(course_name)
+        except KeyError:
+            if recorder is not None:
+                recorder.hit('get_course', False)
+            raise NoCourseFound(course_name)
+        if recorder is not None:
+            recorder.hit('get_course', True)
+        return course
+
+    @plannerMetrics.timed('get_course_helper')
+    def get_course_helper(self, course_name, course, visited=None):
+        """ (TermPlanner, str, Course, set of Course) -> list of Course
 
         Return Course course with course_name.
+        Courses in visited have already been searched and are skipped.
         """
+        if visited is None:
+            visited = set()
+        visited.add(course)
+
         one_course = []
-        if course.name == course_name:
+        if course.name == course_name:
             one_course.append(course)
             return one_course
-        else:
-            for each_prereq in course.prereqs:
-                one_course += self.get_course_helper(course_name, each_prereq)
-        return one_course
+
+        # Prerequisites left to search, for each course being searched
+        stack = [iter(course.prereqs)]
+        while stack:
+            for each_prereq in stack[-1]:
+                if each_prereq not in visited:
+                    visited.add(each_prereq)
+                    if each_prereq.name == course_name:
+                        one_course.append(each_prereq)
+                    else:
+                        stack.append(iter(each_prereq.prereqs))
+                        break
+            else:
+                stack.pop()
+
+        recorder = plannerMetrics.active
+        if recorder is not None:
+            recorder.count('get_course_helper.nodes', len(visited))
+        return one_course
@@ -1,8 +1,30 @@
 """ Unit tests for plannerMain.py """
 
+import os
+import tempfile
 import unittest
-from plannerMain import TermPlanner, parse_course_data
-from courseDataStruct import Course
+from plannerMain import TermPlanner, parse_course_data, NoCourseFound
+from plannerMain import GREEDY, SCHEDULER_CACHE_SIZE
+from courseDataStruct import Course, EnrollmentState, UntakeableError
+from courseDataStruct import PrerequisiteError
+
+
+class TestGetCourse(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+
+    def test_get_leaf(self):
+        course = self.planner.get_course('BIO101')
+        self.assertEqual('BIO101', course.name)
+        self.assertIn(course, self.planner.get_course('MAT151').prereqs)
+
+    def test_get_root(self):
+        self.assertIs(self.planner.course, self.planner.get_course('CSC201'))
+
+    def test_get_missing(self):
+        with self.assertRaises(NoCourseFound):
+            self.planner.get_course('PHY101')
 
 
 class TestParser(unittest.TestCase):
@@ -65,6 +87,325 @@ class TestIsValid(unittest.TestCase):
                                               ['UT400']]))
 
 
+class TestIsValidState(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test2.txt')
+
+    def test_courses_not_taken(self):
+        self.assertTrue(self.planner.is_valid([['CSC102', 'CSC151'],
+                                               ['CSC201']]))
+        for course in self.planner.catalog:
+            self.assertFalse(course.taken)
+
+    def test_state_not_changed(self):
+        state = EnrollmentState(['CSC102'])
+        self.assertTrue(self.planner.is_valid([['CSC151'], ['CSC201']],
+                                              state))
+        self.assertEqual(set(['CSC102']), state.taken)
+
+    def test_states_share_planner(self):
+        done = EnrollmentState(['CSC102', 'CSC151'])
+        fresh = EnrollmentState()
+        self.assertTrue(self.planner.is_valid([['CSC201']], done))
+        self.assertFalse(self.planner.is_valid([['CSC201']], fresh))
+
+    def test_taken_again(self):
+        state = EnrollmentState(['CSC102'])
+        self.assertFalse(self.planner.is_valid([['CSC102']], state))
+
+    def test_generate_with_state(self):
+        state = EnrollmentState(['CSC102'])
+        self.assertEqual([['CSC151'], ['CSC201']],
+                         self.planner.generate_schedule(['CSC201'], state))
+        self.assertEqual([['CSC102', 'CSC151'], ['CSC201']],
+                         self.planner.generate_schedule(['CSC201']))
+
+
+class TestValidateSchedules(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test2.txt')
+
+    def test_verdicts(self):
+        self.assertEqual([(True, None, None), (False, 1, 0)],
+                         self.planner.validate_schedules(
+                             [[['CSC102'], ['CSC151'], ['CSC201']],
+                              [['CSC102'], ['CSC201']]]))
+
+    def test_marked_taken(self):
+        self.planner.get_course('CSC102').take()
+        self.assertEqual([(False, 0, 0), (True, None, None)],
+                         self.planner.validate_schedules(
+                             [[['CSC102']], [['CSC151']]]))
+
+    def test_state(self):
+        state = EnrollmentState(['CSC102', 'CSC151'])
+        self.assertEqual([(True, None, None)],
+                         self.planner.validate_schedules([[['CSC201']]],
+                                                         state))
+
+    def test_validator_reused(self):
+        self.planner.validate_schedules([[['CSC102']]])
+        validator = self.planner._schedule_validator()
+        self.planner.validate_schedules([[['CSC102']]],
+                                        EnrollmentState(['CSC102']))
+        self.assertIs(validator, self.planner._schedule_validator())
+        self.planner.catalog.add_edge('MAT101', 'CSC201')
+        self.assertEqual([(False, 0, 0)], self.planner.validate_schedules(
+            [[['CSC201']]], EnrollmentState(['CSC102', 'CSC151'])))
+
+    def test_plans(self):
+        self.planner.get_course('CSC102').take()
+        self.assertEqual([(True, None, None), (False, 0, 0),
+                          (True, None, None)],
+                         self.planner.validate_plans(
+                             [([['CSC151']], None),
+                              ([['CSC201']], EnrollmentState(['CSC102'])),
+                              ([['CSC201']],
+                               EnrollmentState(['CSC102', 'CSC151']))]))
+
+class TestIterSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+
+    def test_same_terms(self):
+        for selected in [['CSC201'], ['MAT151'], ['CSC101', 'SOC101']]:
+            self.assertEqual(self.planner.generate_schedule(selected),
+                             list(self.planner.iter_schedule(selected)))
+
+    def test_stop_early(self):
+        state = EnrollmentState(['CSC101'])
+        terms = self.planner.iter_schedule(['CSC201'], state)
+        self.assertEqual(['BIO101', 'CHM101', 'CSC102', 'MAT101', 'SOC101'],
+                         next(terms))
+        terms.close()
+        self.assertEqual(set(['CSC101']), state.taken)
+        for course in self.planner.catalog:
+            self.assertFalse(course.taken)
+
+    def test_unknown_course(self):
+        with self.assertRaises(NoCourseFound):
+            self.planner.iter_schedule(['PHY101'])
+
+class TestTakeCourse(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+
+    def test_unlocked(self):
+        for name in ['MAT101', 'CHM101', 'SOC101']:
+            self.assertEqual([], self.planner.take_course(name))
+        self.assertEqual(['MAT151'], self.planner.take_course('BIO101'))
+        self.assertTrue(self.planner.get_course('BIO101').taken)
+
+    def test_unlocked_in_state(self):
+        state = EnrollmentState(['CSC101'])
+        self.assertEqual(['CSC151'],
+                         self.planner.take_course('CSC102', state))
+        self.assertFalse(self.planner.get_course('CSC102').taken)
+
+    def test_untakeable(self):
+        with self.assertRaises(UntakeableError):
+            self.planner.take_course('CSC201')
+        with self.assertRaises(NoCourseFound):
+            self.planner.take_course('PHY101')
+
+    def test_compact(self):
+        planner = TermPlanner('test3.txt', compact=True)
+        state = EnrollmentState(['CSC101'])
+        self.assertEqual(['CSC151'], planner.take_course('CSC102', state))
+
+class TestApplyDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt', use_cache=False)
+        handle, self.filename = tempfile.mkstemp(suffix='.txt')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def write(self, text):
+        with open(self.filename, 'w') as delta_file:
+            delta_file.write(text)
+
+    def test_apply(self):
+        self.write('- BIO101 MAT151\n+ CSC201 CSC301\n')
+        version = self.planner.catalog.version
+        self.assertEqual(version + 1, self.planner.apply_delta(self.filename))
+        self.assertEqual('CSC301', self.planner.course.name)
+        self.assertEqual(['CHM101', 'MAT101', 'SOC101'],
+                         self.planner.get_course('MAT151').missing_prereqs())
+        with self.assertRaises(NoCourseFound):
+            self.planner.get_course('BIO101')
+        schedule = self.planner.generate_schedule(['CSC301'])
+        self.assertEqual(['CSC301'], schedule[-1])
+        self.assertTrue(self.planner.is_valid(schedule))
+
+    def test_same_as_new_file(self):
+        self.write('- CSC102 CSC151\n+ MAT151 CSC151\n')
+        self.planner.apply_delta(self.filename)
+        with open('test3.txt') as my_file:
+            lines = [line for line in my_file.read().splitlines()
+                     if line != 'CSC102 CSC151']
+        with open(self.filename, 'w') as my_file:
+            my_file.write('\n'.join(lines + ['MAT151 CSC151']))
+        fresh = TermPlanner(self.filename, use_cache=False)
+        for selected in [['CSC201'], ['CSC151'], ['MAT151', 'CSC101']]:
+            self.assertEqual(fresh.generate_schedule(selected),
+                             self.planner.generate_schedule(selected))
+
+    def test_rejected(self):
+        self.write('+ PHY101 CSC151\n\n+ CSC201 CSC101\n')
+        with self.assertRaises(PrerequisiteError) as context:
+            self.planner.apply_delta(self.filename)
+        self.assertIn('line 3', str(context.exception))
+        self.assertFalse('PHY101' in self.planner.catalog)
+
+    def test_changed_while_iterating(self):
+        self.write('+ PHY101 CSC201\n')
+        expected = self.planner.generate_schedule(['CSC201'])
+        catalog = self.planner.catalog
+        terms = self.planner.iter_schedule(['CSC201'])
+        first = next(terms)
+        self.planner.apply_delta(self.filename)
+        # The running iteration finishes over the catalog it started with
+        self.assertEqual(expected, [first] + list(terms))
+        self.assertNotIn('PHY101', catalog)
+        self.assertIn('PHY101', sum(self.planner.generate_schedule(
+            ['CSC201']), []))
+
+    def test_changed_after_iterating(self):
+        self.write('+ PHY101 CSC201\n')
+        catalog = self.planner.catalog
+        terms = self.planner.iter_schedule(['CSC201'])
+        list(terms)
+        self.planner.apply_delta(self.filename)
+        self.assertIs(catalog, self.planner.catalog)
+        self.assertIn('PHY101', catalog)
+
+    def test_other_planner_kept(self):
+        other = TermPlanner('test3.txt')
+        scheduler = other._scheduler(GREEDY, 2)
+        self.write('+ PHY101 CSC201\n')
+        self.planner.apply_delta(self.filename)
+        self.assertIs(scheduler, other._scheduler(GREEDY, 2))
+
+    def test_compact(self):
+        self.write('+ PHY101 CSC201\n')
+        planner = TermPlanner('test3.txt', compact=True)
+        with self.assertRaises(ValueError):
+            planner.apply_delta(self.filename)
+
+class TestScheduleModes(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+
+    def test_modes_valid(self):
+        for mode in ['greedy', 'critical_path']:
+            for term_size in [1, 2, 5]:
+                schedule = self.planner.generate_schedule(
+                    ['CSC201'], mode=mode, term_size=term_size)
+                self.assertTrue(self.planner.is_valid(schedule))
+                self.assertEqual(['CSC201'], schedule[-1])
+                self.assertTrue(all(len(term) <= term_size
+                                    for term in schedule))
+
+    def test_default_is_greedy(self):
+        self.assertEqual(self.planner.generate_schedule(['MAT151']),
+                         self.planner.generate_schedule(['MAT151'],
+                                                        mode='greedy'))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            self.planner.generate_schedule(['MAT151'], mode='fastest')
+
+    def test_schedulers_bounded(self):
+        for term_size in range(1, 2 * SCHEDULER_CACHE_SIZE):
+            self.planner.generate_schedule(['CSC201'], term_size=term_size)
+        self.assertEqual(SCHEDULER_CACHE_SIZE,
+                         len(self.planner._schedulers))
+        self.assertIn(('greedy', 2 * SCHEDULER_CACHE_SIZE - 1),
+                      self.planner._schedulers)
+        self.assertNotIn(('greedy', 1), self.planner._schedulers)
+
+    def test_empty_terms(self):
+        for mode in ['greedy', 'critical_path']:
+            for term_size in [0, -1]:
+                with self.assertRaises(ValueError):
+                    self.planner.generate_schedule(
+                        ['MAT151'], mode=mode, term_size=term_size)
+
+    def test_new_prereq_seen(self):
+        self.planner.generate_schedule(['CSC201'], mode='critical_path')
+        self.planner.catalog.add_edge('PHY101', 'CSC101')
+        self.assertIn('PHY101', self.planner.generate_schedule(
+            ['CSC201'], mode='critical_path')[0])
+
+    def test_compact(self):
+        planner = TermPlanner('test3.txt', compact=True)
+        self.assertEqual(self.planner.generate_schedule(
+            ['CSC201'], mode='critical_path', term_size=3),
+            planner.generate_schedule(['CSC201'], mode='critical_path',
+                                      term_size=3))
+
+class TestPrecompute(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt', precompute=True)
+
+    def test_closures_built(self):
+        self.assertTrue(self.planner.catalog.closures.valid)
+
+    def test_generate_schedule(self):
+        self.assertEqual([['BIO101', 'CHM101', 'MAT101', 'SOC101', 'CSC102'],
+                          ['MAT151', 'CSC101']],
+                         self.planner.generate_schedule(['MAT151'],
+                                                        EnrollmentState()))
+
+    def test_missing_prereqs(self):
+        state = EnrollmentState(['CSC101', 'CSC102', 'BIO101'])
+        self.assertEqual(['CHM101', 'CSC151', 'MAT101', 'MAT151', 'SOC101'],
+                         self.planner.course.missing_prereqs(state))
+
+
+class TestDeepChain(unittest.TestCase):
+    # Far deeper than the recursion limit; nothing may recurse per level
+
+    def setUp(self):
+        self.length = 100000
+        handle, self.filename = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(handle, 'w') as my_file:
+            # Listed from the top down, so every course is added below
+            for i in reversed(range(self.length - 1)):
+                my_file.write('C%06d C%06d\n' % (i, i + 1))
+        self.planner = TermPlanner(self.filename, use_cache=False)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_parse(self):
+        self.assertEqual('C%06d' % (self.length - 1), self.planner.course.name)
+        self.assertEqual(self.length, len(self.planner.catalog))
+
+    def test_queries(self):
+        top = self.planner.course
+        bottom = self.planner.get_course('C000000')
+        self.assertEqual(self.length - 1, len(top.missing_prereqs()))
+        self.assertTrue(top.prereqs_in_tree(bottom))
+        self.assertEqual(['C000000'], self.planner.all_takeable(top))
+        self.assertEqual([bottom],
+                         self.planner.get_course_helper('C000000', top))
+
+    def test_schedule(self):
+        schedule = self.planner.generate_schedule([self.planner.course.name])
+        self.assertEqual(self.length, len(schedule))
+        self.assertTrue(self.planner.is_valid(schedule))
+
+
 class TestPlanner(unittest.TestCase):
     def setUp(self):
         # Single prereq
@@ -77,6 +418,24 @@ class TestPlanner(unittest.TestCase):
         self.gen_test(self.single, ['CSC101', 'CSC151'])
 
 
+class TestAllTakeable(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test1.txt')
+        a = Course('A')
+        b = Course('B')
+        # A is shared by X and Y
+        self.planner.course = Course('R', [Course('X', [a, b]),
+                                           Course('Y', [a])])
+
+    def test_shared_listed_once(self):
+        self.assertEqual(['B', 'A'],
+                         self.planner.all_takeable(self.planner.course))
+
+    def test_fill_order(self):
+        self.assertEqual(['A', 'B'], self.planner.fill_term([]))
+
+
 class TestTermPlanner(unittest.TestCase):
     # This is basically the combination of is_valid test and
     #     generate_schedule test
@@ -0,0 +1,217 @@
+"""Opt-in instrumentation of the planner.
+
+This module counts what the planner does and times its phases, while a
+Recorder is enabled. The planner only checks whether one is enabled on its
+hot paths, and counts whole traversals at once instead of each course they
+visit, so nothing measurable is added while it is disabled.
+
+Counters are named after what they count, for example
+'missing_prereqs.nodes' (courses visited finding missing prerequisites) or
+'missing_prereqs.memo.hits' and 'missing_prereqs.memo.misses' (answers
+found and not found in the memo). Phases are named after the methods they
+time, such as 'generate_schedule' or 'fill_term'; a phase called inside
+another is timed inside it too.
+
+Recorder: counters and phase timings of the planner.
+enable: start recording.
+disable: stop recording.
+recording: record for the length of a with statement.
+timed: time each call of a function as a phase.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+
+# The recorder in use, or None when recording is disabled
+active = None
+
+
+class Recorder:
+    """Counters and phase timings of the planner.
+
+    A callback given to the recorder is called at the end of each outermost
+    phase (such as one call of generate_schedule) with the name of the
+    phase and a report of that call only, as returned by report.
+
+    Attributes:
+    - counters (dict of {str: int}): the value of each counter
+    - phases (dict of {str: list of [int, float]}): the number of calls of
+      each phase and the seconds spent in them
+    - callback (function): called at the end of each outermost phase, or
+      None
+    """
+
+    def __init__(self, callback=None):
+        """ (Recorder, function) -> NoneType
+
+        Create a new recorder with nothing recorded, which calls callback
+        at the end of each outermost phase.
+        """
+        self.counters = {}
+        self.phases = {}
+        self.callback = callback
+        # Names of the phases running, outermost first
+        self._running = []
+        # Counters and phases when the outermost phase started
+        self._before = None
+
+    def count(self, name, amount=1):
+        """ (Recorder, str, int) -> NoneType
+
+        Add amount to the counter called name.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def hit(self, name, found):
+        """ (Recorder, str, bool) -> NoneType
+
+        Count one lookup in the cache called name: as name.hits if found
+        is True, and as name.misses otherwise.
+        """
+        if found:
+            self.count(name + '.hits')
+        else:
+            self.count(name + '.misses')
+
+    def start(self, name):
+        """ (Recorder, str) -> float
+
+        Start a call of the phase called name, and return what stop needs
+        to end it.
+        """
+        if not self._running and self.callback is not None:
+            self._before = (dict(self.counters),
+                            dict((phase, list(totals))
+                                 for phase, totals in self.phases.items()))
+        # A phase running inside itself is only timed once
+        if name in self._running:
+            started = None
+        else:
+            started = time.perf_counter()
+        self._running.append(name)
+        return started
+
+    def stop(self, name, started):
+        """ (Recorder, str, float) -> NoneType
+
+        End the call of the phase called name that start returned started
+        for.
+        """
+        self._running.pop()
+        totals = self.phases.setdefault(name, [0, 0.0])
+        totals[0] += 1
+        if started is not None:
+            totals[1] += time.perf_counter() - started
+
+        if not self._running and self.callback is not None:
+            counters, phases = self._before
+            self._before = None
+            self.callback(name, self._report(counters, phases))
+
+    @contextmanager
+    def phase(self, name):
+        """ (Recorder, str) -> context manager
+
+        Time the body of a with statement as a call of the phase called
+        name.
+        """
+        started = self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name, started)
+
+    def report(self):
+        """ (Recorder) -> dict
+
+        Return everything recorded, as
+        {'counters': {name: value},
+         'phases': {name: {'calls': int, 'seconds': float}}}.
+        """
+        return self._report({}, {})
+
+    def reset(self):
+        """ (Recorder) -> NoneType
+
+        Forget everything recorded.
+        """
+        self.counters = {}
+        self.phases = {}
+
+    def _report(self, counters, phases):
+        """ (Recorder, dict of {str: int}, dict of {str: list}) -> dict
+
+        Return what was recorded since counters and phases held the
+        counters and phases, in the format of report.
+        """
+        report = {'counters': {}, 'phases': {}}
+        for name, value in self.counters.items():
+            if value != counters.get(name, 0):
+                report['counters'][name] = value - counters.get(name, 0)
+        for name, (calls, seconds) in self.phases.items():
+            calls_before, seconds_before = phases.get(name, (0, 0.0))
+            if calls != calls_before:
+                report['phases'][name] = {
+                    'calls': calls - calls_before,
+                    'seconds': seconds - seconds_before}
+        return report
+
+
+def enable(callback=None):
+    """ (function) -> Recorder
+
+    Start recording in a new recorder, which calls callback at the end of
+    each outermost phase, and return it. A recorder already in use stops
+    recording.
+    """
+    global active
+    active = Recorder(callback)
+    return active
+
+
+def disable():
+    """ () -> Recorder
+
+    Stop recording, and return the recorder that was in use, or None.
+    """
+    global active
+    recorder = active
+    active = None
+    return recorder
+
+
+@contextmanager
+def recording(callback=None):
+    """ (function) -> context manager
+
+    Record for the length of a with statement, in a new recorder given to
+    the with statement, as enable does.
+    """
+    recorder = enable(callback)
+    try:
+        yield recorder
+    finally:
+        disable()
+
+
+def timed(name):
+    """ (str) -> function
+
+    Return a decorator that times each call of a function as a call of the
+    phase called name, while recording. While not recording, a call only
+    costs checking whether a recorder is in use.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            recorder = active
+            if recorder is None:
+                return function(*args, **kwargs)
+            started = recorder.start(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.stop(name, started)
+        return timed_function
+    return decorate
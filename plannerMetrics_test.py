@@ -0,0 +1,132 @@
+""" Unit tests for plannerMetrics.py """
+
+import unittest
+import plannerMetrics
+from plannerMetrics import Recorder, recording, timed
+from plannerMain import TermPlanner, NoCourseFound
+from courseDataStruct import EnrollmentState
+
+
+@timed('double')
+def double(number):
+    """ (int) -> int
+
+    Return twice number.
+    """
+    return number * 2
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_count(self):
+        recorder = Recorder()
+        recorder.count('a')
+        recorder.count('a', 4)
+        recorder.hit('cache', True)
+        recorder.hit('cache', False)
+        recorder.hit('cache', False)
+        self.assertEqual({'a': 5, 'cache.hits': 1, 'cache.misses': 2},
+                         recorder.report()['counters'])
+
+    def test_phases(self):
+        recorder = Recorder()
+        with recorder.phase('outer'):
+            with recorder.phase('inner'):
+                pass
+            with recorder.phase('inner'):
+                with recorder.phase('inner'):
+                    pass
+        phases = recorder.report()['phases']
+        self.assertEqual(1, phases['outer']['calls'])
+        self.assertEqual(3, phases['inner']['calls'])
+        self.assertGreaterEqual(phases['outer']['seconds'],
+                                phases['inner']['seconds'])
+
+    def test_callback_per_outer_phase(self):
+        reports = []
+        recorder = Recorder(lambda name, report: reports.append(
+            (name, report)))
+        for amount in [1, 2]:
+            with recorder.phase('outer'):
+                recorder.count('a', amount)
+                with recorder.phase('inner'):
+                    pass
+        self.assertEqual(['outer', 'outer'], [name for name, r in reports])
+        self.assertEqual([{'a': 1}, {'a': 2}],
+                         [report['counters'] for name, report in reports])
+        self.assertEqual(1, reports[1][1]['phases']['outer']['calls'])
+        self.assertEqual(3, recorder.report()['counters']['a'])
+
+    def test_reset(self):
+        recorder = Recorder()
+        recorder.count('a')
+        recorder.reset()
+        self.assertEqual({'counters': {}, 'phases': {}}, recorder.report())
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.planner = TermPlanner('test3.txt')
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(plannerMetrics.active)
+        self.assertEqual(4, double(2))
+
+    def test_timed(self):
+        with recording() as recorder:
+            double(1)
+            double(2)
+        self.assertIsNone(plannerMetrics.active)
+        self.assertEqual(2, recorder.report()['phases']['double']['calls'])
+        double(3)
+        self.assertEqual(2, recorder.report()['phases']['double']['calls'])
+
+    def test_generate_schedule(self):
+        reports = []
+        with recording(lambda name, report: reports.append(name)) as recorder:
+            schedule = self.planner.generate_schedule(
+                ['CSC201'], EnrollmentState())
+        report = recorder.report()
+        self.assertEqual(['generate_schedule'], reports)
+        self.assertEqual({'generate_schedule', 'direct_prerequisites'},
+                         set(report['phases']))
+        counters = report['counters']
+        self.assertEqual(len(schedule), counters['generate_schedule.terms'])
+        self.assertEqual(1, counters['get_course.hits'])
+        self.assertEqual(1, counters['missing_prereqs.memo.misses'])
+        self.assertEqual(1, counters['scheduler_cache.misses'])
+
+    def test_caches(self):
+        state = EnrollmentState()
+        with recording() as recorder:
+            for i in range(3):
+                self.planner.generate_schedule(['CSC151'], state)
+        counters = recorder.report()['counters']
+        self.assertEqual(2, counters['missing_prereqs.memo.hits'])
+        self.assertEqual(2, counters['scheduler_cache.hits'])
+
+    def test_traversals(self):
+        with recording() as recorder:
+            self.planner.all_takeable(self.planner.course)
+            self.planner.fill_term([])
+            self.planner.get_course_helper('CSC101', self.planner.course)
+            self.planner.is_schedule_done(['CSC101', 'CSC102'],
+                                          [['CSC101', 'CSC102']])
+            self.planner.get_course('CSC101').missing_prereqs()
+            self.planner.get_course('CSC151').missing_prereqs()
+            with self.assertRaises(NoCourseFound):
+                self.planner.get_course('CSC999')
+        report = recorder.report()
+        counters = report['counters']
+        self.assertEqual(18, counters['all_takeable.nodes'])
+        self.assertGreater(counters['get_course_helper.nodes'], 1)
+        self.assertEqual(2, counters['is_schedule_done.scans'])
+        self.assertEqual(2, counters['missing_prereqs.nodes'])
+        self.assertEqual(1, counters['get_course.misses'])
+        self.assertEqual(2, report['phases']['all_takeable']['calls'])
+        self.assertEqual(1, report['phases']['fill_term']['calls'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
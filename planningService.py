@@ -0,0 +1,547 @@
+"""Local planning service over one shared catalog.
+
+This module answers planning queries from many clients over one catalog
+that is loaded once. Clients connect over TCP or a Unix socket and send one
+JSON object per line, such as
+
+    {"id": 1, "op": "generate_schedule", "selected": ["CSC201"],
+     "taken": ["CSC101"]}
+
+and get one JSON object per line back, in the order the requests were
+sent: {"id": 1, "result": ...}, or {"id": 1, "error": {"type": ...,
+"message": ...}}. The operations are:
+
+- is_valid: "schedule", a list of terms
+- generate_schedule: "selected", and optionally "mode" and "term_size"
+- missing_prereqs: "course"
+- get_course: "course"; the result has its name, prerequisites,
+  dependents, and whether it is taken and takeable
+- schedule_cache_stats: the statistics of the schedule cache (see
+  scheduleCache.ScheduleCache.stats), or null if there is none
+
+Every request may give the courses its student has taken in "taken" (by
+default none). Each request is answered with its own EnrollmentState, so
+requests never see each other's taken courses and no course is ever marked
+taken.
+
+Requests from all connections go into one queue and are answered in
+batches by a single worker thread, so the event loop keeps reading and
+writing while a batch runs. The queue is bounded: when it is full,
+connections stop being read until there is room, and each connection also
+has a bounded number of requests waiting to be written back. The catalog
+file is watched and loaded again when it changes, on a thread of its own
+so that requests keep being answered from the old catalog until the new
+one is ready to take its place. Delta files can be applied to the catalog
+in place, between two batches. Either way, a batch is answered from the
+catalog it started with.
+
+The fields of a request are checked before it is answered: "taken" and
+"selected" must be lists of course names, "schedule" a list of such lists,
+"course" and "mode" strings, and "term_size" an integer.
+
+PlanningService: answers planning queries over one catalog.
+main: runs the service from the command line.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from catalogCache import collector_paused
+from courseDataStruct import EnrollmentState
+from plannerMain import GREEDY, TermPlanner
+from scheduleCache import SCHEDULE_CACHE_SIZE, ScheduleCache
+from scheduleEngine import TERM_SIZE
+
+# Greatest number of requests answered in one batch
+BATCH_SIZE = 64
+# Greatest number of requests queued for all connections
+MAX_PENDING = 1024
+# Greatest number of requests of one connection waiting to be written back
+MAX_IN_FLIGHT = 32
+# Seconds between checks for a changed catalog file
+RELOAD_INTERVAL = 1.0
+# Greatest length of a request line, in bytes
+LINE_LIMIT = 1 << 20
+
+
+class PlanningService:
+    """A service answering planning queries over one catalog.
+
+    The service must be started in a running event loop before it answers
+    anything, and closed when it is no longer needed; it can also be used
+    in an async with statement.
+
+    Attributes:
+    - filename (str): the prerequisite file the catalog is loaded from
+    - planner (TermPlanner): the planner over the current catalog
+    - reloads (int): the number of times the catalog has been loaded again
+    - reload_error (str): why the catalog file could not be loaded again
+      the last time it changed, or None
+    - batches (int): the number of batches answered
+    - schedule_cache (ScheduleCache): where generated schedules are
+      remembered, across reloads, or None
+    """
+
+    def __init__(self, filename, use_cache=False, batch_size=BATCH_SIZE,
+                 max_pending=MAX_PENDING, max_in_flight=MAX_IN_FLIGHT,
+                 reload_interval=RELOAD_INTERVAL, schedule_cache=None):
+        """ (PlanningService, str, bool, int, int, int, float,
+             ScheduleCache) -> NoneType
+
+        Create a new service over the catalog of the prerequisite file
+        filename, loaded from its compiled snapshot if use_cache is True.
+        Up to batch_size requests are answered at a time, up to
+        max_pending are queued, and up to max_in_flight of each connection
+        wait to be written back. The file is checked for changes every
+        reload_interval seconds, or never if reload_interval is None.
+        Generated schedules are remembered in schedule_cache, if it is
+        given.
+        """
+        self.filename = filename
+        self.schedule_cache = schedule_cache
+        self._use_cache = use_cache
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._max_in_flight = max_in_flight
+        self._reload_interval = reload_interval
+
+        # Taken before loading, so a change made while loading is seen
+        self._signature = _file_signature(filename)
+        self.planner = self._load_planner()
+        self.reloads = 0
+        self.reload_error = None
+        self.batches = 0
+
+        self._queue = None
+        self._executor = None
+        self._loader = None
+        self._tasks = []
+        self._servers = []
+
+    async def start(self):
+        """ (PlanningService) -> NoneType
+
+        Start answering requests in the running event loop.
+        """
+        self._queue = asyncio.Queue(self._max_pending)
+        # One thread, so batches and deltas never run at the same time
+        self._executor = ThreadPoolExecutor(1)
+        # Catalogs are loaded on a thread of their own, so batches are
+        # still answered while one loads
+        self._loader = ThreadPoolExecutor(1)
+        self._tasks = [asyncio.ensure_future(self._answer_batches())]
+        if self._reload_interval is not None:
+            self._tasks.append(asyncio.ensure_future(self._watch()))
+
+    async def close(self):
+        """ (PlanningService) -> NoneType
+
+        Stop serving connections and answering requests.
+        """
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._loader is not None:
+            self._loader.shutdown()
+            self._loader = None
+
+    async def __aenter__(self):
+        """ (PlanningService) -> PlanningService
+
+        Start this service, to be closed at the end of an async with
+        statement.
+        """
+        await self.start()
+        return self
+
+    async def __aexit__(self, kind, value, traceback):
+        """ (PlanningService, type, Exception, traceback) -> NoneType
+
+        Close this service.
+        """
+        await self.close()
+
+    async def serve_tcp(self, host, port):
+        """ (PlanningService, str, int) -> asyncio.Server
+
+        Accept connections on host and port, and return the server.
+        """
+        server = await asyncio.start_server(self._handle, host, port,
+                                            limit=LINE_LIMIT)
+        self._servers.append(server)
+        return server
+
+    async def serve_unix(self, path):
+        """ (PlanningService, str) -> asyncio.Server
+
+        Accept connections on the Unix socket at path, and return the
+        server.
+        """
+        server = await asyncio.start_unix_server(self._handle, path,
+                                                 limit=LINE_LIMIT)
+        self._servers.append(server)
+        return server
+
+    async def request(self, request):
+        """ (PlanningService, dict) -> dict
+
+        Return the answer to request, as it would be sent to a client.
+        """
+        return await (await self.submit(request))
+
+    async def submit(self, request):
+        """ (PlanningService, dict) -> asyncio.Future
+
+        Queue request, waiting while the queue is full, and return a future
+        for its answer.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return future
+
+    async def reload_if_changed(self):
+        """ (PlanningService) -> bool
+
+        Load the catalog file again if it has changed since it was last
+        loaded, and return True if it was. Requests are answered from the
+        old catalog while the new one loads, and the batches after it is
+        loaded are answered from the new one. If the new file cannot be
+        loaded, the old catalog is kept and the error is kept in
+        reload_error.
+        """
+        signature = _file_signature(self.filename)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        loop = asyncio.get_running_loop()
+        try:
+            planner = await loop.run_in_executor(
+                self._loader, self._load_planner)
+        except Exception as error:
+            # Keep serving the old catalog until the file is fixed
+            self.reload_error = '%s: %s' % (type(error).__name__, error)
+            return False
+
+        # Only the event loop swaps planners, and each batch is given the
+        # planner it runs with, so no batch sees two catalogs
+        self.planner = planner
+        self.reloads += 1
+        self.reload_error = None
+        return True
+
+    async def apply_delta(self, filename):
+        """ (PlanningService, str) -> int
+
+        Apply the prerequisite changes in the delta file filename to the
+        catalog in place, between two batches, as TermPlanner.apply_delta
+        does, and return the new version of the catalog. The changes are
+        lost when the catalog file changes and is loaded again.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          self.planner.apply_delta, filename)
+
+    def _load_planner(self):
+        """ (PlanningService) -> TermPlanner
+
+        Return a new planner over the catalog file.
+        """
+        return TermPlanner(self.filename, use_cache=self._use_cache,
+                           schedule_cache=self.schedule_cache)
+
+    async def _watch(self):
+        """ (PlanningService) -> NoneType
+
+        Check the catalog file for changes until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self._reload_interval)
+            await self.reload_if_changed()
+
+    async def _answer_batches(self):
+        """ (PlanningService) -> NoneType
+
+        Answer the queued requests, a batch at a time, until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            requests = [request for request, future in batch]
+            answers = await loop.run_in_executor(
+                self._executor, _answer_all, self.planner, requests)
+            self.batches += 1
+            for (request, future), answer in zip(batch, answers):
+                if not future.done():
+                    future.set_result(answer)
+
+    async def _handle(self, reader, writer):
+        """ (PlanningService, asyncio.StreamReader, asyncio.StreamWriter)
+            -> NoneType
+
+        Answer the requests of one connection until it is closed.
+        """
+        # Futures of the answers still to write back, in request order
+        pending = asyncio.Queue(self._max_in_flight)
+        writing = asyncio.ensure_future(_write_answers(pending, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError as error:
+                    # The line is too long to find where the next one starts
+                    await pending.put(_answered(None, error))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('a request must be a JSON object')
+                except ValueError as error:
+                    future = _answered(None, error)
+                else:
+                    future = await self.submit(request)
+                await pending.put(future)
+        finally:
+            await pending.put(None)
+            await writing
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def _answer_all(planner, requests):
+    """ (TermPlanner, list of dict) -> list of dict
+
+    Return the answer to each of requests over the catalog of planner, in
+    the same order.
+    """
+    return [_answer(planner, request) for request in requests]
+
+
+def _answer(planner, request):
+    """ (TermPlanner, dict) -> dict
+
+    Return the answer to request over the catalog of planner: its id, and
+    either its result or the error it raised.
+    """
+    reply = {'id': request.get('id')}
+    try:
+        reply['result'] = _run(planner, request)
+    except Exception as error:
+        # Any error fails this request only, never the batch
+        reply['error'] = _error(error)
+    return reply
+
+
+def _run(planner, request):
+    """ (TermPlanner, dict) -> object
+
+    Return the result of request over the catalog of planner.
+    Raise ValueError if the request is malformed, and NoCourseFound if a
+    course it names does not exist.
+    """
+    operation = request.get('op')
+    state = EnrollmentState(_names(request.get('taken', []), 'taken'))
+
+    if operation == 'is_valid':
+        schedule = _field(request, 'schedule')
+        if not isinstance(schedule, list):
+            raise ValueError('schedule must be a list of terms')
+        return planner.is_valid([_names(term, 'each term of schedule')
+                                 for term in schedule], state)
+    if operation == 'generate_schedule':
+        mode = request.get('mode', GREEDY)
+        if not isinstance(mode, str):
+            raise ValueError('mode must be a string')
+        term_size = request.get('term_size', TERM_SIZE)
+        # True and False are ints too, but never meant as a size
+        if not isinstance(term_size, int) or isinstance(term_size, bool):
+            raise ValueError('term_size must be an integer')
+        return planner.generate_schedule(
+            _names(_field(request, 'selected'), 'selected'), state, mode,
+            term_size)
+    if operation == 'missing_prereqs':
+        course = planner.get_course(_name(_field(request, 'course')))
+        return course.missing_prereqs(state)
+    if operation == 'get_course':
+        course = planner.get_course(_name(_field(request, 'course')))
+        return {'name': course.name,
+                'prereqs': [pre_course.name for pre_course in course.prereqs],
+                'dependents': sorted(dependent.name
+                                     for dependent in course.dependents),
+                'taken': course.is_taken(state),
+                'takeable': course.is_takeable(state)}
+    if operation == 'schedule_cache_stats':
+        if planner.schedule_cache is None:
+            return None
+        return planner.schedule_cache.stats()
+    raise ValueError('unknown operation: %s' % operation)
+
+
+def _field(request, key):
+    """ (dict, str) -> object
+
+    Return the value of key in request.
+    Raise ValueError if request has no such key.
+    """
+    try:
+        return request[key]
+    except KeyError:
+        raise ValueError('missing field: %s' % key)
+
+
+def _names(value, key):
+    """ (object, str) -> list of str
+
+    Return value, the field key of a request, if it is a list of course
+    names.
+    Raise ValueError if it is not.
+    """
+    # A string is iterable too, but as its characters rather than names
+    if not isinstance(value, list) or not all(isinstance(name, str)
+                                              for name in value):
+        raise ValueError('%s must be a list of course names' % key)
+    return value
+
+
+def _name(value):
+    """ (object) -> str
+
+    Return value, the course field of a request, if it is a course name.
+    Raise ValueError if it is not.
+    """
+    if not isinstance(value, str):
+        raise ValueError('course must be a course name')
+    return value
+
+
+def _error(error):
+    """ (Exception) -> dict
+
+    Return error as it is sent to a client.
+    """
+    return {'type': type(error).__name__, 'message': str(error)}
+
+
+def _answered(request_id, error):
+    """ (object, Exception) -> asyncio.Future
+
+    Return a future already holding the answer that request_id failed with
+    error.
+    """
+    future = asyncio.get_running_loop().create_future()
+    future.set_result({'id': request_id, 'error': _error(error)})
+    return future
+
+
+async def _write_answers(pending, writer):
+    """ (asyncio.Queue, asyncio.StreamWriter) -> NoneType
+
+    Write back the answers of the futures in pending, in order, until None
+    is reached. Once the connection is lost, answers are dropped.
+    """
+    connected = True
+    while True:
+        future = await pending.get()
+        if future is None:
+            break
+        reply = await future
+        if connected:
+            writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+            try:
+                # Waits while the client is slow to read
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+
+def _file_signature(filename):
+    """ (str) -> (int, int)
+
+    Return what changes when the file called filename changes: its
+    modification time and its size, or None if it does not exist.
+    """
+    try:
+        status = os.stat(filename)
+    except OSError:
+        return None
+    return status.st_mtime_ns, status.st_size
+
+
+def main(argv=None):
+    """ (list of str) -> NoneType
+
+    Run the service with the command line arguments argv until it is
+    interrupted.
+    """
+    parser = argparse.ArgumentParser(
+        description='Answer planning queries over one catalog.')
+    parser.add_argument('filename', help='the prerequisite file')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='serve on this Unix socket '
+                        'instead of TCP')
+    parser.add_argument('--cache', action='store_true',
+                        help='load from (and save) a compiled snapshot '
+                        'next to the prerequisite file')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING)
+    parser.add_argument('--reload-interval', type=float,
+                        default=RELOAD_INTERVAL)
+    parser.add_argument('--schedule-cache-size', type=int,
+                        default=SCHEDULE_CACHE_SIZE,
+                        help='schedules remembered in memory (0 for none)')
+    parser.add_argument('--schedule-cache-dir',
+                        help='also save schedules in this directory')
+    args = parser.parse_args(argv)
+
+    if args.schedule_cache_size > 0 or args.schedule_cache_dir:
+        schedule_cache = ScheduleCache(args.schedule_cache_size,
+                                       args.schedule_cache_dir)
+    else:
+        schedule_cache = None
+
+    async def serve():
+        # Nothing else runs yet, so the collector can be paused for the
+        # first load
+        with collector_paused():
+            service = PlanningService(
+                args.filename, args.cache, args.batch_size,
+                args.max_pending, reload_interval=args.reload_interval,
+                schedule_cache=schedule_cache)
+        async with service:
+            if args.unix:
+                server = await service.serve_unix(args.unix)
+            else:
+                server = await service.serve_tcp(args.host, args.port)
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
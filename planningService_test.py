@@ -0,0 +1,237 @@
+""" Unit tests for planningService.py """
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from courseDataStruct import EnrollmentState
+from planningService import PlanningService
+from plannerMain import TermPlanner
+from scheduleCache import ScheduleCache
+
+
+class TestPlanningService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = PlanningService('test3.txt', reload_interval=None)
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        await self.service.close()
+
+    async def test_generate_schedule(self):
+        taken = ['CSC101', 'MAT101']
+        reply = await self.service.request(
+            {'id': 7, 'op': 'generate_schedule', 'selected': ['CSC201'],
+             'taken': taken})
+        expected = TermPlanner('test3.txt').generate_schedule(
+            ['CSC201'], EnrollmentState(taken))
+        self.assertEqual({'id': 7, 'result': expected}, reply)
+
+    async def test_is_valid(self):
+        reply = await self.service.request(
+            {'op': 'is_valid', 'schedule': [['CSC151']],
+             'taken': ['CSC101', 'CSC102']})
+        self.assertTrue(reply['result'])
+        reply = await self.service.request(
+            {'op': 'is_valid', 'schedule': [['CSC151']]})
+        self.assertFalse(reply['result'])
+
+    async def test_missing_prereqs(self):
+        reply = await self.service.request(
+            {'op': 'missing_prereqs', 'course': 'CSC151',
+             'taken': ['CSC101']})
+        self.assertEqual(['CSC102'], reply['result'])
+
+    async def test_get_course(self):
+        reply = await self.service.request(
+            {'op': 'get_course', 'course': 'CSC151', 'taken': ['CSC101',
+                                                            'CSC102']})
+        self.assertEqual({'name': 'CSC151', 'prereqs': ['CSC101', 'CSC102'],
+                          'dependents': ['CSC201'], 'taken': False,
+                          'takeable': True},
+                         dict(reply['result'],
+                              prereqs=sorted(reply['result']['prereqs'])))
+
+    async def test_taken_kept_apart(self):
+        requests = [{'id': i, 'op': 'missing_prereqs', 'course': 'CSC151',
+                     'taken': ['CSC101'] if i % 2 else ['CSC102']}
+                    for i in range(20)]
+        replies = await asyncio.gather(*[self.service.request(request)
+                                         for request in requests])
+        for i, reply in enumerate(replies):
+            self.assertEqual(i, reply['id'])
+            self.assertEqual(['CSC102'] if i % 2 else ['CSC101'],
+                             reply['result'])
+        for course in self.service.planner.catalog:
+            self.assertFalse(course.taken)
+
+    async def test_batches(self):
+        futures = [await self.service.submit({'op': 'get_course',
+                                              'course': 'CSC201'})
+                   for i in range(10)]
+        await asyncio.gather(*futures)
+        self.assertLess(self.service.batches, 10)
+
+    async def test_errors(self):
+        reply = await self.service.request({'id': 1, 'op': 'get_course',
+                                            'course': 'CSC999'})
+        self.assertEqual('NoCourseFound', reply['error']['type'])
+        reply = await self.service.request({'op': 'fly'})
+        self.assertEqual('ValueError', reply['error']['type'])
+        reply = await self.service.request({'op': 'is_valid'})
+        self.assertEqual('missing field: schedule', reply['error']['message'])
+        # Errors fail only their own request
+        reply = await self.service.request({'op': 'get_course',
+                                            'course': 'CSC201'})
+        self.assertEqual('CSC201', reply['result']['name'])
+
+    async def test_fields_checked(self):
+        requests = [
+            ({'op': 'missing_prereqs', 'course': 'CSC151',
+              'taken': 'CSC101'}, 'taken must be'),
+            ({'op': 'generate_schedule', 'selected': 'CSC201'},
+             'selected must be'),
+            ({'op': 'generate_schedule', 'selected': ['CSC201'],
+              'term_size': '2'}, 'term_size must be'),
+            ({'op': 'generate_schedule', 'selected': ['CSC201'],
+              'term_size': True}, 'term_size must be'),
+            ({'op': 'generate_schedule', 'selected': ['CSC201'],
+              'mode': ['greedy']}, 'mode must be'),
+            ({'op': 'is_valid', 'schedule': ['CSC151']}, 'each term'),
+            ({'op': 'is_valid', 'schedule': 'CSC151'}, 'schedule must be'),
+            ({'op': 'get_course', 'course': ['CSC151']}, 'course must be')]
+        for request, message in requests:
+            reply = await self.service.request(request)
+            self.assertEqual('ValueError', reply['error']['type'])
+            self.assertIn(message, reply['error']['message'])
+
+    async def test_schedule_cache(self):
+        reply = await self.service.request({'op': 'schedule_cache_stats'})
+        self.assertIsNone(reply['result'])
+        await self.service.close()
+        self.service = PlanningService('test3.txt', reload_interval=None,
+                                       schedule_cache=ScheduleCache())
+        await self.service.start()
+        request = {'op': 'generate_schedule', 'selected': ['CSC201']}
+        first = await self.service.request(request)
+        self.assertEqual(first, await self.service.request(request))
+        reply = await self.service.request({'op': 'schedule_cache_stats'})
+        self.assertEqual(1, reply['result']['hits'])
+        self.assertEqual(1, reply['result']['misses'])
+
+    async def test_tcp(self):
+        server = await self.service.serve_tcp('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'{"id": 1, "op": "get_course", "course": "MAT151"}\n'
+                     b'not json\n'
+                     b'\n'
+                     b'{"id": 3, "op": "missing_prereqs", '
+                     b'"course": "MAT151"}\n')
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for i in range(3)]
+        writer.close()
+        await writer.wait_closed()
+
+        self.assertEqual([1, None, 3], [reply['id'] for reply in replies])
+        self.assertEqual('MAT151', replies[0]['result']['name'])
+        self.assertEqual('JSONDecodeError', replies[1]['error']['type'])
+        self.assertEqual(4, len(replies[2]['result']))
+
+
+class TestReload(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'catalog.txt')
+        shutil.copy('test3.txt', self.filename)
+        self.service = PlanningService(self.filename, use_cache=False,
+                                       reload_interval=None)
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        await self.service.close()
+        shutil.rmtree(self.directory)
+
+    def _rewrite(self, text):
+        with open(self.filename, 'a') as my_file:
+            my_file.write(text)
+        # Make sure the change is seen even on a coarse clock
+        status = os.stat(self.filename)
+        os.utime(self.filename, ns=(status.st_atime_ns,
+                                    status.st_mtime_ns + 10 ** 9))
+
+    async def test_unchanged(self):
+        self.assertFalse(await self.service.reload_if_changed())
+        self.assertEqual(0, self.service.reloads)
+
+    async def test_reload(self):
+        self._rewrite('\nCSC201 CSC301\n')
+        self.assertTrue(await self.service.reload_if_changed())
+        self.assertEqual(1, self.service.reloads)
+        reply = await self.service.request({'op': 'get_course',
+                                            'course': 'CSC301'})
+        self.assertEqual(['CSC201'], reply['result']['prereqs'])
+
+    async def test_bad_file_kept_out(self):
+        self._rewrite('\nCSC201 CSC101\n')
+        self.assertFalse(await self.service.reload_if_changed())
+        self.assertIn('PrerequisiteError', self.service.reload_error)
+        reply = await self.service.request({'op': 'get_course',
+                                            'course': 'CSC201'})
+        self.assertEqual('CSC201', reply['result']['name'])
+
+    async def test_answered_while_loading(self):
+        loading = threading.Event()
+        loaded = threading.Event()
+        load_planner = self.service._load_planner
+
+        def slow_load():
+            loading.set()
+            loaded.wait(30)
+            return load_planner()
+
+        self.service._load_planner = slow_load
+        self._rewrite('\nCSC201 CSC301\n')
+        reload = asyncio.ensure_future(self.service.reload_if_changed())
+        await asyncio.get_running_loop().run_in_executor(None, loading.wait,
+                                                         10)
+        # The old catalog still answers while the new one loads
+        reply = await asyncio.wait_for(self.service.request(
+            {'op': 'get_course', 'course': 'CSC301'}), 5)
+        self.assertEqual('NoCourseFound', reply['error']['type'])
+        loaded.set()
+        self.assertTrue(await reload)
+        reply = await self.service.request({'op': 'get_course',
+                                            'course': 'CSC301'})
+        self.assertEqual(['CSC201'], reply['result']['prereqs'])
+
+    async def test_apply_delta(self):
+        delta = os.path.join(self.directory, 'delta.txt')
+        with open(delta, 'w') as delta_file:
+            delta_file.write('+ CSC201 CSC301\n')
+        version = await self.service.apply_delta(delta)
+        self.assertEqual(self.service.planner.catalog.version, version)
+        reply = await self.service.request({'op': 'missing_prereqs',
+                                            'course': 'CSC301'})
+        self.assertIn('CSC201', reply['result'])
+
+    async def test_watch(self):
+        await self.service.close()
+        self.service = PlanningService(self.filename, use_cache=False,
+                                       reload_interval=0.01)
+        await self.service.start()
+        self._rewrite('\nCSC201 CSC301\n')
+        for i in range(200):
+            if self.service.reloads:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(1, self.service.reloads)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,220 @@
+"""Cached schedules.
+
+This module remembers the schedules TermPlanner.generate_schedule returns,
+so that students who select the same courses, having taken the same ones,
+get their schedule without it being planned again. Schedules are kept in
+memory, for the courses asked about most recently, and optionally in a
+directory on disk, where they outlive the process.
+
+A schedule is found by the content of the catalog it was planned over (see
+catalog_hash), the selected courses, the courses taken, the schedule mode
+and the term size. A schedule planned over a catalog that has changed
+since is never returned, since the content of the catalog is part of what
+it is found by.
+
+ScheduleCache: schedules remembered in memory and on disk.
+schedule_key: what a schedule is found by.
+catalog_hash: a digest of the courses and prerequisites of a catalog.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Greatest number of schedules remembered in memory
+SCHEDULE_CACHE_SIZE = 1024
+
+# Added to the digest of a key to name the file of a schedule on disk
+_FILE_SUFFIX = '.json'
+
+
+class ScheduleCache:
+    """Schedules remembered in memory and, optionally, on disk.
+
+    At most size schedules are kept in memory; the one used least recently
+    is forgotten first. With a directory, every schedule is also saved
+    there, and a schedule not in memory is looked for there before it is
+    planned again.
+
+    Attributes:
+    - size (int): the greatest number of schedules kept in memory
+    - directory (str): where schedules are saved, or None
+    - hits (int): the number of schedules found in memory
+    - disk_hits (int): the number of schedules found on disk only
+    - misses (int): the number of schedules found in neither
+    - evictions (int): the number of schedules forgotten from memory
+    """
+
+    def __init__(self, size=SCHEDULE_CACHE_SIZE, directory=None):
+        """ (ScheduleCache, int, str) -> NoneType
+
+        Create a new cache of at most size schedules in memory, also
+        saved in the directory called directory if it is given. The
+        directory is created if needed.
+        """
+        self.size = size
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # {key: schedule}
+        self._entries = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        """ (ScheduleCache) -> int
+
+        Return the number of schedules kept in memory.
+        """
+        return len(self._entries)
+
+    def get(self, key):
+        """ (ScheduleCache, tuple) -> list of (list of str)
+
+        Return a copy of the schedule remembered for key, as made by
+        schedule_key, or None if it is not remembered.
+        """
+        schedule = self._entries.get(key)
+        if schedule is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [list(term) for term in schedule]
+
+        schedule = self._read(key)
+        if schedule is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, schedule)
+        return [list(term) for term in schedule]
+
+    def put(self, key, schedule):
+        """ (ScheduleCache, tuple, list of (list of str)) -> NoneType
+
+        Remember that schedule is the schedule for key, as made by
+        schedule_key.
+        """
+        schedule = [list(term) for term in schedule]
+        self._remember(key, schedule)
+        self._write(key, schedule)
+
+    def stats(self):
+        """ (ScheduleCache) -> dict of {str: int}
+
+        Return the hits, disk hits, misses and evictions of this cache, and
+        the number of schedules it keeps in memory.
+        """
+        return {'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._entries)}
+
+    def clear(self):
+        """ (ScheduleCache) -> NoneType
+
+        Forget every schedule, in memory and on disk. The statistics are
+        kept.
+        """
+        self._entries.clear()
+        if self.directory is not None:
+            for filename in os.listdir(self.directory):
+                if filename.endswith(_FILE_SUFFIX):
+                    os.remove(os.path.join(self.directory, filename))
+
+    def _remember(self, key, schedule):
+        """ (ScheduleCache, tuple, list of (list of str)) -> NoneType
+
+        Keep schedule in memory for key, forgetting the least recently
+        used schedule if there are too many.
+        """
+        self._entries[key] = schedule
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        """ (ScheduleCache, tuple) -> str
+
+        Return the name of the file the schedule for key is saved in.
+        """
+        digest = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + _FILE_SUFFIX)
+
+    def _read(self, key):
+        """ (ScheduleCache, tuple) -> list of (list of str)
+
+        Return the schedule saved for key, or None if there is none or it
+        cannot be read.
+        """
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key)) as schedule_file:
+                saved = json.load(schedule_file)
+        except (OSError, ValueError):
+            return None
+        # The whole key is saved, in case two keys share a digest
+        if saved.get('key') != json.loads(json.dumps(key)):
+            return None
+        return saved.get('schedule')
+
+    def _write(self, key, schedule):
+        """ (ScheduleCache, tuple, list of (list of str)) -> NoneType
+
+        Save schedule for key, if the cache has a directory. A schedule
+        that cannot be saved is only kept in memory.
+        """
+        if self.directory is None:
+            return
+        target = self._path(key)
+        # Write to a new file first, so readers never see half of one
+        partial = '%s.%d.tmp' % (target, os.getpid())
+        try:
+            with open(partial, 'w') as schedule_file:
+                json.dump({'key': key, 'schedule': schedule}, schedule_file)
+            os.replace(partial, target)
+        except OSError:
+            pass
+
+
+def schedule_key(content, selected_courses, taken, mode, term_size,
+                 ordered=True):
+    """ (str, list of str, iterable of str, str, int, bool) -> tuple
+
+    Return the key of the schedule of selected_courses over a catalog with
+    the digest content, for a student who has taken the courses named in
+    taken. Selected courses named more than once only count once; if
+    ordered is False, the order they are selected in does not count
+    either, since the schedule mode does not depend on it.
+    """
+    selected = []
+    seen = set()
+    for name in selected_courses:
+        if name not in seen:
+            seen.add(name)
+            selected.append(name)
+    if not ordered:
+        selected.sort()
+    return (content, tuple(selected), tuple(sorted(taken)), mode, term_size)
+
+
+def catalog_hash(catalog):
+    """ (CourseCatalog) -> str
+
+    Return the SHA-256 digest of the courses of catalog, which may also be
+    a CompactCatalog: each course, in order, with its prerequisites in
+    order, and the root. Catalogs with the same digest give the same
+    schedules.
+    """
+    digest = hashlib.sha256()
+    for course in catalog:
+        names = [course.name]
+        for pre_course in course.prereqs:
+            names.append(pre_course.name)
+        digest.update((' '.join(names) + '\n').encode('utf-8'))
+    if catalog.root is not None:
+        digest.update(('root ' + catalog.root.name).encode('utf-8'))
+    return digest.hexdigest()
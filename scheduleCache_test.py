@@ -0,0 +1,172 @@
+""" Unit tests for scheduleCache.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+from courseDataStruct import EnrollmentState
+from plannerMain import TermPlanner, CRITICAL_PATH, NoCourseFound
+from plannerMain import parse_catalog
+from plannerMetrics import recording
+from scheduleCache import ScheduleCache, catalog_hash, schedule_key
+
+
+class TestScheduleCache(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = ScheduleCache()
+        key = schedule_key('abc', ['CSC201'], [], 'greedy', 5)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, [['CSC101'], ['CSC201']])
+        schedule = cache.get(key)
+        self.assertEqual([['CSC101'], ['CSC201']], schedule)
+        # Changing a returned schedule does not change the cache
+        schedule[0].append('MAT101')
+        self.assertEqual([['CSC101'], ['CSC201']], cache.get(key))
+        self.assertEqual({'hits': 2, 'disk_hits': 0, 'misses': 1,
+                          'evictions': 0, 'size': 1}, cache.stats())
+
+    def test_least_recent_forgotten(self):
+        cache = ScheduleCache(size=2)
+        keys = [schedule_key('abc', [name], [], 'greedy', 5)
+                for name in ['A', 'B', 'C']]
+        cache.put(keys[0], [['A']])
+        cache.put(keys[1], [['B']])
+        cache.get(keys[0])
+        cache.put(keys[2], [['C']])
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual([['A']], cache.get(keys[0]))
+        self.assertEqual(1, cache.evictions)
+
+    def test_key(self):
+        self.assertEqual(schedule_key('abc', ['A', 'B', 'A'], ['Y', 'X'],
+                                      'greedy', 5),
+                         schedule_key('abc', ['A', 'B'], {'X', 'Y'},
+                                      'greedy', 5))
+        self.assertNotEqual(schedule_key('abc', ['A', 'B'], [], 'greedy', 5),
+                            schedule_key('abc', ['B', 'A'], [], 'greedy', 5))
+        self.assertEqual(schedule_key('abc', ['A', 'B'], [], 'greedy', 5,
+                                      ordered=False),
+                         schedule_key('abc', ['B', 'A'], [], 'greedy', 5,
+                                      ordered=False))
+
+    def test_catalog_hash(self):
+        self.assertEqual(catalog_hash(parse_catalog('test3.txt')),
+                         catalog_hash(parse_catalog('test3.txt')))
+        self.assertNotEqual(catalog_hash(parse_catalog('test3.txt')),
+                            catalog_hash(parse_catalog('test2.txt')))
+        catalog = parse_catalog('test3.txt')
+        before = catalog_hash(catalog)
+        catalog.add_edge('CSC201', 'CSC301')
+        self.assertNotEqual(before, catalog_hash(catalog))
+
+
+class TestDiskTier(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.key = schedule_key('abc', ['CSC201'], [], 'greedy', 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_survives_new_cache(self):
+        ScheduleCache(directory=self.folder).put(self.key, [['CSC201']])
+        cache = ScheduleCache(directory=self.folder)
+        self.assertEqual([['CSC201']], cache.get(self.key))
+        self.assertEqual([['CSC201']], cache.get(self.key))
+        self.assertEqual(1, cache.disk_hits)
+        self.assertEqual(1, cache.hits)
+
+    def test_damaged_file_ignored(self):
+        cache = ScheduleCache(directory=self.folder)
+        cache.put(self.key, [['CSC201']])
+        for filename in os.listdir(self.folder):
+            with open(os.path.join(self.folder, filename), 'w') as my_file:
+                my_file.write('{')
+        self.assertIsNone(ScheduleCache(directory=self.folder).get(self.key))
+
+    def test_clear(self):
+        cache = ScheduleCache(directory=self.folder)
+        cache.put(self.key, [['CSC201']])
+        cache.clear()
+        self.assertEqual([], os.listdir(self.folder))
+        self.assertIsNone(cache.get(self.key))
+
+
+class TestPlannerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ScheduleCache()
+        self.planner = TermPlanner('test3.txt', schedule_cache=self.cache)
+        self.expected = TermPlanner('test3.txt')
+
+    def test_same_schedule(self):
+        state = EnrollmentState(['CSC101'])
+        for i in range(2):
+            self.assertEqual(
+                self.expected.generate_schedule(['CSC201'], state),
+                self.planner.generate_schedule(['CSC201'], state))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_taken_in_key(self):
+        self.planner.generate_schedule(['CSC201'], EnrollmentState())
+        self.assertEqual(
+            self.expected.generate_schedule(['CSC201'],
+                                            EnrollmentState(['MAT151'])),
+            self.planner.generate_schedule(['CSC201'],
+                                           EnrollmentState(['MAT151'])))
+        self.assertEqual(0, self.cache.hits)
+
+    def test_flags(self):
+        self.planner.generate_schedule(['CSC201'])
+        self.planner.get_course('CSC101').take()
+        self.expected.get_course('CSC101').take()
+        self.assertEqual(self.expected.generate_schedule(['CSC201']),
+                         self.planner.generate_schedule(['CSC201']))
+        self.assertEqual(0, self.cache.hits)
+
+    def test_critical_path_order(self):
+        self.planner.generate_schedule(['CSC151', 'MAT151'],
+                                       mode=CRITICAL_PATH)
+        self.assertEqual(
+            self.expected.generate_schedule(['MAT151', 'CSC151'],
+                                            mode=CRITICAL_PATH),
+            self.planner.generate_schedule(['MAT151', 'CSC151'],
+                                           mode=CRITICAL_PATH))
+        self.assertEqual(1, self.cache.hits)
+
+    def test_catalog_change(self):
+        self.planner.generate_schedule(['CSC201'])
+        self.planner.catalog.add_edge('CSC201', 'CSC301')
+        self.expected.catalog.add_edge('CSC201', 'CSC301')
+        self.assertEqual(self.expected.generate_schedule(['CSC301']),
+                         self.planner.generate_schedule(['CSC301']))
+        self.planner.generate_schedule(['CSC201'])
+        self.assertEqual(0, self.cache.hits)
+
+    def test_shared_between_planners(self):
+        self.planner.generate_schedule(['CSC201'])
+        other = TermPlanner('test3.txt', schedule_cache=self.cache)
+        other.generate_schedule(['CSC201'])
+        self.assertEqual(1, self.cache.hits)
+
+    def test_unknown_course(self):
+        for i in range(2):
+            with self.assertRaises(NoCourseFound):
+                self.planner.generate_schedule(['CSC999'])
+        self.assertEqual(0, len(self.cache))
+
+    def test_metrics(self):
+        with recording() as recorder:
+            for i in range(3):
+                self.planner.generate_schedule(['CSC201'])
+        counters = recorder.report()['counters']
+        self.assertEqual(2, counters['schedule_cache.hits'])
+        self.assertEqual(1, counters['schedule_cache.misses'])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,391 @@
+"""Term scheduling engine.
+
+This module contains the engine that TermPlanner uses to generate
+schedules. Instead of searching the prerequisite tree again for every term,
+it counts how many prerequisites of each course are still not taken and
+keeps the courses that can be taken in a queue, so taking a term only
+updates the courses that depend on it.
+
+GreedyScheduler: plans terms of up to five courses.
+CriticalPathScheduler: plans terms longest prerequisite chain first.
+CourseGraph: how the scheduler walks a tree of Course objects.
+"""
+
+import heapq
+
+# Greatest number of courses in one term
+TERM_SIZE = 5
+
+
+class GreedyScheduler:
+    """A scheduler for the courses in a prerequisite tree.
+
+    Terms are filled the same way as TermPlanner.fill_term: first with the
+    courses that must be taken to reach the selected courses, then with
+    any other takeable course in the tree.
+
+    The courses themselves are never taken; the scheduler only reads which
+    ones are taken when a schedule is started.
+
+    Courses are reached through a graph, which by default walks Course
+    objects. Any object with the methods of CourseGraph can be used
+    instead, with its own kind of courses.
+
+    A catalog with several top-most courses is scheduled as if they were
+    all prerequisites of one more course above them, in the order given.
+
+    Attributes:
+    - root (object): tree containing all available courses
+    - roots (list): the top-most course of every tree to schedule from
+    - graph (CourseGraph): how to walk the tree
+    - term_size (int): the greatest number of courses in one term
+    """
+
+    def __init__(self, root, graph=None, roots=None, term_size=TERM_SIZE):
+        """ (GreedyScheduler, object, CourseGraph, list, int) -> NoneType
+
+        Create a new scheduler for the courses in the trees under roots
+        (by default, only the tree under root), with up to term_size
+        courses in each term.
+        Raise ValueError if term_size is less than 1.
+        """
+        if term_size < 1:
+            raise ValueError('a term must hold at least one course')
+        self.root = root
+        self.term_size = term_size
+        if roots is None:
+            if root is None:
+                roots = []
+            else:
+                roots = [root]
+        self.roots = roots
+        if graph is None:
+            self.graph = COURSE_GRAPH
+        else:
+            self.graph = graph
+
+        self._rank = _rank_courses(roots, self.graph)
+
+    def schedule(self, selected_courses, must_courses, state=None):
+        """ (GreedyScheduler, list of str, list of str, EnrollmentState)
+            -> list of (list of str)
+
+        Return a schedule containing the courses in selected_courses, for a
+        student who has taken the courses in state (by default, the courses
+        marked taken).
+        Courses in must_courses are taken first, in that order, as soon as
+        they are takeable.
+        """
+        return list(self.iter_schedule(selected_courses, must_courses, state))
+
+    def iter_schedule(self, selected_courses, must_courses, state=None):
+        """ (GreedyScheduler, list of str, list of str, EnrollmentState)
+            -> iterator of (list of str)
+
+        Yield the terms of the schedule returned by schedule, one at a
+        time, as each one is planned. Nothing is planned past the last
+        term asked for, and nothing needs to be undone when the iteration
+        is stopped early.
+        """
+        rank = self._rank
+        graph = self.graph
+
+        # Position of each course in must_courses
+        must_position = {}
+        for position, name in enumerate(must_courses):
+            if name not in must_position:
+                must_position[name] = position
+
+        # Number of prerequisites of each course that are not taken
+        remaining = {}
+        taken = set()
+        for course in rank:
+            if graph.taken_in(course, state):
+                taken.add(course)
+            remaining[course] = 0
+            for pre_course in graph.prereqs_of(course):
+                if not graph.taken_in(pre_course, state):
+                    remaining[course] += 1
+
+        # Courses that can be taken, by fill order and by must order
+        ready = []
+        ready_must = []
+        for course in rank:
+            if remaining[course] == 0 and course not in taken:
+                self._push_ready(course, ready, ready_must, must_position)
+
+        not_scheduled = set(selected_courses)
+        for course in taken:
+            not_scheduled.discard(graph.name_of(course))
+
+        while not_scheduled:
+            term = self._fill_term(ready, ready_must, taken)
+            if term == []:
+                # Nothing else can be taken
+                break
+
+            for course in term:
+                taken.add(course)
+                not_scheduled.discard(graph.name_of(course))
+            # Only the dependents of the new courses can become takeable
+            for course in term:
+                for dependent in graph.dependents_of(course):
+                    if dependent in remaining and dependent not in taken:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            self._push_ready(dependent, ready, ready_must,
+                                             must_position)
+
+            yield [graph.name_of(course) for course in term]
+
+    def _push_ready(self, course, ready, ready_must, must_position):
+        """ (GreedyScheduler, object, list, list, dict of {str: int})
+            -> NoneType
+
+        Add course to the queues of takeable courses.
+        """
+        # Ranks are all different, so courses are never compared
+        rank = self._rank[course]
+        heapq.heappush(ready, (rank, course))
+        position = must_position.get(self.graph.name_of(course))
+        if position is not None:
+            heapq.heappush(ready_must, (position, rank, course))
+
+    def _fill_term(self, ready, ready_must, taken):
+        """ (GreedyScheduler, list, list, set) -> list
+
+        Return the courses of the next term, removing them from the queues.
+        Courses in taken are dropped from the queues as they are reached.
+        """
+        term = []
+        in_term = set()
+
+        # Courses that must be taken come first
+        while ready_must and len(term) < self.term_size:
+            course = heapq.heappop(ready_must)[-1]
+            if course not in taken:
+                term.append(course)
+                in_term.add(course)
+
+        # Fill up with more takeable courses
+        while ready and len(term) < self.term_size:
+            course = heapq.heappop(ready)[-1]
+            if course not in taken and course not in in_term:
+                term.append(course)
+                in_term.add(course)
+
+        return term
+
+
+class CriticalPathScheduler:
+    """A scheduler that starts the longest prerequisite chains first.
+
+    This is list scheduling by critical path (as in Hu's and
+    Coffman-Graham's algorithms): each term is filled with the takeable
+    courses that have the longest chain of courses still to take after
+    them. Courses needed for the selected courses come first, ordered by
+    their longest chain up to a selected course; any room left is filled
+    with other takeable courses, ordered by their longest chain in the
+    whole catalog, as GreedyScheduler fills terms.
+
+    The longest chain above every course in the catalog is computed once,
+    when the scheduler is created.
+
+    Attributes:
+    - roots (list): the top-most course of every tree to schedule from
+    - graph (CourseGraph): how to walk the trees
+    - term_size (int): the greatest number of courses in one term
+    """
+
+    def __init__(self, roots, graph=None, term_size=TERM_SIZE):
+        """ (CriticalPathScheduler, list, CourseGraph, int) -> NoneType
+
+        Create a new scheduler for the courses in the trees under roots,
+        with up to term_size courses in each term.
+        Raise ValueError if term_size is less than 1.
+        """
+        if term_size < 1:
+            raise ValueError('a term must hold at least one course')
+        self.roots = roots
+        self.term_size = term_size
+        if graph is None:
+            self.graph = COURSE_GRAPH
+        else:
+            self.graph = graph
+
+        # Prerequisites come before the courses that need them
+        self._rank = _rank_courses(roots, self.graph)
+        self._order = sorted(self._rank, key=self._rank.__getitem__)
+        self._height = self._chain_lengths(self._order, self._rank)
+        self._by_name = {}
+        for course in self._order:
+            self._by_name[self.graph.name_of(course)] = course
+
+    def schedule(self, selected_courses, must_courses, state=None):
+        """ (CriticalPathScheduler, list of str, list of str,
+             EnrollmentState) -> list of (list of str)
+
+        Return a schedule containing the courses in selected_courses, for a
+        student who has taken the courses in state (by default, the courses
+        marked taken). The courses named in must_courses, and the selected
+        courses, are the ones needed for the selected courses.
+        """
+        return list(self.iter_schedule(selected_courses, must_courses, state))
+
+    def iter_schedule(self, selected_courses, must_courses, state=None):
+        """ (CriticalPathScheduler, list of str, list of str,
+             EnrollmentState) -> iterator of (list of str)
+
+        Yield the terms of the schedule returned by schedule, one at a
+        time, as each one is planned.
+        """
+        graph = self.graph
+        rank = self._rank
+        height = self._height
+
+        needed = set()
+        for name in list(selected_courses) + list(must_courses):
+            course = self._by_name.get(name)
+            if course is not None:
+                needed.add(course)
+        # Longest chain of needed courses above each needed course
+        needed_height = self._chain_lengths(
+            [course for course in self._order if course in needed], needed)
+
+        remaining = {}
+        taken = set()
+        for course in self._order:
+            if graph.taken_in(course, state):
+                taken.add(course)
+            remaining[course] = 0
+            for pre_course in graph.prereqs_of(course):
+                if not graph.taken_in(pre_course, state):
+                    remaining[course] += 1
+
+        # Takeable courses, longest chain first, then in fill order
+        ready_needed = []
+        ready_other = []
+
+        def push(course):
+            if course in needed_height:
+                heapq.heappush(ready_needed, (-needed_height[course],
+                                              -height[course], rank[course],
+                                              course))
+            else:
+                heapq.heappush(ready_other, (-height[course], rank[course],
+                                             course))
+
+        for course in self._order:
+            if remaining[course] == 0 and course not in taken:
+                push(course)
+
+        not_scheduled = set(selected_courses)
+        for course in taken:
+            not_scheduled.discard(graph.name_of(course))
+
+        while not_scheduled:
+            term = []
+            for ready in (ready_needed, ready_other):
+                while ready and len(term) < self.term_size:
+                    course = heapq.heappop(ready)[-1]
+                    if course not in taken:
+                        term.append(course)
+                        taken.add(course)
+            if term == []:
+                # Nothing else can be taken
+                break
+
+            for course in term:
+                not_scheduled.discard(graph.name_of(course))
+            for course in term:
+                for dependent in graph.dependents_of(course):
+                    if dependent in remaining and dependent not in taken:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            push(dependent)
+
+            yield [graph.name_of(course) for course in term]
+
+    def _chain_lengths(self, order, courses):
+        """ (CriticalPathScheduler, list, collection) -> dict of {object: int}
+
+        Return the number of courses in the longest chain of dependents
+        that starts at each course of order and stays in courses. order
+        lists courses before the courses that depend on them.
+        """
+        length = {}
+        for course in reversed(order):
+            longest = 0
+            for dependent in self.graph.dependents_of(course):
+                if dependent in courses and length[dependent] > longest:
+                    longest = length[dependent]
+            length[course] = longest + 1
+        return length
+
+
+class CourseGraph:
+    """How the scheduler walks a tree of Course objects."""
+
+    def prereqs_of(self, course):
+        """ (CourseGraph, Course) -> list of Course
+
+        Return the prerequisites of course.
+        """
+        return course.prereqs
+
+    def dependents_of(self, course):
+        """ (CourseGraph, Course) -> list of Course
+
+        Return the courses that have course as a prerequisite.
+        """
+        return course.dependents
+
+    def name_of(self, course):
+        """ (CourseGraph, Course) -> str
+
+        Return the name of course.
+        """
+        return course.name
+
+    def taken_in(self, course, state):
+        """ (CourseGraph, Course, EnrollmentState) -> bool
+
+        Return True if course is taken in state (or, if state is None,
+        marked taken).
+        """
+        return course.is_taken(state)
+
+
+COURSE_GRAPH = CourseGraph()
+
+
+def _rank_courses(roots, graph):
+    """ (list, CourseGraph) -> dict of {object: int}
+
+    Return the fill order of every course in the trees under roots, as if
+    they were the prerequisites of one course above them.
+
+    TermPlanner.fill_term takes courses from the end of a walk of the tree,
+    so a course comes before another when its last occurrence in that walk
+    is later. Walking prerequisites last to first and numbering courses as
+    they are finished gives the same order while visiting each course once.
+    """
+    rank = {}
+    seen = set()
+    # The course above the roots is None, and is not ranked
+    stack = [(None, reversed(roots))]
+
+    while stack:
+        course, pending = stack[-1]
+        for pre_course in pending:
+            if pre_course not in seen:
+                seen.add(pre_course)
+                stack.append((pre_course,
+                              reversed(graph.prereqs_of(pre_course))))
+                break
+        else:
+            stack.pop()
+            if course is not None:
+                rank[course] = len(rank)
+
+    return rank
@@ -0,0 +1,120 @@
+""" Unit tests for scheduleEngine.py """
+
+import unittest
+from scheduleEngine import CriticalPathScheduler, GreedyScheduler
+from courseDataStruct import Course
+
+
+class TestGreedyScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.leaves = [Course('L%d' % i) for i in range(7)]
+        self.mid = Course('MID', self.leaves[:3])
+        self.top = Course('TOP', [self.mid] + self.leaves[3:])
+        self.scheduler = GreedyScheduler(self.top)
+
+    def test_empty_selection(self):
+        self.assertEqual([], self.scheduler.schedule([], []))
+
+    def test_must_courses_first(self):
+        schedule = self.scheduler.schedule(['MID'], ['L2', 'L0', 'L1'])
+        self.assertEqual(['L2', 'L0', 'L1'], schedule[0][:3])
+        self.assertEqual(5, len(schedule[0]))
+        self.assertIn('MID', schedule[1])
+
+    def test_terms_hold_five_courses(self):
+        schedule = self.scheduler.schedule(['TOP'], [])
+        self.assertEqual(5, len(schedule[0]))
+        self.assertEqual(9, sum(len(term) for term in schedule))
+        self.assertEqual(['TOP'], schedule[-1])
+
+    def test_empty_terms(self):
+        with self.assertRaises(ValueError):
+            GreedyScheduler(self.top, term_size=0)
+
+    def test_courses_not_taken(self):
+        self.scheduler.schedule(['TOP'], [])
+        for course in self.leaves + [self.mid, self.top]:
+            self.assertFalse(course.taken)
+
+    def test_taken_courses_skipped(self):
+        for course in self.leaves:
+            course.taken = True
+        self.assertEqual([['MID'], ['TOP']],
+                         self.scheduler.schedule(['TOP'], []))
+
+    def test_iter_schedule(self):
+        terms = self.scheduler.iter_schedule(['TOP'], [])
+        self.assertEqual(self.scheduler.schedule(['TOP'], [])[0],
+                         next(terms))
+        terms.close()
+        for course in self.leaves + [self.mid, self.top]:
+            self.assertFalse(course.taken)
+
+    def test_several_roots(self):
+        other = Course('OTHER', [Course('O0')])
+        scheduler = GreedyScheduler(self.top, roots=[self.top, other])
+        schedule = scheduler.schedule(['TOP', 'OTHER'], [])
+        self.assertEqual(11, sum(len(term) for term in schedule))
+        # Without the other root, it cannot be scheduled
+        self.assertEqual(9, sum(len(term) for term in
+                                self.scheduler.schedule(['OTHER'], [])))
+
+    def test_long_chain(self):
+        chain = [Course('C0')]
+        for i in range(1, 5000):
+            chain.append(Course('C%d' % i, [chain[-1]]))
+        schedule = GreedyScheduler(chain[-1]).schedule(['C4999'], [])
+        self.assertEqual(5000, len(schedule))
+        self.assertEqual(['C4999'], schedule[-1])
+
+
+
+class TestCriticalPathScheduler(unittest.TestCase):
+
+    def setUp(self):
+        # A chain of four courses and four courses with no prerequisites,
+        # all needed for TOP
+        self.chain = [Course('Z0')]
+        for i in range(1, 4):
+            self.chain.append(Course('Z%d' % i, [self.chain[-1]]))
+        self.leaves = [Course('L%d' % i) for i in range(4)]
+        self.top = Course('TOP', self.leaves + [self.chain[-1]])
+        self.must = ['L0', 'L1', 'L2', 'L3', 'Z0', 'Z1', 'Z2', 'Z3']
+
+    def test_chain_started_first(self):
+        schedule = CriticalPathScheduler([self.top], term_size=2).schedule(
+            ['TOP'], self.must)
+        self.assertEqual(5, len(schedule))
+        for i in range(4):
+            self.assertIn('Z%d' % i, schedule[i])
+        # Filling needed courses in must order takes longer
+        self.assertEqual(7, len(GreedyScheduler(
+            self.top, term_size=2).schedule(['TOP'], self.must)))
+
+    def test_term_size(self):
+        for term_size in [1, 3, 9]:
+            schedule = CriticalPathScheduler(
+                [self.top], term_size=term_size).schedule(['TOP'], self.must)
+            self.assertTrue(all(len(term) <= term_size for term in schedule))
+            self.assertEqual(9, sum(len(term) for term in schedule))
+        with self.assertRaises(ValueError):
+            CriticalPathScheduler([self.top], term_size=0)
+
+    def test_needed_courses_first(self):
+        other = Course('OTHER', [Course('O0', [Course('O1')])])
+        scheduler = CriticalPathScheduler([self.top, other])
+        schedule = scheduler.schedule(['Z1'], ['Z0'])
+        self.assertEqual('Z0', schedule[0][0])
+        self.assertEqual(['Z1'], schedule[1][:1])
+
+    def test_taken_courses_skipped(self):
+        for course in self.chain:
+            course.taken = True
+        schedule = CriticalPathScheduler([self.top]).schedule(
+            ['TOP'], ['L0', 'L1', 'L2', 'L3'])
+        self.assertEqual([['L3', 'L2', 'L1', 'L0'], ['TOP']], schedule)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,123 @@
+"""Batch schedule validation.
+
+This module checks many schedules against one catalog at once, the same
+way as TermPlanner.is_valid checks one. The catalog is converted once to
+integer course IDs and tuples of prerequisite IDs, and each schedule is
+then checked with array lookups only, without touching any Course object.
+
+ScheduleValidator: checks schedules against the courses of a catalog.
+"""
+
+from array import array
+
+# Greatest mark that fits in every array('L')
+_LAST_MARK = 2 ** 32 - 1
+
+
+class ScheduleValidator:
+    """A checker of schedules for the courses of one catalog.
+
+    Which courses are taken while checking a schedule is kept in one array
+    of marks shared by all schedules: a course is taken in the current
+    schedule if its mark is the number of that schedule. Starting the next
+    schedule only takes a new number, so no per-schedule set is built or
+    cleared.
+
+    The validator is a snapshot: prerequisites added to the catalog later
+    are not seen.
+
+    Attributes:
+    - names (list of str): the name of each course, by ID
+    - prereqs (list of tuple of int): the prerequisites of each course, by ID
+    """
+
+    def __init__(self, catalog):
+        """ (ScheduleValidator, CourseCatalog) -> NoneType
+
+        Create a new validator for the courses of catalog, which may also
+        be a CompactCatalog.
+        """
+        self.names = []
+        self._ids = {}
+        for course in catalog:
+            self._ids[course.name] = len(self.names)
+            self.names.append(course.name)
+
+        ids = self._ids
+        self.prereqs = [tuple(ids[pre_course.name]
+                              for pre_course in course.prereqs)
+                        for course in catalog]
+
+        self._marks = array('L', [0]) * len(self.names)
+        self._mark = 0
+
+    def id_of(self, course_name):
+        """ (ScheduleValidator, str) -> int
+
+        Return the ID of the course called course_name, or -1 if there is
+        no such course.
+        """
+        return self._ids.get(course_name, -1)
+
+    def validate(self, schedule, taken=()):
+        """ (ScheduleValidator, list of (list of str), iterable of str)
+            -> (bool, int, int)
+
+        Check schedule for a student who has taken the courses named in
+        taken, as TermPlanner.is_valid does: every course must exist, must
+        not be taken already, and must have all of its prerequisites taken
+        in an earlier term or earlier in the same term.
+
+        Return (True, None, None) if schedule is valid. Otherwise return
+        False with the index of the first failing term and the index of
+        the failing course in that term.
+        """
+        if self._mark == _LAST_MARK:
+            # Start the marks again before they overflow
+            self._marks = array('L', [0]) * len(self.names)
+            self._mark = 0
+        self._mark += 1
+        mark = self._mark
+        marks = self._marks
+        ids = self._ids
+
+        for name in taken:
+            course_id = ids.get(name)
+            if course_id is not None:
+                marks[course_id] = mark
+
+        prereqs = self.prereqs
+        for term_index, term in enumerate(schedule):
+            for course_index, name in enumerate(term):
+                course_id = ids.get(name)
+                if course_id is None or marks[course_id] == mark:
+                    return False, term_index, course_index
+                for prereq_id in prereqs[course_id]:
+                    if marks[prereq_id] != mark:
+                        return False, term_index, course_index
+                marks[course_id] = mark
+
+        return True, None, None
+
+    def validate_all(self, schedules, taken=()):
+        """ (ScheduleValidator, list of (list of (list of str)),
+             iterable of str) -> list of (bool, int, int)
+
+        Check each of schedules for a student who has taken the courses
+        named in taken, and return the result of validate for each one,
+        in the same order.
+        """
+        taken = list(taken)
+        return [self.validate(schedule, taken) for schedule in schedules]
+
+    def validate_plans(self, plans):
+        """ (ScheduleValidator,
+             list of (list of (list of str), EnrollmentState))
+            -> list of (bool, int, int)
+
+        Check each (schedule, state) pair of plans for a student who has
+        taken the courses in state, and return the result of validate for
+        each one, in the same order.
+        """
+        return [self.validate(schedule, state.taken)
+                for schedule, state in plans]
@@ -0,0 +1,81 @@
+""" Unit tests for scheduleValidator.py """
+
+import random
+import unittest
+from compactCatalog import compact_catalog
+from courseDataStruct import EnrollmentState
+from plannerMain import TermPlanner, parse_catalog
+from scheduleValidator import ScheduleValidator
+
+
+class TestValidate(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = ScheduleValidator(parse_catalog('test5.txt'))
+
+    def test_valid(self):
+        self.assertEqual((True, None, None), self.validator.validate(
+            [['UT100', 'UT101', 'UT199'], ['UT200', 'UT250'], ['UT300']]))
+
+    def test_first_failure(self):
+        self.assertEqual((False, 2, 1), self.validator.validate(
+            [['UT100', 'UT101'], ['UT199'], ['UT250', 'UT300', 'UT200']]))
+
+    def test_same_term(self):
+        # A course taken earlier in the same term counts
+        self.assertEqual((True, None, None), self.validator.validate(
+            [['UT100', 'UT101', 'UT199', 'UT200']]))
+
+    def test_unknown_course(self):
+        self.assertEqual((False, 0, 1), self.validator.validate(
+            [['UT100', 'PHY101']]))
+        self.assertEqual(-1, self.validator.id_of('PHY101'))
+
+    def test_taken_again(self):
+        self.assertEqual((False, 1, 0), self.validator.validate(
+            [['UT100'], ['UT100']]))
+        self.assertEqual((False, 0, 0), self.validator.validate(
+            [['UT100']], ['UT100']))
+
+    def test_taken(self):
+        self.assertEqual((True, None, None), self.validator.validate(
+            [['UT200']], ['UT100', 'UT101', 'UT199', 'PHY101']))
+
+    def test_schedules_independent(self):
+        self.assertEqual([(True, None, None), (False, 0, 0)],
+                         self.validator.validate_all(
+                             [[['UT100', 'UT101', 'UT199']], [['UT200']]]))
+
+    def test_plans(self):
+        done = EnrollmentState(['UT100', 'UT101', 'UT199'])
+        self.assertEqual([(True, None, None), (False, 0, 0)],
+                         self.validator.validate_plans(
+                             [([['UT200']], done),
+                              ([['UT200']], EnrollmentState())]))
+
+    def test_compact(self):
+        validator = ScheduleValidator(compact_catalog(
+            parse_catalog('test5.txt')))
+        self.assertEqual((False, 1, 0), validator.validate(
+            [['UT100'], ['UT200']]))
+
+
+class TestSameAsIsValid(unittest.TestCase):
+
+    def test_random_schedules(self):
+        planner = TermPlanner('test3.txt')
+        names = [course.name for course in planner.catalog]
+        validator = ScheduleValidator(planner.catalog)
+        generator = random.Random(0)
+        for i in range(500):
+            order = names[:]
+            generator.shuffle(order)
+            schedule = [order[start:start + 3] for start in range(0, 9, 3)]
+            taken = generator.sample(names, 2)
+            self.assertEqual(
+                planner.is_valid(schedule, EnrollmentState(taken)),
+                validator.validate(schedule, taken)[0])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)